@@ -0,0 +1,403 @@
+'''
+>>> Task Manager Benchmarks
+
+Generates a synthetic 'user.txt' and 'tasks.txt' register of configurable size and times the hot paths of task_manager.py against it:
+  - load_tasks and update_tasks_file,
+  - load_filtered_tasks for each filter, including a saved filter,
+  - sort_tasks for each sort order,
+  - generate_reports,
+  - the task listing loops of view_all and view_mine.
+
+Screens are rendered into a null stream, and input() and clear_screen() are replaced so that no keypresses are needed.
+Results are written as JSON so runs of different revisions can be compared:
+
+... python benchmark.py --tasks 100000 --users 1000 --output new.json
+... python benchmark.py --compare old.json new.json
+
+Operator sessions recorded with 'python task_manager.py --record-session FILE' can be replayed through the real menus,
+many at once, to measure the latency of each menu action:
+
+... python benchmark.py --replay session.txt --sessions 20 --register ./live-copy
+'''
+
+#==================== Imports ====================
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+
+import task_manager
+
+#==================== Global variables ====================
+date_format = task_manager.date_format
+filter_choices = ['1', '2', '3', '4', '5', '6', '7', '']
+benchmark_saved_filter = 'benchmark' # Saved filter opened by filter '7'
+words = (
+    "report review client invoice budget meeting update design server deploy printer network backup audit "
+    "contract schedule training payroll inventory order supplier website database release ticket support "
+    "quarterly monthly weekly urgent draft final prepare check fix write call send plan test migrate"
+).split()
+
+
+# Writes a synthetic user and task register
+def generate_register(directory, task_count, user_count, seed=0):
+    """
+    Writes a synthetic 'user.txt' and 'tasks.txt' to a directory.
+
+    Arguments:
+        directory (str): The directory to write the files to.
+        task_count (int): The number of tasks to generate.
+        user_count (int): The number of users to generate, including the ADMIN.
+        seed (int): The seed for the random generator, so that runs are repeatable.
+
+    Returns:
+        usernames (list): The generated usernames, busiest assignee first after the ADMIN.
+
+    Due dates are skewed the way a live register is: most fall in the next few weeks, a share is overdue and a long tail
+    reaches 18 months ahead. Assignees are skewed towards the first users, a small share of tasks is assigned by users
+    that are no longer in the register, and most tasks keep the default priority.
+    """
+
+    generator = random.Random(seed)
+    today = date.today()
+    usernames = ['admin'] + [f"user{number:06d}" for number in range(1, user_count)]
+
+    with open(os.path.join(directory, "user.txt"), "w") as user_file:
+        for username in usernames:
+            user_file.write(f"{username};Password1\n")
+
+    with open(os.path.join(directory, "tasks.txt"), "w") as tasks_file:
+        lines = []
+        for task_id in range(1, task_count + 1):
+            assigned_to = usernames[int(len(usernames) * generator.random() ** 2)]
+            if generator.random() < 0.02:
+                assigned_by = f"former{generator.randrange(100):03d}"
+            elif generator.random() < 0.5:
+                assigned_by = 'admin'
+            else:
+                assigned_by = usernames[generator.randrange(len(usernames))]
+
+            # Exponential skew around today: roughly a quarter overdue, most due within weeks
+            due_in_days = min(int(generator.expovariate(1 / 30)) - 10, 540)
+            due_date = today + timedelta(days=due_in_days)
+            date_assigned = min(due_date - timedelta(days=generator.randint(0, 60)), today)
+            task_status = "Yes" if generator.random() < (0.7 if due_in_days < 0 else 0.2) else "No"
+
+            title = " ".join(generator.choice(words) for _ in range(generator.randint(2, 4))).capitalize()[:30].ljust(5, ".")
+            description = " ".join(generator.choice(words) for _ in range(int(generator.paretovariate(1.5) * 6)))[:1000].ljust(5, ".")
+            priority = generator.choices(list(task_manager.task_priorities), weights=(2, 6, 2))[0]
+
+            lines.append(f"{assigned_to};{assigned_by};{title};{description};{due_date.strftime(date_format)};{date_assigned.strftime(date_format)};{task_status};{task_id};{priority}\n")
+            if len(lines) == 10_000:
+                tasks_file.writelines(lines)
+                lines = []
+        tasks_file.writelines(lines)
+
+    return usernames
+
+# Points task_manager at the synthetic register and replaces interactive calls
+def prepare_task_manager(directory, current_user):
+    """
+    Points task_manager at the files in a directory and replaces input() and clear_screen().
+
+    Arguments:
+        directory (str): The directory holding the synthetic register.
+        current_user (str): The user the benchmarks run as.
+
+    The filter prompt of view_all and view_mine is answered with the filter in task_manager.benchmark_filter,
+    every other prompt with '-1' so that screens return to the main menu. The current user gets a saved filter for
+    filter '7', opened often enough to be kept as a materialized view.
+    """
+
+    point_task_manager(directory)
+    task_manager.session.current_user = current_user
+    task_manager.benchmark_filter = ''
+
+    saved_filters = task_manager.load_saved_filters()
+    saved_filters.setdefault(current_user, {})[benchmark_saved_filter] = {
+        'assigned_to': current_user, 'assigned_by': None, 'status': 'open', 'due_from_days': None, 'due_to_days': 30,
+        'text': 'report', 'uses': task_manager.materialize_after_uses
+    }
+    task_manager.write_saved_filters(saved_filters)
+
+    def scripted_input(prompt=""):
+        return task_manager.benchmark_filter if prompt.startswith("Select an option") else '-1'
+
+    task_manager.input = scripted_input
+    task_manager.clear_screen = lambda: None
+
+# Points task_manager at the files in a directory
+def point_task_manager(directory):
+    """
+    Points all task_manager file paths, including the team shards, at a directory.
+
+    Arguments:
+        directory (str): The directory holding the register.
+    """
+
+    task_manager.script_directory = directory
+    task_manager.teams_directory = os.path.join(directory, "teams")
+    task_manager.team_directory_file_path = os.path.join(directory, "team_directory.txt")
+    task_manager.team_overview_file_path = os.path.join(directory, "team_overview.txt")
+    task_manager.select_team_shard(task_manager.default_team)
+
+# Returns the benchmarked operations
+def get_benchmarks():
+    """
+    Returns the operations to time, by name.
+
+    Returns:
+        benchmarks (dict): Benchmark name -> function taking no arguments.
+    """
+
+    def load_tasks():
+        task_manager.load_tasks()
+
+    def update_tasks_file():
+        task_manager.update_tasks_file(task_list)
+
+    def filtered(filter_choice):
+        return lambda: task_manager.load_filtered_tasks(filter_choice, saved_filter_name=benchmark_saved_filter)
+
+    def sorted_by(sort_order):
+        return lambda: task_manager.sort_tasks(task_list, sort_order)
+
+    def view(function, filter_choice):
+        def run():
+            task_manager.benchmark_filter = filter_choice
+            function()
+        return run
+
+    task_list = task_manager.load_tasks()
+
+    benchmarks = {
+        'load_tasks': load_tasks,
+        'update_tasks_file': update_tasks_file,
+    }
+    for filter_choice in filter_choices:
+        benchmarks[f"load_filtered_tasks[{filter_choice or 'all'}]"] = filtered(filter_choice)
+    for sort_order in task_manager.task_sort_orders.values():
+        benchmarks[f"sort_tasks[{sort_order}]"] = sorted_by(sort_order)
+    benchmarks['generate_reports'] = task_manager.generate_reports
+    benchmarks['view_all'] = view(task_manager.view_all, '')
+    benchmarks['view_mine'] = view(task_manager.view_mine, '')
+    return benchmarks
+
+# Times a single operation
+def run_benchmark(function, repeat):
+    """
+    Times an operation and measures its peak memory.
+
+    Arguments:
+        function (function): The operation to time.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        result (dict): The wall time of each run, the best and median run in seconds, and the peak traced memory in bytes.
+
+    Peak memory comes from one extra run under tracemalloc, so tracing does not slow the timed runs.
+    """
+
+    timings = []
+    with open(os.devnull, "w") as null_output, contextlib.redirect_stdout(null_output):
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start_time)
+
+        tracemalloc.start()
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'runs': timings,
+        'best_seconds': timings[0],
+        'median_seconds': timings[len(timings) // 2],
+        'peak_memory_bytes': peak_memory
+    }
+
+# Replays one recorded session, in a worker thread or process
+def replay_session(answers):
+    """
+    Runs one recorded session through the menus of task_manager, which must already point at the register.
+
+    Arguments:
+        answers (list): The recorded answers, in order.
+
+    Returns:
+        result (tuple): The (menu option, seconds) timings of the session's actions and the session's wall time in seconds.
+    """
+
+    start_time = time.perf_counter()
+    action_timings = task_manager.run_session(answers)
+    return action_timings, time.perf_counter() - start_time
+
+# Replays recorded sessions side by side
+def run_replay(directory, recordings, session_count, use_threads):
+    """
+    Replays recorded sessions concurrently and summarises the latency of each menu action.
+
+    Arguments:
+        directory (str): The directory holding the register the sessions run against.
+        recordings (list): The answers of each recorded session.
+        session_count (int): The number of sessions to run at once, taking the recordings in turn.
+        use_threads (bool): True to run the sessions in threads of this process instead of separate processes.
+
+    Returns:
+        result (dict): Per menu option, the number of runs and the median, 90th and 99th percentile and slowest latency
+        in milliseconds, and the same for the wall time of whole sessions.
+
+    Processes isolate the task indexes and the team shard, as separate terminals would. Threads share them, as the
+    sessions of one server would, taking turns on the task index lock. The file paths are set once before the workers
+    start. Logging in selects the shard already in use without marking the shared indexes out of date, while sessions
+    of other teams wait for the shard (see task_manager.select_team_shard()).
+    """
+
+    def summarise(timings):
+        timings = sorted(timings)
+        percentile = lambda fraction: timings[min(int(len(timings) * fraction), len(timings) - 1)] * 1000
+        return {'runs': len(timings), 'p50_ms': percentile(0.5), 'p90_ms': percentile(0.9), 'p99_ms': percentile(0.99),
+                'max_ms': timings[-1] * 1000}
+
+    point_task_manager(directory)
+    if use_threads:
+        executor = ThreadPoolExecutor(max_workers=session_count)
+    else:
+        executor = ProcessPoolExecutor(max_workers=session_count, initializer=point_task_manager, initargs=(directory,))
+    with executor:
+        sessions = list(executor.map(replay_session, [recordings[number % len(recordings)] for number in range(session_count)]))
+
+    action_timings = {}
+    for session_timings, _ in sessions:
+        for menu_choice, seconds in session_timings:
+            action_timings.setdefault(menu_choice, []).append(seconds)
+
+    return {
+        'actions': {menu_choice: summarise(timings) for menu_choice, timings in sorted(action_timings.items())},
+        'sessions': summarise([session_seconds for _, session_seconds in sessions])
+    }
+
+# Returns the current git revision
+def get_revision():
+    """
+    Returns the git revision of the working tree, or None outside of a git repository.
+    """
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Prints the change between two result files
+def compare_results(old_path, new_path):
+    """
+    Prints the best wall time and peak memory of each benchmark in two result files side by side.
+
+    Arguments:
+        old_path (str): The JSON results of the baseline revision.
+        new_path (str): The JSON results of the revision to compare.
+    """
+
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old_results = json.load(old_file)
+        new_results = json.load(new_file)
+
+    print(f"{'Benchmark': <28}{'Old ms': >12}{'New ms': >12}{'Speedup': >9}{'Old MB': >10}{'New MB': >10}")
+    for name, new in new_results['results'].items():
+        old = old_results['results'].get(name)
+        if old is None:
+            continue
+        speedup = old['best_seconds'] / new['best_seconds'] if new['best_seconds'] > 0 else float('inf')
+        print(f"{name: <28}{old['best_seconds'] * 1000: >12.2f}{new['best_seconds'] * 1000: >12.2f}{speedup: >8.2f}x"
+              f"{old['peak_memory_bytes'] / 2**20: >10.1f}{new['peak_memory_bytes'] / 2**20: >10.1f}")
+
+# Entry point of the benchmarks
+def main():
+    """
+    Parses the command line, generates the register, runs the benchmarks and writes the JSON results.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark task_manager.py against a synthetic register.")
+    parser.add_argument("--tasks", type=int, default=10_000, help="number of tasks to generate (default 10000)")
+    parser.add_argument("--users", type=int, default=100, help="number of users to generate (default 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark (default 3)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the register generator")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run only the benchmarks starting with these names")
+    parser.add_argument("--directory", help="generate the register here and keep it instead of using a temporary directory")
+    parser.add_argument("--output", help="write the JSON results to this file instead of the standard output")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two JSON result files and exit")
+    parser.add_argument("--replay", nargs="+", metavar="SESSION", help="replay sessions recorded with '--record-session' instead of the benchmarks")
+    parser.add_argument("--sessions", type=int, default=1, help="sessions to replay at once (default 1)")
+    parser.add_argument("--processes", action="store_true", help="replay each session in its own process (the default)")
+    parser.add_argument("--threads", action="store_true", help="replay the sessions in threads sharing one process instead of one process each")
+    parser.add_argument("--register", metavar="DIRECTORY", help="replay against a copy of the register in this directory instead of a generated one")
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        compare_results(*arguments.compare)
+        return
+
+    with contextlib.ExitStack() as stack:
+        directory = arguments.directory or stack.enter_context(tempfile.TemporaryDirectory())
+        os.makedirs(directory, exist_ok=True)
+
+        start_time = time.perf_counter()
+        if arguments.replay and arguments.register:
+            # Replays change the register, so they run against a copy
+            shutil.copytree(arguments.register, directory, dirs_exist_ok=True)
+        else:
+            usernames = generate_register(directory, arguments.tasks, arguments.users, arguments.seed)
+        generate_seconds = time.perf_counter() - start_time
+
+        if arguments.replay:
+            recordings = []
+            for recording_path in arguments.replay:
+                with open(recording_path) as recording_file:
+                    recordings.append(recording_file.read().splitlines())
+            print(f"Replaying {arguments.sessions} sessions...", file=sys.stderr)
+            results = run_replay(directory, recordings, arguments.sessions, arguments.threads)
+        else:
+            # Run as the busiest regular user so view_mine has the most tasks to list
+            prepare_task_manager(directory, usernames[1] if len(usernames) > 1 else usernames[0])
+
+            results = {}
+            for name, function in get_benchmarks().items():
+                if arguments.only and not any(name.startswith(prefix) for prefix in arguments.only):
+                    continue
+                print(f"Running {name}...", file=sys.stderr)
+                results[name] = run_benchmark(function, arguments.repeat)
+
+        report = {
+            'revision': get_revision(),
+            'python': platform.python_version(),
+            'date': date.today().isoformat(),
+            'tasks': None if arguments.register else arguments.tasks,
+            'users': None if arguments.register else arguments.users,
+            'tasks_file_bytes': os.path.getsize(task_manager.tasks_file_path),
+            'generate_seconds': generate_seconds,
+            'results': results
+        }
+
+    output = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ With this program you can:
   - view tasks assigned to loged in user,
   - view all tasks,
   - mark tasks as complete or edit them,
+  - search tasks by words in their title or description,
   - with admin rights it lets you display statistics, delete existing users and generate reports
 All usernames, passwords and tasks are stored in txt files, as well as user overview and task overview reports if they have been generated.
 
@@ -18,9 +19,26 @@ Use the following username and password to access the ADMIN rights:
 '''
 
 #==================== Imports ====================
+import atexit
+import heapq
+import io
+import json
 import os
-from datetime import datetime, date
-from dateutil.relativedelta import relativedelta
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import chain, islice
+from operator import itemgetter, le
+
+try:
+    import fcntl # Locks the event log between processes (not available on Windows)
+except ImportError:
+    fcntl = None
+# gzip, locale and concurrent.futures are imported by the functions that use them, as most sessions never need them
 
 #==================== Global variables ====================
 date_format = "%d/%m/%Y" # Input: 01/12/2023
@@ -29,14 +47,254 @@ line = "-"
 line_width = 65
 line_width_menu = 32
 press_enter_message = "Press 'Enter' to return to the main menu..."
-current_user = None
+whitespace_pattern = re.compile(r"\s") # Finds whitespace in new usernames and passwords
+digit_pattern = re.compile(r"\d") # Finds digits in new passwords
+tasks_file_header = "#tasks v2\n" # First line of 'tasks.txt' files with escaped fields, files without it are read as the legacy format
+task_field_escapes = str.maketrans({"\\": "\\\\", ";": "\\s", "\n": "\\n", "\r": "\\r"}) # Escapes of the text fields of 'tasks.txt'
+task_field_unescapes = {"\\": "\\", "s": ";", "n": "\n", "r": "\r"} # Character after a backslash -> character it stands for
+escaped_character_pattern = re.compile(r"\\(.)", re.DOTALL) # Finds escaped characters in the text fields of 'tasks.txt'
+unescaped_character_pattern = re.compile(r"[\\\n\r]") # Finds characters other than ';' that have to be escaped
+default_team = "default" # Team of users not listed in the team directory, stored beside 'task_manager.py'
+active_team = default_team # Team whose shard the program currently reads and writes
+parallel_load_threshold = 32 * 1024 * 1024 # 'tasks.txt' files from this size (in bytes) are parsed by several processes
+reminder_lead_days = (7, 1, 0) # Days before the due date the deadline scheduler sends reminders
+archive_age_days = 180 # Completed tasks due more than this many days ago are moved to the archive
+event_log_max_bytes = 10 * 1024 * 1024 # The event log is rotated once it reaches this size (in bytes)
+event_log_max_files = 50 # Rotated event log files kept before the oldest is deleted
+materialize_after_uses = 3 # Saved filters opened this many times are kept as materialized views
+task_priorities = {1: "High", 2: "Medium", 3: "Low"} # Stored task priority -> name, higher priorities have lower numbers
+default_task_priority = 2 # Priority of tasks stored before priorities were added, and of new tasks if none is chosen
+task_sort_orders = {'': 'due_date', '1': 'priority', '2': 'assignee', '3': 'date_assigned'} # Sort menu choice -> sort order
+memory_budget_bytes = None # Memory the tasks may take (in bytes), None for no limit; set with --memory-budget or TASK_MANAGER_MEMORY_BUDGET
+task_memory_factor = 8 # Bytes of memory a loaded and indexed task takes per byte of its line in 'tasks.txt'
+external_sort_run_bytes = 64 * 1024 * 1024 # Bytes of 'tasks.txt' lines sorted in memory at a time when no memory budget is set
+external_sort_fan_in = 64 # Sorted run files merged at a time when compacting 'tasks.txt'
+trend_weeks = 8 # Weeks shown by the trends report
+workload_weights = (1, 2, 3) # Weights of open, overdue and upcoming tasks in a user's workload score
+workload_upcoming_days = 7 # Incomplete tasks due within this many days count as upcoming work
+assignee_suggestion_count = 5 # Least loaded users suggested when adding a task
 
 #==================== Global File Paths ====================
 script_directory = os.path.dirname(os.path.abspath(__file__))
 user_file_path = os.path.join(script_directory, "user.txt")
 tasks_file_path = os.path.join(script_directory, "tasks.txt")
 task_overview_file_path = os.path.join(script_directory, "task_overview.txt")
-user_overview_file_path = os.path.join(script_directory, "task_overview.txt")
+user_overview_file_path = os.path.join(script_directory, "user_overview.txt")
+deadline_digest_file_path = os.path.join(script_directory, "deadline_digest.txt")
+reminder_spool_directory = os.path.join(script_directory, "reminders")
+scheduler_inbox_file_path = os.path.join(script_directory, "deadline_scheduler_inbox.txt")
+archive_directory = os.path.join(script_directory, "archive")
+events_directory = os.path.join(script_directory, "events")
+quarantine_file_path = os.path.join(script_directory, "tasks_quarantine.txt")
+sync_version_file_path = os.path.join(script_directory, "sync_version.txt")
+saved_filters_file_path = os.path.join(script_directory, "saved_filters.json")
+report_history_file_path = os.path.join(script_directory, "report_history.csv")
+trends_report_file_path = os.path.join(script_directory, "trends_report.txt")
+# Team shards: each team other than the default team has its own copy of the files above in 'teams/<team>'
+teams_directory = os.path.join(script_directory, "teams")
+team_directory_file_path = os.path.join(script_directory, "team_directory.txt")
+team_overview_file_path = os.path.join(script_directory, "team_overview.txt")
+
+#==================== Global Task Indexes ====================
+indexed_tasks = {} # Task ID -> indexed task
+task_index_signature = None # Signature of 'tasks.txt' the indexes were built from
+task_index_lock = threading.RLock() # Held while the indexes are rebuilt, changed or read, as simulated sessions share them across threads
+# Search index
+search_index = {} # Term -> set of IDs of tasks containing the term
+search_terms = [] # All indexed terms kept sorted for prefix lookups
+search_task_terms = {} # Task ID -> set of terms indexed for the task
+# Calendar index
+calendar_index = {} # Due day -> set of IDs of incomplete tasks due that day
+calendar_days = [] # Due days with incomplete tasks, kept sorted
+calendar_task_days = {} # Task ID -> due day the incomplete task is filed under
+# User indexes
+assignee_index = {} # Username -> set of IDs of tasks assigned to the user
+assignee_task_users = {} # Task ID -> username the task is assigned to
+assigner_index = {} # Username -> set of IDs of tasks assigned by the user
+assigner_task_users = {} # Task ID -> username that assigned the task
+
+materialized_views = {} # (username, filter name) -> materialized view of a frequently opened saved filter
+
+sort_indexes = {} # Sort order -> sort keys of all tasks kept sorted, each ending with the task ID, built on first use
+sort_task_keys = {} # Sort order -> task ID -> sort key of the task in that order
+
+workload_counts = {} # Username -> [open, overdue, upcoming] counts of incomplete tasks assigned to the user
+workload_heap = [] # (workload score, username) entries, least loaded first; entries with an outdated score are skipped
+workload_day = None # Day the overdue and upcoming counts were made for, None until built
+
+#==================== Profiling ====================
+# Set TASK_MANAGER_PROFILE=1 or pass '--profile' to collect timings and file sizes of the hot functions
+profiling_enabled = os.environ.get("TASK_MANAGER_PROFILE") == "1" or "--profile" in sys.argv
+# Set TASK_MANAGER_CAPTURE to 'cprofile' or 'tracemalloc' to capture the menu action named in TASK_MANAGER_CAPTURE_ACTION (e.g. 'va')
+profile_capture_mode = os.environ.get("TASK_MANAGER_CAPTURE", "").lower()
+profile_capture_action = os.environ.get("TASK_MANAGER_CAPTURE_ACTION", "").lower()
+profile_timings = {} # Function name -> call count, total/max seconds and histogram of call durations
+profile_bytes = {} # Function name -> bytes read or written
+
+#==================== Terminal Renderer ====================
+ansi_clear_screen = "\033[H\033[2J\033[3J" # Moves the cursor to the top left and erases the screen and its scrollback
+screen_renderer = None # Screen renderer standing in for sys.stdout while the menus run
+
+#==================== Task Cards ====================
+task_card_layouts = ('mine', 'all', 'search') # Card layouts of 'View My Tasks', 'View All Tasks' and 'Search Tasks'
+task_card_cache = {} # (task ID, card layout) -> (assignee deleted, assigner deleted, rendered card without its number)
+task_card_day = None # Day the cached cards were rendered on, as their due date notes count days from today
+task_card_source = None # ('tasks.txt' path, file signature) the cached cards match, so other shards or outside changes are not shown
+task_card_cache_limit = 100000 # Cached cards kept before the cache is emptied
+
+#==================== Sessions ====================
+session = threading.local() # State of the session running in each thread, so simulated sessions can run side by side
+session.current_user = None # Username logged in to the session of the main thread
+shard_condition = threading.Condition() # Guards the team shard shared by the sessions of this process, see select_team_shard()
+shard_sessions = set() # Threads of the simulated sessions holding the active team's shard
+session_streams_installed = False # True once sys.stdin and sys.stdout are routed through the sessions
+
+
+# Records the duration of every call to the decorated function
+def instrumented(function):
+    """
+    Wraps a function to record the number of calls, total and maximum duration and a histogram of call durations.
+
+    Arguments:
+        function (function): The function to measure.
+
+    Returns:
+        wrapper (function): The measuring wrapper, or the function itself if profiling is not enabled.
+
+    The histogram counts calls per power-of-two bucket of microseconds, so a bucket labelled '<= 1024 us'
+    counts calls that took more than 512 and up to 1024 microseconds.
+    """
+
+    if not profiling_enabled:
+        return function
+
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start_time
+            timing = profile_timings.setdefault(function.__name__, {'calls': 0, 'total': 0.0, 'max': 0.0, 'histogram': {}})
+            timing['calls'] += 1
+            timing['total'] += duration
+            timing['max'] = max(timing['max'], duration)
+            bucket = 1 << int(duration * 1_000_000).bit_length()
+            timing['histogram'][bucket] = timing['histogram'].get(bucket, 0) + 1
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+# Holds the task index lock for every call to the decorated function
+def holding_task_indexes(function):
+    """
+    Wraps a function that reads or changes the task indexes so it runs while holding 'task_index_lock'.
+
+    Arguments:
+        function (function): The function using the task indexes.
+
+    Returns:
+        wrapper (function): The locking wrapper.
+
+    Sessions run in separate threads (see run_session()) share the indexes, so a thread must not read them while another
+    rebuilds them. The lock is reentrant, so locked functions can call each other.
+    """
+
+    def wrapper(*args, **kwargs):
+        with task_index_lock:
+            return function(*args, **kwargs)
+
+    wrapper.__name__ = function.__name__
+    wrapper.__doc__ = function.__doc__
+    return wrapper
+
+# Records the number of bytes a function read or wrote
+def record_bytes(function_name, direction, byte_count):
+    """
+    Adds to the number of bytes read or written by a function.
+
+    Arguments:
+        function_name (str): The name of the function reading or writing the file.
+        direction (str): Either 'read' or 'written'.
+        byte_count (int): The number of bytes read or written.
+    """
+
+    counts = profile_bytes.setdefault(function_name, {'read': 0, 'written': 0})
+    counts[direction] += byte_count
+
+# Prints the collected timings and byte counts
+def print_profile_summary(output=None):
+    """
+    Prints a summary of the timings and byte counts collected while profiling.
+
+    Arguments:
+        output (file): The stream to print to. Default is the standard error stream.
+    """
+
+    output = output or sys.stderr
+
+    print("\nTask Manager profile", file=output)
+    print(line * line_width, file=output)
+    print(f"{'Function': <22}{'Calls': >7}{'Total ms': >12}{'Mean ms': >10}{'Max ms': >10}", file=output)
+    for function_name, timing in sorted(profile_timings.items(), key=lambda item: item[1]['total'], reverse=True):
+        mean_ms = timing['total'] / timing['calls'] * 1000
+        print(f"{function_name: <22}{timing['calls']: >7}{timing['total'] * 1000: >12.2f}{mean_ms: >10.3f}{timing['max'] * 1000: >10.3f}", file=output)
+        histogram = ", ".join(f"<= {bucket} us: {count}" for bucket, count in sorted(timing['histogram'].items()))
+        print(f"{'': <4}{histogram}", file=output)
+
+    if profile_bytes:
+        print(line * line_width, file=output)
+        print(f"{'Function': <22}{'Bytes read': >15}{'Bytes written': >15}", file=output)
+        for function_name, counts in sorted(profile_bytes.items()):
+            print(f"{function_name: <22}{counts['read']: >15}{counts['written']: >15}", file=output)
+    print(line * line_width, file=output)
+
+# Runs a menu action under cProfile or tracemalloc if it is the action chosen for capture
+@contextmanager
+def capture_menu_action(menu_choice):
+    """
+    Captures a cProfile profile or tracemalloc allocation statistics of a single menu action.
+
+    Arguments:
+        menu_choice (str): The menu option being run.
+
+    Nothing is captured unless TASK_MANAGER_CAPTURE is set and menu_choice matches TASK_MANAGER_CAPTURE_ACTION.
+    The capture is written next to 'task_manager.py' as 'profile_<option>_<time>.prof' for cProfile
+    (readable with the 'pstats' module) or 'profile_<option>_<time>.txt' for tracemalloc.
+    """
+
+    if profile_capture_mode not in ("cprofile", "tracemalloc") or menu_choice != profile_capture_action:
+        yield
+        return
+
+    capture_path = os.path.join(script_directory, f"profile_{menu_choice}_{datetime.now().strftime('%Y%m%d%H%M%S')}")
+
+    if profile_capture_mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(capture_path + ".prof")
+    else:
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current_size, peak_size = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(capture_path + ".txt", "w") as capture_file:
+                capture_file.write(f"Current: {current_size} bytes, peak: {peak_size} bytes\n\n")
+                for statistic in snapshot.statistics("lineno")[:25]:
+                    capture_file.write(f"{statistic}\n")
+
+# Print the profile summary when the program exits
+if profiling_enabled:
+    atexit.register(print_profile_summary)
 
 
 # Displays the current option/screen user currently is in
@@ -70,9 +328,149 @@ def print_welcome_message():
 def clear_screen():
     """
     Clears the console screen.
+
+    When the screen renderer is running, a new frame is started instead and the terminal is only changed where the new
+    screen differs from the last one, once the frame is drawn. Otherwise the ANSI escape codes that move the cursor to
+    the top left and erase the screen and its scrollback are written, instead of starting a 'clear' process.
+    """
+
+    if screen_renderer is not None:
+        screen_renderer.start_frame()
+    else:
+        sys.stdout.write(ansi_clear_screen)
+        sys.stdout.flush()
+
+# Draws the screens of the program on the terminal, changing only the lines that differ from the last screen
+class ScreenRenderer(io.TextIOBase):
+    """
+    Stands in for sys.stdout while the menus run, double buffering each screen.
+
+    Everything printed after clear_screen() is collected into a frame. The frame is drawn when it is flushed, which
+    input() does before reading, or when the program exits. The first draw of a frame compares it line by line with
+    what is on the terminal and rewrites only the lines that changed, so moving between menus neither blanks the
+    terminal nor starts a process. Output added to a frame after it has been drawn is written straight through.
+
+    The terminal itself echoes what the user types, so lines holding an answer are marked as unknown and always
+    rewritten by the next frame. If a frame does not fit the terminal it is drawn in full, as lines that wrap or scroll
+    no longer match the rows the comparison relies on.
+    """
+
+    # Sets up the renderer on top of the real terminal output
+    def __init__(self, terminal):
+        """
+        Arguments:
+            terminal (file): The real terminal output, normally sys.stdout.
+        """
+
+        self.terminal = terminal
+        self.screen_lines = None # Lines on the terminal, None for lines holding typed input, or None if not known
+        self.frame_text = [] # Text printed for the current frame
+        self.drawn_length = None # Length of the frame text already on the terminal, or None if not drawn yet
+        self.input_rows = set() # Rows of the current frame where the user typed an answer
+
+    # Tells print() the renderer accepts output
+    def writable(self):
+        """
+        Returns True, as the renderer can always be written to.
+        """
+
+        return True
+
+    # Adds printed text to the current frame
+    def write(self, text):
+        """
+        Adds text to the current frame without drawing it.
+
+        Arguments:
+            text (str): The printed text.
+
+        Returns:
+            length (int): The number of characters taken.
+        """
+
+        self.frame_text.append(text)
+        return len(text)
+
+    # Starts a new frame, throwing away anything printed for the last frame that was never drawn
+    def start_frame(self):
+        """
+        Starts collecting a new screen, which is compared with the current one when it is drawn.
+        """
+
+        self.frame_text = []
+        self.drawn_length = None
+        self.input_rows = set()
+
+    # Draws the current frame, or the part of it printed since it was last drawn
+    def flush(self):
+        """
+        Draws the frame on the terminal and records what the terminal now shows.
+        """
+
+        text = "".join(self.frame_text)
+        rows = text.split("\n")
+        try:
+            columns, height = os.get_terminal_size(self.terminal.fileno())
+        except (OSError, ValueError):
+            columns, height = 0, 0
+        # Assume the classic terminal size if the terminal does not report one
+        columns, height = columns or 80, height or 24
+        fits_terminal = len(rows) < height and all(len(row) < columns for row in rows)
+
+        if self.drawn_length is None:
+            if self.screen_lines is None or not fits_terminal:
+                output = [ansi_clear_screen, text]
+            else:
+                # Rewrite the changed rows, then erase below the new frame, leaving the cursor at its end
+                output = [f"\033[{row + 1};1H{new_row}\033[K" for row, new_row in enumerate(rows)
+                          if row >= len(self.screen_lines) or self.screen_lines[row] != new_row]
+                output.append(f"\033[{len(rows)};{len(rows[-1]) + 1}H\033[J")
+        else:
+            output = [text[self.drawn_length:]]
+
+        self.terminal.write("".join(output))
+        self.terminal.flush()
+
+        # A frame ending part way through a line is waiting for input, and the user's 'Enter' starts the next line
+        if text and not text.endswith("\n"):
+            self.input_rows.add(len(rows) - 1)
+            self.frame_text = [text, "\n"]
+            text += "\n"
+            rows.append("")
+        self.drawn_length = len(text)
+        self.screen_lines = [None if row in self.input_rows else new_row for row, new_row in enumerate(rows)] if fits_terminal else None
+
+# Replaces the program output with the screen renderer
+def start_screen_renderer():
+    """
+    Starts drawing the screens with the screen renderer, if the output is an interactive terminal.
+
+    The renderer is stopped when the program exits, drawing whatever the last frame holds.
+    """
+
+    global screen_renderer
+
+    if screen_renderer is not None or not sys.stdout.isatty():
+        return
+
+    screen_renderer = ScreenRenderer(sys.stdout)
+    sys.stdout = screen_renderer
+    atexit.register(stop_screen_renderer)
+
+# Puts the real terminal output back in place of the screen renderer
+def stop_screen_renderer():
     """
+    Draws the last frame and gives sys.stdout back to the terminal.
+    """
+
+    global screen_renderer
 
-    os.system("cls" if os.name == "nt" else "clear")
+    if screen_renderer is None:
+        return
+
+    screen_renderer.flush()
+    sys.stdout = screen_renderer.terminal
+    screen_renderer = None
 
 # Prompts the user to log in
 def login():
@@ -82,40 +480,40 @@ def login():
     Returns:
         current_user (str): The current username logged in as a string.
     """
-    
-    # Declare current_user as a global variable
-    global current_user 
 
-    users = load_users()
-    
     clear_screen()
 
     print_welcome_message()
     
     print("\nEnter username and password to log in.")
-    while current_user is None:
-        current_user = input("Username: ").lower()
+    while session.current_user is None:
+        session.current_user = input("Username: ").lower()
 
         # Check if input is empty after stripping whitespace
-        if len(current_user.strip()) == 0: 
+        if len(session.current_user.strip()) == 0: 
             print("You didn't enter anything. Try again.")
-            current_user = None  # Reset the current_user back to None
+            session.current_user = None  # Reset the current user back to None
             continue
+
+        # Route to the shard of the user's team and load its users
+        select_team_shard(get_user_team(session.current_user))
+        users = load_users()
+
         # Check if entered user exists in register
-        elif current_user not in users:
-            print(f"Username '{current_user}' does not exist. Try again.")
-            current_user = None  # Reset the current_user variable
+        if session.current_user not in users:
+            print(f"Username '{session.current_user}' does not exist. Try again.")
+            session.current_user = None  # Reset the current user
             continue
 
         current_password = input("Password: ")
 
         # Check if password is correct
-        if not verify_password(users, current_user.lower(), current_password):
+        if not verify_password(users, session.current_user.lower(), current_password):
             print("Wrong password.")
-            current_user = None
+            session.current_user = None
         else:
-            input(f"\nWelcome {current_user.upper()}, press 'Enter' to continue...")
-            return current_user
+            input(f"\nWelcome {session.current_user.upper()}, press 'Enter' to continue...")
+            return session.current_user
 
 # Logs out the current user
 def logout():
@@ -123,10 +521,8 @@ def logout():
     Logs out the current user and returns to the login screen.
     """
     
-    global current_user
-    
     # Set current user to 'None' and return to the login screen
-    current_user = None
+    session.current_user = None
     login()
 
 # Create 'user.txt' file if it doesn't exist
@@ -195,6 +591,7 @@ def create_tasks_file():
                 clear_screen()
 
 # Returns a dictionary of all users
+@instrumented
 def load_users():
     """
     Loads all users from the 'user.txt' file into a dictionary.
@@ -208,6 +605,8 @@ def load_users():
         for line in user_file:
             username, password = line.strip().split(";")
             users[username.lower()] = password
+        if profiling_enabled:
+            record_bytes("load_users", "read", user_file.tell())
     return users
 
 # Presents main menu to and prompts to choose from provided options
@@ -224,6 +623,7 @@ def main_menu():
         'a': 'Add Task',
         'va': 'View All Tasks',
         'vm': 'View My Tasks',
+        's': 'Search Tasks',
         'cp': 'Change Password',
         'l': 'Log Out',
         'e': 'Exit'
@@ -232,14 +632,24 @@ def main_menu():
     admin_menu = {
         'gr': 'Generate Reports',
         'ds': 'Display Statistics',
-        'du': 'Delete User'
+        'du': 'Delete User',
+        'dd': 'Deadline Digest',
+        'at': 'Archive Tasks',
+        'st': 'Switch Team',
+        'tr': 'Team Reports',
+        'rt': 'Report Trends'
     }
+
+    # Offer the profile summary while profiling is enabled
+    if profiling_enabled:
+        regular_menu['pf'] = 'Profile Summary'
     
     # Clear the console whenever main_menu() function is called
     clear_screen()
 
     print_welcome_message()
-    print(f"Login: {current_user.upper()}")
+    print(f"Login: {session.current_user.upper()}")
+    print(f"Team: {active_team}")
     print(line * line_width_menu)
     print("Main menu:")
 
@@ -247,7 +657,7 @@ def main_menu():
         print(f"{option.ljust(2)} - {description}")
 
     # Display options for the ADMIN user
-    if current_user == 'admin':
+    if session.current_user == 'admin':
         print("\nAdmin options:")
         for option, description in admin_menu.items():
             print(f"{option.ljust(2)} - {description}")
@@ -261,7 +671,9 @@ def register_user():
     """
     Allows an existing user to register a new user by providing a username and password.
     
-    Writes the username and password to the 'user.txt' file.
+    Writes the username and password to the 'user.txt' file of the team the new user joins.
+    Regular users register users into their own team, the ADMIN can choose any team (a new team is created if needed).
+    Usernames are unique across all teams, so the team directory can route each login to its team.
     """
     
     users = load_users()
@@ -270,17 +682,42 @@ def register_user():
     # Clear the screen and display menu option user currently is in
     print_screen_name("Register User")
 
+    # Let the ADMIN choose the team of the new user
+    team = active_team
+    if session.current_user == 'admin':
+        while True:
+            team_choice = input(f"Enter the team of the new user or press 'Enter' for team '{active_team}': ").lower()
+            if team_choice == '' or is_valid_team_name(team_choice):
+                team = team_choice or active_team
+                break
+            print("\nInvalid team name. Use 2 to 30 letters, digits, '-' or '_'.")
+
+    # Collect the usernames taken in any team: users listed in the team directory and users of the default team
+    team_directory = load_team_directory()
+    with using_team_shard(default_team):
+        taken_usernames = users.keys() | team_directory.keys() | load_users().keys()
+
     # Display username requirements, promt the user to enter the username for new user and perform checks
-    new_username = verify_new_username(users)
+    new_username = verify_new_username(taken_usernames)
 
     # Display password requirements, prompt the user to enter the new password, and perform checks
     new_password = verify_new_password(current_password)
 
-    # Add the new user to the users list
-    users[new_username.lower()] = new_password
+    # Write the new user information to the 'user.txt' file of the team
+    with using_team_shard(team):
+        team_users = load_users()
+        team_users[new_username.lower()] = new_password
+        write_users(team_users)
+        emit_event("user_registered", username=new_username.lower(), team=team)
 
-    # Write the new user information to the 'user.txt' file
-    write_users(users)
+    # Let the new user be suggested as an assignee in the current team
+    if team == active_team:
+        add_workload_user(new_username.lower())
+
+    # Record the team of the new user in the team directory
+    if team != default_team:
+        team_directory[new_username.lower()] = team
+        write_team_directory(team_directory)
 
     # Print a confirmation message
     print(f"\nNew user '{new_username.upper()}' has been registered.")
@@ -295,6 +732,12 @@ def delete_user():
     This function allows the user to delete a user from the user register. The user is prompted to enter a username,
     and if the username exists, they are asked to confirm the deletion. If confirmed, the user is deleted from the
     register and the changes are saved to the 'user.txt' file.
+
+    If tasks are assigned to the user, they are found through the assignee index and the user chooses to:
+        1 - Reassign them to another user
+        2 - Archive them (move them from 'tasks.txt' to the task archive)
+        Enter - Keep them assigned to the deleted user
+    The chosen action is applied to all of the tasks with a single write of 'tasks.txt'.
     """
 
     users = load_users()
@@ -316,12 +759,107 @@ def delete_user():
 
     # Prompt user for confirmation
     confirm = input("\nAre you sure you want to delete this user? (Y/N): ")
-    if confirm.lower() == 'y':
-        del users[username]
-        write_users(users)
-        input(f"\nUser '{username}' has been deleted. {press_enter_message}")
-    else:
+    if confirm.lower() != 'y':
         input(f"\nDeletion aborted. {press_enter_message}")
+        return
+
+    # Ask what to do with the tasks assigned to the user
+    user_task_ids = {task['task_id'] for task in get_tasks_assigned_to(username)}
+    task_action = ''
+    new_assignee = None
+    if user_task_ids:
+        print(f"\nUser '{username}' has {len(user_task_ids)} assigned task(s).")
+        while True:
+            task_action = input("Enter '1' to reassign them, '2' to archive them or press 'Enter' to keep them: ")
+            if task_action == '1':
+                new_assignee = input("Enter username of the new assignee: ").lower()
+                if new_assignee == username or new_assignee not in users:
+                    print(f"\nUsername '{new_assignee}' is not a valid assignee. Try again.")
+                    continue
+                break
+            if task_action in ('2', ''):
+                break
+            print("\nInvalid input. Try again.")
+
+    if task_action in ('1', '2'):
+        apply_to_user_tasks(user_task_ids, new_assignee)
+
+    del users[username]
+    write_users(users)
+    emit_event("user_deleted", username=username)
+
+    # Remove the user from the team directory
+    team_directory = load_team_directory()
+    if team_directory.pop(username, None) is not None:
+        write_team_directory(team_directory)
+
+    if task_action == '1':
+        input(f"\nUser '{username}' has been deleted and their tasks reassigned to '{new_assignee}'. {press_enter_message}")
+    elif task_action == '2':
+        input(f"\nUser '{username}' has been deleted and their tasks archived. {press_enter_message}")
+    else:
+        input(f"\nUser '{username}' has been deleted. {press_enter_message}")
+
+# Reassigns or archives a batch of tasks
+def apply_to_user_tasks(task_ids, new_assignee):
+    """
+    Reassigns or archives a batch of tasks with a single write of the 'tasks.txt' file.
+
+    Arguments:
+        task_ids (set): The IDs of the tasks to change.
+        new_assignee (str): The user to reassign the tasks to, or None to archive them.
+
+    Archived tasks are moved to the task archive (see archive_tasks()) and removed from the task indexes.
+    """
+
+    task_list = load_tasks()
+    kept_tasks = []
+    changed_tasks = []
+
+    for task in task_list:
+        if task['task_id'] not in task_ids:
+            kept_tasks.append(task)
+            continue
+        changed_tasks.append(task)
+        if new_assignee is not None:
+            task['assigned_to'] = new_assignee
+            kept_tasks.append(task)
+
+    if new_assignee is None:
+        archive_tasks(changed_tasks)
+    update_tasks_file(kept_tasks)
+
+    # Bring the task indexes, deadline scheduler and event log up to date with the batch
+    for task in changed_tasks:
+        if new_assignee is None:
+            unindex_task(task['task_id'])
+        else:
+            index_task(task)
+        notify_deadline_scheduler(task, removed=new_assignee is None)
+    mark_task_indexes_current()
+    event_type = "task_archived" if new_assignee is None else "task_updated"
+    emit_events([{'type': event_type, 'task': task_to_record(task)} for task in changed_tasks])
+
+# Returns the same day a number of months later
+def add_months(day, months):
+    """
+    Adds a number of calendar months to a date.
+
+    Arguments:
+        day (date): The date to start from.
+        months (int): The number of months to add.
+
+    Returns:
+        later_day (date): The same day of the month, months later. Days that do not exist in that month are moved back
+        to its last day, so 31st August plus 18 months is 28th February (29th in a leap year).
+    """
+
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    month += 1
+    # The last day of the month is the day before the first of the next month
+    next_month_start = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return date(year, month, min(day.day, (next_month_start - timedelta(days=1)).day))
 
 # Adds a new task and writes it to the 'tasks.txt' file
 def add_task():
@@ -333,14 +871,21 @@ def add_task():
         - Title of the task (between 5 and 30 characters)
         - Description of the task (between 5 and 1000 characters)
         - Due date of the task (same as today or up to 18 months in the future)
+        - Priority of the task (high, medium or low)
+
+    The least loaded users are listed first to help choose the assignee (see suggest_assignees()).
+    Registers over the memory budget are not loaded: the new task is merged into 'tasks.txt' as the file is streamed.
     """
     
-    task_list = load_tasks()
+    task_list = None if exceeds_memory_budget() else load_tasks()
     users = load_users()
 
     # Clear the screen and display menu option user currently is in
     print_screen_name("Add Task")
 
+    # Show who has the least work to help choose the assignee
+    print_assignee_suggestions(users)
+
     while True:
         # Prompt user to enter username of person the task is assigned to
         task_username = input("Enter username of assignee or enter '-1' to return to the main menu: ")
@@ -352,70 +897,76 @@ def add_task():
             print("\nYou didn't enter anything. Try again.")
             continue
 
-        if task_username.lower() not in users:
-            print(f"\nUsername '{task_username}' does not exist. Please enter a valid username.")
+        error = validate_assignee(task_username, users)
+        if error is not None:
+            print(f"\n{error}")
             continue
 
         # Prompt user to enter task title and perform checks
         while True:
             task_title = input("Enter title for the task: ")
-
-            if len(task_title) == 0 or task_title.isspace():
-                print("\nTitle cannot be empty.")
-                continue
-
-            if len(task_title) < 5 or len(task_title) > 30:
-                print("\nTitle must be 5 to 30 characters.")
-                continue
-            
-            break
+            error = validate_task_title(task_title)
+            if error is None:
+                break
+            print(f"\n{error}")
         
         while True:
             # Prompt user to enter task description and perform checks
             task_description = input("Enter description of the task: ")
+            error = validate_task_description(task_description)
+            if error is None:
+                break
+            print(f"\n{error}")
 
-            if len(task_description) < 5 or task_description.isspace():
-                print("\nInput too short. Description should be at least 5 characters long.")
-                continue
-            elif len(task_description) > 1000:
-                print("\nInput too long. Description cannot exceed 1000 characters.")
-                continue
-            
-            break
-
-        # Prompt user to enter task due date and perform checks
+        # Prompt user to enter task due date and check it is in the allowed range
+        due_date_bounds = get_due_date_bounds()
         while True:
-            try:
-                task_due_date = input("Due date of the task (DD/MM/YYYY): ")
-                due_date_time = datetime.strptime(task_due_date, date_format)
-                # Convert due_date_time and compare with date range  
-                if due_date_time < datetime.combine(date.today(), datetime.min.time()) or due_date_time > datetime.combine(date.today() + relativedelta(months=18), datetime.max.time()):
-                    print("\nInvalid due date. Due date must be same as today or up to 18 months in the future.")
-                    continue
+            due_date_time, error = validate_due_date(input("Due date of the task (DD/MM/YYYY): "), due_date_bounds)
+            if error is None:
+                break
+            print(f"\n{error}")
 
+        # Prompt user to enter task priority, medium if left empty
+        while True:
+            priority_text = input("Priority of the task ('1' high, '2' medium, '3' low) or press 'Enter' for medium: ")
+            if priority_text == '':
+                task_priority = default_task_priority
                 break
-            except ValueError:
-                print("\nInvalid date format. Please use the specified format (e.g., 01/12/2023 for 1st December 2023).")
+            task_priority, error = validate_task_priority(priority_text)
+            if error is None:
+                break
+            print(f"\n{error}")
 
         # Get today's date
         current_date = date.today()
 
         # Add the data to the tasks list
         new_task = {
+            'task_id': get_next_task_id(iter_tasks() if task_list is None else task_list),
             'assigned_to': task_username,
-            'assigned_by': current_user,
+            'assigned_by': session.current_user,
             'task_title': task_title,
             'task_description': task_description,
             'due_date': due_date_time,
             'date_assigned': current_date,
-            'task_status': False
+            'task_status': False,
+            'priority': task_priority
         }
 
-        # Add the created task to the task list
-        task_list.append(new_task)
+        if task_list is None:
+            # Merge the task into the streamed 'tasks.txt' file
+            stream_task_change(new_task)
+        else:
+            # Add the created task to the task list, keeping it sorted by due date
+            insort(task_list, new_task, key=itemgetter('due_date'))
 
-        # Update the tasks in the 'tasks.txt' file
-        update_tasks_file(task_list)
+            # Update the tasks in the 'tasks.txt' file
+            update_tasks_file(task_list)
+            # Add the new task to the task indexes
+            update_task_indexes(new_task)
+        # Tell the deadline scheduler and event log about the new task
+        notify_deadline_scheduler(new_task)
+        emit_event("task_added", task=task_to_record(new_task))
 
         print(f"\nTask '{task_title}' successfully assigned to user '{task_username.upper()}'.")
         choice = input("\nPress 'Enter' to add another task or enter '-1' to return to the main menu...")
@@ -424,19 +975,31 @@ def add_task():
             return
 
 # Allows user to edit task assigned to them or mark it as complete
-def edit_task(filter_choice):
+def edit_task(filter_choice, days_ahead=7, saved_filter_name=None, sort_order='due_date'):
     """
     Allows the user to select a task assigned to them to edit or mark as complete.
 
+    Arguments:
+        filter_choice (str): The filter the tasks were listed with (see load_filtered_tasks()).
+        days_ahead (int): The number of days after today included by filter '6'. Default is 7.
+        saved_filter_name (str): The saved filter opened by filter '7'. Default is None.
+        sort_order (str): The order the tasks were listed in (see prompt_sort_order()). Default is 'due_date'.
+
     This function loads the user information, task list, and current user tasks.
     It prompts the user to choose a task by entering its number, and then presents options to mark the task as complete or edit its details.
     The function performs the chosen action and updates the task list accordingly.
+    Registers over the memory budget are not loaded: the edited task replaces the stored one as 'tasks.txt' is streamed.
     """
 
     users = load_users()
-    task_list = load_tasks()
+    task_list = None if exceeds_memory_budget() else load_tasks()
+    # Streamed edits find the stored task by its ID, so give tasks stored without one their IDs first
+    if task_list is None:
+        number_streamed_tasks()
     # Load filtered tasks without selected filter name
-    filtered_tasks, _ = load_filtered_tasks(filter_choice)
+    filtered_tasks, _ = load_filtered_tasks(filter_choice, days_ahead, saved_filter_name)
+    # Number the tasks in the order they were listed
+    filtered_tasks = sort_tasks(filtered_tasks, sort_order)
 
     while True:
         # Check if there are any tasks in filtered task list
@@ -473,19 +1036,29 @@ def edit_task(filter_choice):
                 if action_choice == '1':
                     # Mark selected task as complete
                     selected_task['task_status'] = True
-                    # Update the task in the 'task_list' by finding its index
-                    for i, task in enumerate(task_list):
-                        if task['task_title'] == selected_task['task_title'] and task['assigned_by'] == selected_task['assigned_by']:
-                            task_list[i] = selected_task
-                            break
-                    # Write the updated 'task_list' to 'tasks.txt' file
-                    update_tasks_file(task_list)
+                    if task_list is None:
+                        # Replace the task in the streamed 'tasks.txt' file
+                        stream_task_change(selected_task)
+                    else:
+                        # Update the task in the 'task_list' by finding its index
+                        for i, task in enumerate(task_list):
+                            if task['task_id'] == selected_task['task_id']:
+                                task_list[i] = selected_task
+                                break
+                        # Write the updated 'task_list' to 'tasks.txt' file
+                        update_tasks_file(task_list)
+                        # Keep the task indexes in step with the updated task
+                        update_task_indexes(selected_task)
+                    notify_deadline_scheduler(selected_task)
+                    emit_event("task_completed", task=task_to_record(selected_task))
 
                     print(f"\nTask marked as complete!")
                     input(press_enter_message)
                     return
                 # Edit selected task
                 elif action_choice == '2':
+                    # The due date before editing, as the task in 'task_list' may be the selected task itself
+                    old_due_date = selected_task['due_date']
                     while True:
                         # Prompt user to assign task to someone else or leave it unchanged
                         new_assignee = input(f"\nEnter username of the assignee for task {task_choice} or press 'Enter' to leave it unchanged: ").lower()
@@ -493,41 +1066,62 @@ def edit_task(filter_choice):
                         if new_assignee == '':
                             break
                         # Check if entered new asignee is an existing user
-                        elif new_assignee not in users:
-                            print(f"\nUsername '{new_assignee}' does not exist. Please enter a valid username.")
+                        error = validate_assignee(new_assignee, users)
+                        if error is not None:
+                            print(f"\n{error}")
                         else:
                             # Update the new assignee for the task and continue to next promt
                             selected_task['assigned_to'] = new_assignee
-                            selected_task['assigned_by'] = current_user
+                            selected_task['assigned_by'] = session.current_user
                             break
 
+                    due_date_bounds = get_due_date_bounds()
                     while True:
                         # Prompt user to change due date or leave it unchanged
                         new_due_date = input("\nEnter the new due date for the task (DD/MM/YYYY) or press 'Enter' to leave it unchanged: ")
                         # If 'Enter' leave due date unchanged
                         if len(new_due_date) == 0:
                             break
-                        try:
-                            # Perform check on date format
-                            new_due_date_time = datetime.strptime(new_due_date, date_format)
-                            # Perform check on due date range
-                            if new_due_date_time < datetime.combine(date.today(), datetime.min.time()) or new_due_date_time > datetime.combine(date.today() + relativedelta(months=18), datetime.max.time()):
-                                print("\nInvalid due date. Due date must be the same as today or up to 18 months in the future.")
-                                continue
-                            selected_task['due_date'] = new_due_date_time
-                            break
-                        except ValueError:
-                            print("\nInvalid date format. Please use the format specified (for example: 01/12/2023 for 1st December 2023).")
+                        # Perform checks on date format and due date range
+                        new_due_date_time, error = validate_due_date(new_due_date, due_date_bounds)
+                        if error is not None:
+                            print(f"\n{error}")
                             continue
+                        selected_task['due_date'] = new_due_date_time
+                        break
 
-                    # Update the task in the 'task_list' by finding its index
-                    for i, task in enumerate(task_list):
-                        if task['task_title'] == selected_task['task_title'] and task['assigned_by'] == selected_task['assigned_by']:
-                            task_list[i] = selected_task
+                    while True:
+                        # Prompt user to change priority or leave it unchanged
+                        new_priority = input("\nEnter the new priority ('1' high, '2' medium, '3' low) or press 'Enter' to leave it unchanged: ")
+                        if new_priority == '':
                             break
-
-                    # Write the updated 'task_list' to 'tasks.txt' file
-                    update_tasks_file(task_list)
+                        new_priority, error = validate_task_priority(new_priority)
+                        if error is not None:
+                            print(f"\n{error}")
+                            continue
+                        selected_task['priority'] = new_priority
+                        break
+
+                    if task_list is None:
+                        # Replace the task in the streamed 'tasks.txt' file, at its new place if the due date has changed
+                        stream_task_change(selected_task)
+                    else:
+                        # Update the task in the 'task_list' by finding its index
+                        for i, task in enumerate(task_list):
+                            if task['task_id'] == selected_task['task_id']:
+                                task_list[i] = selected_task
+                                # Move the task to its new place if the due date has changed
+                                if old_due_date != selected_task['due_date']:
+                                    del task_list[i]
+                                    insort(task_list, selected_task, key=itemgetter('due_date'))
+                                break
+
+                        # Write the updated 'task_list' to 'tasks.txt' file
+                        update_tasks_file(task_list)
+                        # Keep the task indexes in step with the updated task
+                        update_task_indexes(selected_task)
+                    notify_deadline_scheduler(selected_task)
+                    emit_event("task_updated", task=task_to_record(selected_task))
                     
                     print("\nTask updated.")
                     input(f"{press_enter_message}")
@@ -556,6 +1150,9 @@ def view_mine():
         2 - Completed tasks
         3 - Overdue tasks
         4 - Tasks assigned by users that no longer exist
+        5 - Tasks due this week
+        6 - Tasks due in the next N days (the user is asked for N)
+        7 - Saved filters (the user picks, saves or deletes a saved filter)
 
     If any other input is provided, all tasks assigned to the current user are displayed.
 
@@ -567,16 +1164,15 @@ def view_mine():
         - Due date
         - [due in days] if task is not completed and not overdue
         - [-days overdue] if task in not completed and overdue
+        - Priority
         - Task completion status (Yes or No)
         - Task description
 
     The function also allows the user to select a task to edit or mark as complete using the edit_task() function.
     """
     
-    # Load a list of all tasks
-    task_list = load_tasks()
-    # List with current user tasks only
-    current_user_tasks = [task for task in task_list if task["assigned_to"] == current_user]
+    # List with current user tasks only, streamed if the register is over the memory budget
+    current_user_tasks, _ = load_filtered_tasks('')
 
     # Clear the screen and display menu option user currently is in
     print_screen_name("View My Tasks")
@@ -592,46 +1188,31 @@ def view_mine():
     print("2 - Completed tasks")
     print("3 - Overdue tasks")
     print("4 - Assigned by users that no longer exist")
+    print("5 - Due this week")
+    print("6 - Due in the next N days")
+    print("7 - Saved filters")
     # Prompt user to choose filter option
     filter_choice = input("Select an option: ")
+    days_ahead = prompt_days_ahead() if filter_choice == '6' else 7
+    saved_filter_name = choose_saved_filter() if filter_choice == '7' else None
+    # Return to filter options if no saved filter was opened
+    if filter_choice == '7' and saved_filter_name is None:
+        view_mine()
+        return
+    sort_order = prompt_sort_order()
 
     # Clear the screen and display menu option user currently is in
     print_screen_name("View My Tasks")
 
-    filtered_tasks, current_filter_name = load_filtered_tasks(filter_choice)
+    filtered_tasks, current_filter_name = load_filtered_tasks(filter_choice, days_ahead, saved_filter_name)
+    filtered_tasks = sort_tasks(filtered_tasks, sort_order)
 
     print(f"Selected filter: {current_filter_name} [ {len(filtered_tasks)} total ]")
-    # Loop through each task and display the details
-    for number, task in enumerate(filtered_tasks, start = 1):
-        task_title = task['task_title']
-        assigned_by = task['assigned_by']
-        assigned_by_label = " [deleted user]" if assigned_by not in load_users() else ""
-        date_assigned = task['date_assigned'].strftime(date_format_output)
-        due_date = task['due_date'].strftime(date_format_output)
-        task_status = 'Yes' if task['task_status'] else 'No'
-        task_description = task['task_description']
-
-        # Calculate the remaining days until the due date
-        remaining_days = (task['due_date'].date() - date.today()).days
-
-        # Display days overdue if the task is overdue and NOT completed
-        if task['due_date'].date() < date.today() and not task['task_status']:
-            due_date += f"\t[{remaining_days} days overdue]"
-        # Display days until the due date if the task is NOT overdue and NOT completed
-        elif task['due_date'].date() > date.today() and not task['task_status']:
-            due_date += f"\t[due in {remaining_days} days]"
-
-        print(line * line_width)
-        print(f"{str(number) + ('.'): <3} {'Task:': <15} {task_title}")
-        print(f"{'': <3} {'Assigned by:': <15} {assigned_by + assigned_by_label}")
-        print(f"{'': <3} {'Date assigned:': <15} {date_assigned}")
-        print(f"{'': <3} {'Due date:': <15} {due_date}")
-        print(f"{'': <3} {'Task complete?': <15} {task_status}")
-        print(f"{'': <3} Task description: {task_description}")
-    print(line * line_width)
+    # Display the details of each task
+    print_task_cards(filtered_tasks, 'mine', load_users())
 
     # Allow the user to select a task assigned to them to edit or mark as complete
-    edit_task(filter_choice)
+    edit_task(filter_choice, days_ahead, saved_filter_name, sort_order)
 
 # Displays tasks assigned to all users
 def view_all():
@@ -643,8 +1224,13 @@ def view_all():
         2 - Completed tasks
         3 - Overdue tasks
         4 - Tasks assigned by users that no longer exist
+        5 - Tasks due this week
+        6 - Tasks due in the next N days (the user is asked for N)
+        7 - Saved filters (the user picks, saves or deletes a saved filter)
 
     If any other input is provided, all tasks are displayed.
+    With option 2 the user can also include completed tasks from the task archive.
+    Registers over the memory budget are only listed with a filter.
 
     Information displayed for each task:
         - Task title
@@ -655,18 +1241,19 @@ def view_all():
         - Due date
         - [due in days] if task is not completed and not overdue
         - [days overdue] if task is not completed and overdue
+        - Priority
         - Task completion status (Yes or No)
         - Task description
     """
     
-    # Load a list of all tasks
-    task_list = load_tasks()
+    # Load a list of all tasks, unless the register is too large for the memory budget
+    task_list = None if exceeds_memory_budget() else load_tasks()
 
     # Clear the screen and display the menu option the user is currently in
     print_screen_name("View All Tasks")
 
     # Print relevant message if there are currently no tasks
-    if len(task_list) == 0:
+    if task_list is not None and len(task_list) == 0:
         input(f"There are currently no tasks in the register. {press_enter_message}")
         return
 
@@ -676,59 +1263,221 @@ def view_all():
     print("2 - Completed tasks")
     print("3 - Overdue tasks")
     print("4 - Assigned by users that no longer exist")
+    print("5 - Due this week")
+    print("6 - Due in the next N days")
+    print("7 - Saved filters")
 
     # Prompt the user to choose a filter option
     filter_choice = input("Select an option: ")
+    days_ahead = prompt_days_ahead() if filter_choice == '6' else 7
+    saved_filter_name = choose_saved_filter() if filter_choice == '7' else None
+    # Return to filter options if no saved filter was opened
+    if filter_choice == '7' and saved_filter_name is None:
+        view_all()
+        return
+    include_archived = filter_choice == '2' and input("Include archived tasks? (Y/N): ").lower() == 'y'
 
-    # Clear the screen and display the menu option the user is currently in
-    print_screen_name("View All Tasks")
-
-    if filter_choice.strip() == "":
+    if filter_choice.strip() == "" and task_list is None:
+        input("\nThere are too many tasks to list them all within the memory budget. Press 'Enter' to choose a filter...")
+        view_all()
+        return
+    elif filter_choice.strip() == "":
         current_filter_name = "All tasks"
         filtered_tasks = task_list
+    elif filter_choice == '7':
+        # Show the matching tasks of all users, not only the current user's
+        current_filter_name = f"Saved filter '{saved_filter_name}'"
+        filtered_tasks = get_saved_view_tasks(session.current_user, saved_filter_name)
     else:
-        filtered_tasks, current_filter_name = load_filtered_tasks(filter_choice)
+        filtered_tasks, current_filter_name = load_filtered_tasks(filter_choice, days_ahead)
+        # Add the completed tasks of the same user from the archive
+        if include_archived:
+            filtered_tasks = filtered_tasks + [task for task in iter_archived_tasks() if task['task_status'] and task['assigned_to'] == session.current_user]
+            current_filter_name += " (including archived)"
+
+    sort_order = prompt_sort_order()
+    # The registered users, taken once for all listings
+    users = load_users()
 
-    print(f"Selected filter: {current_filter_name} [ {len(filtered_tasks)} total ]")
-    # Loop through each task and display the details
-    for number, task in enumerate(filtered_tasks, start=1):
-        task_title = task['task_title']
-        assigned_to = task['assigned_to']
-        assigned_to_label = " [deleted user]" if assigned_to not in load_users() else ""
-        assigned_by = task['assigned_by']
-        assigned_by_label = " [deleted user]" if assigned_by not in load_users() else ""
-        date_assigned = task['date_assigned'].strftime(date_format_output)
-        due_date = task['due_date'].strftime(date_format_output)
-        task_status = 'Yes' if task['task_status'] else 'No'
-        task_description = task['task_description']
-
-        # Calculate the remaining days until the due date
-        remaining_days = (task['due_date'].date() - date.today()).days
-
-        # Display days overdue if the task is overdue and not completed
-        if task['due_date'].date() < date.today() and not task['task_status']:
+    # List the tasks again each time the user changes the sort order
+    while True:
+        print_screen_name("View All Tasks")
+        sorted_tasks = sort_tasks(filtered_tasks, sort_order)
+        print(f"Selected filter: {current_filter_name} [ {len(filtered_tasks)} total ]")
+        # Display the details of each task
+        print_task_cards(sorted_tasks, 'all', users)
+
+        user_choice = input("Enter '-1' to return to main menu, 's' to change the sort order or press 'Enter' to return to filter options: ")
+        if user_choice == '-1':
+            return
+        if user_choice.lower() != 's':
+            break
+        sort_order = prompt_sort_order()
+
+    view_all()
+
+# Renders the details of a task for a task list
+def render_task_card(task, layout, assigned_to_deleted, assigned_by_deleted, today):
+    """
+    Lays out the details of a task as displayed in the task lists, without its number.
+
+    Arguments:
+        task (dict): The task to render.
+        layout (str): 'mine' for 'View My Tasks', 'all' for 'View All Tasks' or 'search' for 'Search Tasks'.
+        assigned_to_deleted (bool): True if the assignee is no longer in the user register.
+        assigned_by_deleted (bool): True if the assigner is no longer in the user register.
+        today (date): Today's date, which the due date notes count from.
+
+    Returns:
+        card (str): The lines of the card, ending with a newline.
+    """
+
+    card_lines = [f"{'Task:': <15} {task['task_title']}"]
+    if layout != 'mine':
+        card_lines.append(f"{'': <3} {'Assigned to:': <15} {task['assigned_to']}{' [deleted user]' if assigned_to_deleted else ''}")
+    card_lines.append(f"{'': <3} {'Assigned by:': <15} {task['assigned_by']}{' [deleted user]' if assigned_by_deleted else ''}")
+    if layout != 'search':
+        card_lines.append(f"{'': <3} {'Date assigned:': <15} {task['date_assigned'].strftime(date_format_output)}")
+
+    due_date = task['due_date'].strftime(date_format_output)
+    if layout != 'search' and not task['task_status']:
+        # Note how many days the incomplete task is overdue or has left
+        remaining_days = (task['due_date'].date() - today).days
+        if remaining_days < 0:
             due_date += f"\t[{remaining_days} days overdue]"
-        # Display days until the due date if the task is not overdue and not completed
-        elif task['due_date'].date() > date.today() and not task['task_status']:
+        elif remaining_days > 0:
             due_date += f"\t[due in {remaining_days} days]"
+    card_lines.append(f"{'': <3} {'Due date:': <15} {due_date}")
 
-        print(line * line_width)
-        print(f"{str(number) + ('.'): <3} {'Task:': <15} {task_title}")
-        print(f"{'': <3} {'Assigned to:': <15} {assigned_to + assigned_to_label}")
-        print(f"{'': <3} {'Assigned by:': <15} {assigned_by + assigned_by_label}")
-        print(f"{'': <3} {'Date assigned:': <15} {date_assigned}")
-        print(f"{'': <3} {'Due date:': <15} {due_date}")
-        print(f"{'': <3} {'Task complete?': <15} {task_status}")
-        print(f"{'': <3} Task description: {task_description}")
-    print(line * line_width)
-    
-    user_choice = input("Enter '-1' to return to main menu or press 'Enter' to return to filter options: ")
-    if user_choice == '-1':
-        return
-    else:
-        view_all()
+    card_lines.append(f"{'': <3} {'Priority:': <15} {task_priorities[task['priority']]}")
+    card_lines.append(f"{'': <3} {'Task complete?': <15} {'Yes' if task['task_status'] else 'No'}")
+    card_lines.append(f"{'': <3} Task description: {task['task_description']}")
+    return "\n".join(card_lines) + "\n"
+
+# Prints a numbered list of tasks, reusing the cards rendered before
+@holding_task_indexes
+def print_task_cards(tasks, layout, users):
+    """
+    Prints tasks as numbered cards separated by lines, taking each card from the task card cache when it is still valid.
+
+    Arguments:
+        tasks (list): The tasks to print, in the order to number them.
+        layout (str): The card layout (see render_task_card()).
+        users (dict): The registered users, to label tasks of deleted users.
+
+    Cards are rendered once and kept until their task changes (see invalidate_task_card()) or the day changes, as the
+    due date notes count days from today. All cards are dropped when the team shard changes or 'tasks.txt' was written
+    other than through the task indexes (by another process, or streamed over the memory budget). A card is also
+    rendered again if one of its users was deleted or registered since. Listing the same tasks again is then mostly
+    joining strings.
+    """
+
+    global task_card_day, task_card_source
+
+    # Cards rendered on another day have outdated due date notes, and cards of another file may show other tasks
+    today = date.today()
+    card_source = (tasks_file_path, get_tasks_file_signature())
+    if today != task_card_day or card_source != task_card_source or len(task_card_cache) > task_card_cache_limit:
+        task_card_cache.clear()
+        task_card_day = today
+        task_card_source = card_source
+
+    separator = line * line_width + "\n"
+    output = []
+    for number, task in enumerate(tasks, start=1):
+        assigned_to_deleted = task['assigned_to'] not in users
+        assigned_by_deleted = task['assigned_by'] not in users
+        card_key = (task['task_id'], layout)
+        cached_card = task_card_cache.get(card_key)
+        if cached_card is None or cached_card[0] != assigned_to_deleted or cached_card[1] != assigned_by_deleted:
+            cached_card = (assigned_to_deleted, assigned_by_deleted,
+                           render_task_card(task, layout, assigned_to_deleted, assigned_by_deleted, today))
+            # Tasks without an ID cannot be told apart, so only their own listing uses their card
+            if task['task_id'] is not None:
+                task_card_cache[card_key] = cached_card
+        output.append(separator)
+        output.append(f"{number}.".ljust(3) + " ")
+        output.append(cached_card[2])
+    output.append(separator)
+    print("".join(output), end="")
+
+# Drops the rendered cards of a task
+def invalidate_task_card(task_id):
+    """
+    Removes the cached cards of a task that was added, edited or removed, so it is rendered again when next listed.
+
+    Arguments:
+        task_id (int): The ID of the task.
+    """
+
+    for layout in task_card_layouts:
+        task_card_cache.pop((task_id, layout), None)
+
+# Prompts the user for the number of days ahead to filter tasks by
+def prompt_days_ahead():
+    """
+    Prompts the user for the number of days after today to include when filtering tasks by due date.
+
+    Returns:
+        days_ahead (int): The number of days entered, or 7 if nothing valid was entered.
+    """
+
+    days_choice = input("Show tasks due in how many days? (press 'Enter' for 7): ")
+    if days_choice.isdigit():
+        return int(days_choice)
+    return 7
+
+# Prompts the user for the order to list tasks in
+def prompt_sort_order():
+    """
+    Prompts the user for the order to list the filtered tasks in.
+
+    Returns:
+        sort_order (str): 'due_date', 'priority', 'assignee' or 'date_assigned', 'due_date' if nothing valid was entered.
+    """
+
+    sort_choice = input("Sort by '1' priority, '2' assignee, '3' date assigned or press 'Enter' for due date: ")
+    return task_sort_orders.get(sort_choice, 'due_date')
+
+# Searches tasks of all users by words in their title or description
+def find_tasks():
+    """
+    Prompts the user for search words and displays all tasks whose title or description contains every word.
+
+    A word ending with '*' matches every word starting with it (for example 'rep*' matches 'report' and 'repair').
+
+    Information displayed for each task:
+        - Task title
+        - Assigned to user
+        - Assigned by user
+        - Due date
+        - Priority
+        - Task completion status (Yes or No)
+        - Task description
+    """
+
+    users = load_users()
+
+    while True:
+        # Clear the screen and display menu option user currently is in
+        print_screen_name("Search Tasks")
+
+        query = input("Enter words to search for (end a word with '*' to match its beginning)\nor enter '-1' to return to the main menu: ")
+        if query == '-1':
+            return
+
+        found_tasks = search_tasks(query)
+
+        print(f"\nSearch: {query} [ {len(found_tasks)} found ]")
+        # Display the details of each task
+        print_task_cards(found_tasks, 'search', users)
+
+        user_choice = input("Enter '-1' to return to main menu or press 'Enter' to search again: ")
+        if user_choice == '-1':
+            return
 
 # Generates 'Task Overview' and 'User Overview' reports
+@instrumented
 def generate_reports():
     """
     Generates two text files:
@@ -750,25 +1499,38 @@ def generate_reports():
     - Tasks Completed (%)
     - Tasks Incomplete (%)
     - Tasks Overdue (%)
+
+    The user is asked whether to include the archived tasks, which are then streamed from the archive and counted along with 'tasks.txt'.
+    Registers over the memory budget are counted as they are streamed from 'tasks.txt', without loading them.
+    Each run also appends the counts of every user to the report history, from which 'Report Trends' is worked out.
     """
 
     line_width = 45
-    task_list = load_tasks()
+    task_list = iter_tasks() if exceeds_memory_budget() else load_tasks()
     users = load_users()
 
     # Clear the screen and display menu option user currently is in
     print_screen_name("Generate Reports")
 
+    include_archived = input("Include archived tasks in the reports? (Y/N): ").lower() == 'y'
+    tasks = chain(task_list, iter_archived_tasks()) if include_archived else task_list
+
+    # Count the tasks in a single pass
+    statistics = count_task_statistics(tasks, users, date.today())
+
     # Print relevant message if there are currently no tasks
-    if len(task_list) == 0:
+    if statistics['total'] == 0:
         input(f"\nThere are currently no tasks to generate reports. {press_enter_message}")
         return
 
+    # Record the counts for the trends report
+    append_report_snapshot(statistics, include_archived)
+
     # Get counts for task overview
-    total_tasks = len(task_list)
-    completed_tasks = sum(task['task_status'] for task in task_list)
+    total_tasks = statistics['total']
+    completed_tasks = statistics['completed']
     incomplete_tasks = total_tasks - completed_tasks
-    overdue_tasks = sum(task['due_date'].date() < date.today() and not task['task_status'] for task in task_list)
+    overdue_tasks = statistics['overdue']
 
     # Calculate percentages for task overview
     incomplete_percentage = (incomplete_tasks / total_tasks) * 100 if total_tasks > 0 else 0
@@ -800,12 +1562,11 @@ def generate_reports():
         user_file.write(f"{'Total Tasks:': <15}{total_tasks}\n\n")
 
         # Write user statistics
-        for username, _ in users.items():
-            user_tasks = [task for task in task_list if task['assigned_to'] == username]
-            user_total_tasks = len(user_tasks)
-            user_incomplete_tasks = sum(not task['task_status'] for task in user_tasks)
-            user_completed_tasks = user_total_tasks - user_incomplete_tasks
-            user_overdue_tasks = sum(task['due_date'].date() < date.today() and not task['task_status'] for task in user_tasks)
+        for username, user_statistics in statistics['users'].items():
+            user_total_tasks = user_statistics['total']
+            user_completed_tasks = user_statistics['completed']
+            user_incomplete_tasks = user_total_tasks - user_completed_tasks
+            user_overdue_tasks = user_statistics['overdue']
 
             # Calculate percentages for user statistics
             user_task_percentage = (user_total_tasks / total_tasks) * 100 if total_tasks > 0 else 0
@@ -848,51 +1609,353 @@ def display_statistics():
 
     input(f"\n{press_enter_message}")
 
-# Allows the user to change their password
-def change_password():
-    """
-    Allows the user to change their password.
-    
-    Writes the new password to the 'user.txt' file.
+# Appends the statistics of a report run to the report history
+def append_report_snapshot(statistics, include_archived):
     """
-    
-    users = load_users()
+    Appends one row per user, and one row for all tasks, to the 'report_history.csv' time series.
 
-    # Clear the screen and display menu option user currently is in
-    print_screen_name("Change Password")
+    Arguments:
+        statistics (dict): The counts made by count_task_statistics() for the reports.
+        include_archived (bool): True if the counts include the archived tasks.
 
-    # Prompt user to enter current password
-    print("Enter your current password to proceed.")
-    current_password = input("Password: ")
+    Each row holds the time of the report, the username ('*' for all tasks) and the numbers of tasks, completed tasks
+    and overdue tasks. Archived tasks are always counted, from the archive counts if the report left them out,
+    so archiving completed tasks does not show up as a drop in completed tasks.
+    """
 
-    # Check if current password matches the stored password for the current user
-    if current_password != users[current_user]:
-        print("\nIncorrect password.")
-        input(f"\n{press_enter_message}")
-        return
+    import csv
 
-    print("\nPassword verified!")
-    input("Press 'Enter' to continue...")
+    archive_counts = {} if include_archived else load_archive_counts()
+    snapshot_time = datetime.now().isoformat(timespec='seconds')
 
-    # Display password requirements, prompt user to enter the new password and perform checks
-    new_password = verify_new_password(current_password)
+    rows = []
+    for username, counts in chain(statistics['users'].items(), [('*', statistics)]):
+        if username == '*':
+            archived_total = sum(archived[0] for archived in archive_counts.values())
+            archived_completed = sum(archived[1] for archived in archive_counts.values())
+        else:
+            archived_total, archived_completed = archive_counts.get(username, (0, 0))
+        rows.append((snapshot_time, username, counts['total'] + archived_total, counts['completed'] + archived_completed, counts['overdue']))
+
+    write_header = not os.path.isfile(report_history_file_path)
+    with open(report_history_file_path, "a", newline="") as history_file:
+        history_writer = csv.writer(history_file)
+        if write_header:
+            history_writer.writerow(("snapshot_time", "username", "total", "completed", "overdue"))
+        history_writer.writerows(rows)
+
+# Works out the weekly trends of each user from the report history
+def compute_report_trends(weeks=trend_weeks):
+    """
+    Reads the report history and works out, for each user, how their tasks changed week by week.
 
-    # Update password in the 'user.txt' file
-    users[current_user] = new_password
-    update_users(users, current_user, new_password)
-    write_users(users)
+    Arguments:
+        weeks (int): The number of most recent weeks to return. Default is 'trend_weeks'.
 
-    print(f"\nYour new password is '{new_password}'.")
-    input(f"\n{press_enter_message}")
+    Returns:
+        user_trends (dict): Username ('*' for all tasks) -> list of weeks, oldest first. Each week is a dict with:
+        - 'week': The Monday of the week (as a date).
+        - 'total', 'completed', 'overdue': The counts of the last report of the week.
+        - 'completion_rate': Completed tasks as a percentage of all tasks.
+        - 'throughput': Tasks completed since the week before, or None for the first week of the history.
+        - 'velocity': Change of the completion rate since the week before (percentage points), or None.
+        - 'overdue_growth': Change of the number of overdue tasks since the week before, or None.
+
+    Every row of the history is read once and only the last report of each week is kept, so the time taken grows
+    with the number of snapshots, not the number of tasks.
+    """
 
-# Verifies if password entered matches stored password
-def verify_password(users, current_user, current_password):
+    import csv
+
+    # Keep the last snapshot of each week, rows are in time order
+    weekly_counts = {}
+    if os.path.isfile(report_history_file_path):
+        with open(report_history_file_path, "r", newline="") as history_file:
+            history_reader = csv.reader(history_file)
+            next(history_reader, None)
+            for snapshot_time, username, total, completed, overdue in history_reader:
+                snapshot_day = date.fromisoformat(snapshot_time[:10])
+                week = snapshot_day - timedelta(days=snapshot_day.weekday())
+                weekly_counts.setdefault(username, {})[week] = (int(total), int(completed), int(overdue))
+
+    user_trends = {}
+    for username, week_counts in weekly_counts.items():
+        trend = []
+        previous_week = None
+        # Take one week more than shown, as the base of the first change
+        for week, (total, completed, overdue) in list(week_counts.items())[-(weeks + 1):]:
+            completion_rate = (completed / total) * 100 if total > 0 else 0
+            trend.append({
+                'week': week,
+                'total': total,
+                'completed': completed,
+                'overdue': overdue,
+                'completion_rate': completion_rate,
+                'throughput': None if previous_week is None else completed - previous_week['completed'],
+                'velocity': None if previous_week is None else completion_rate - previous_week['completion_rate'],
+                'overdue_growth': None if previous_week is None else overdue - previous_week['overdue']
+            })
+            previous_week = trend[-1]
+        user_trends[username] = trend[-weeks:]
+
+    return user_trends
+
+# Writes the trends report
+def write_trends_report(weeks=trend_weeks):
     """
-    Verifies if the password entered by the user matches the stored password for the current user.
+    Writes the 'trends_report.txt' report showing, for each user and for all tasks, the weekly throughput, completion velocity
+    and overdue growth over the most recent weeks of the report history.
 
     Arguments:
-        users (dict): A dictionary containing the usernames and passwords.
-        current_user (str): The username of the current user.
+        weeks (int): The number of weeks to show. Default is 'trend_weeks'.
+
+    The history grows by one snapshot per user each time 'Generate Reports' runs.
+    It can be scheduled (for example weekly from cron) with: python task_manager.py --report-trends [weeks]
+    """
+
+    user_trends = compute_report_trends(weeks)
+
+    with open(trends_report_file_path, "w") as trends_file:
+        trends_file.write("           Report Trends\n")
+        trends_file.write(f"{'=' * line_width}\n")
+        trends_file.write("Date Report Generated: {}\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        trends_file.write(f"Last {weeks} weeks with reports, from the last report of each week\n\n")
+
+        if not user_trends:
+            trends_file.write("No reports have been generated yet. Use 'Generate Reports' to record a snapshot.\n")
+
+        for username, trend in user_trends.items():
+            trends_file.write(f"{'Username:': <18}{'All tasks' if username == '*' else username}\n")
+            trends_file.write(f"{'Week of': <14}{'Tasks': >7}{'Done': >7}{'Done/wk': >9}{'% Done': >9}{'% Change': >10}{'Overdue': >9}{'Change': >8}\n")
+            for week in trend:
+                throughput = "" if week['throughput'] is None else f"{week['throughput']:+d}"
+                velocity = "" if week['velocity'] is None else f"{week['velocity']:+.1f}"
+                overdue_growth = "" if week['overdue_growth'] is None else f"{week['overdue_growth']:+d}"
+                trends_file.write(f"{week['week'].strftime(date_format_output): <14}{week['total']: >7}{week['completed']: >7}{throughput: >9}"
+                                  f"{week['completion_rate']: >9.1f}{velocity: >10}{week['overdue']: >9}{overdue_growth: >8}\n")
+            trends_file.write(f"{line * line_width}\n")
+
+# Generates and displays the trends report
+def report_trends():
+    """
+    Prompts for the number of weeks to show, then generates and displays the trends report.
+    """
+
+    # Clear the screen and display menu option user currently is in
+    print_screen_name("Report Trends")
+
+    weeks_choice = input(f"Show how many weeks? (press 'Enter' for {trend_weeks}): ")
+    write_trends_report(int(weeks_choice) if weeks_choice.isdigit() and int(weeks_choice) > 0 else trend_weeks)
+
+    clear_screen()
+    with open(trends_report_file_path, "r") as trends_file:
+        print(trends_file.read())
+
+    input(f"\n{press_enter_message}")
+
+# Writes the deadline digest report
+def write_deadline_digest(days_ahead=7):
+    """
+    Writes the 'deadline_digest.txt' report listing, for each user, their overdue tasks and tasks due soon.
+
+    Arguments:
+        days_ahead (int): The number of days after today counted as due soon. Default is 7.
+
+    The report is built from the calendar index, so only overdue and soon-due tasks are visited. Registers over the
+    memory budget are streamed from 'tasks.txt' instead, keeping only the overdue and soon-due tasks.
+    It can be scheduled (for example daily from cron) with: python task_manager.py --deadline-digest [days]
+    """
+
+    users = load_users()
+    # Today's date, taken once for the whole report
+    today = date.today()
+
+    # Group the overdue and soon-due tasks by assignee
+    user_deadlines = {username: ([], []) for username in users}
+    if exceeds_memory_budget():
+        last_day = today + timedelta(days=days_ahead)
+        due_tasks = (task for task in iter_tasks() if not task['task_status'] and task['due_date'].date() <= last_day)
+    else:
+        due_tasks = chain(get_overdue_tasks(today), get_tasks_due_within(today, days_ahead))
+    for task in due_tasks:
+        if task['assigned_to'] in user_deadlines:
+            user_deadlines[task['assigned_to']][0 if task['due_date'].date() < today else 1].append(task)
+
+    with open(deadline_digest_file_path, "w") as digest_file:
+        digest_file.write("           Deadline Digest\n")
+        digest_file.write(f"{'=' * line_width}\n")
+        digest_file.write("Date Report Generated: {}\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        digest_file.write(f"Due soon: within {days_ahead} days\n\n")
+
+        for username, (overdue_tasks, due_soon_tasks) in user_deadlines.items():
+            digest_file.write(f"{'Username:': <18}{username}\n")
+            digest_file.write(f"{'Overdue:': <18}{len(overdue_tasks)}\n")
+            for task in overdue_tasks:
+                overdue_days = (today - task['due_date'].date()).days
+                digest_file.write(f"    - {task['task_title']} (due {task['due_date'].strftime(date_format_output)}, {overdue_days} days overdue)\n")
+            digest_file.write(f"{'Due soon:': <18}{len(due_soon_tasks)}\n")
+            for task in due_soon_tasks:
+                remaining_days = (task['due_date'].date() - today).days
+                digest_file.write(f"    - {task['task_title']} (due {task['due_date'].strftime(date_format_output)}, in {remaining_days} days)\n")
+            digest_file.write(f"{line * line_width}\n")
+
+# Counts total, completed and overdue tasks overall and per user
+def count_task_statistics(tasks, users, today):
+    """
+    Counts the total, completed and overdue tasks, overall and for each user, in a single pass.
+
+    Arguments:
+        tasks (iterable): The tasks to count. Any iterable works, so archived tasks can be streamed in.
+        users (dict): The registered users. Tasks of other users only count towards the overall numbers.
+        today (date): Today's date, taken once by the caller.
+
+    Returns:
+        statistics (dict): 'total', 'completed' and 'overdue' counts, and 'users' mapping each username to the same three counts.
+    """
+
+    statistics = {'total': 0, 'completed': 0, 'overdue': 0}
+    user_statistics = {username: {'total': 0, 'completed': 0, 'overdue': 0} for username in users}
+
+    for task in tasks:
+        completed = task['task_status']
+        overdue = not completed and task['due_date'].date() < today
+        statistics['total'] += 1
+        statistics['completed'] += completed
+        statistics['overdue'] += overdue
+
+        counts = user_statistics.get(task['assigned_to'])
+        if counts is not None:
+            counts['total'] += 1
+            counts['completed'] += completed
+            counts['overdue'] += overdue
+
+    statistics['users'] = user_statistics
+    return statistics
+
+# Generates and displays the deadline digest report
+def deadline_digest():
+    """
+    Prompts for the number of days counted as due soon, then generates and displays the deadline digest report.
+    """
+
+    # Clear the screen and display menu option user currently is in
+    print_screen_name("Deadline Digest")
+
+    days_ahead = prompt_days_ahead()
+    write_deadline_digest(days_ahead)
+
+    clear_screen()
+    with open(deadline_digest_file_path, "r") as digest_file:
+        print(digest_file.read())
+
+    input(f"\n{press_enter_message}")
+
+# Moves old completed tasks to the archive
+def archive_old_tasks():
+    """
+    Prompts for the age of completed tasks to archive and moves them from 'tasks.txt' to the task archive.
+    """
+
+    # Clear the screen and display menu option user currently is in
+    print_screen_name("Archive Tasks")
+
+    age_choice = input(f"Archive completed tasks due more than how many days ago? (press 'Enter' for {archive_age_days}): ")
+    age_days = int(age_choice) if age_choice.isdigit() else archive_age_days
+
+    archived_count = archive_completed_tasks(age_days)
+    input(f"\n{archived_count} completed task(s) moved to the archive. {press_enter_message}")
+
+# Lets the ADMIN work in the shard of another team
+def switch_team():
+    """
+    Lists the teams and switches the program to the shard of the team the ADMIN chooses.
+    All following screens (tasks, users, reports) use that team until the ADMIN switches again or logs out.
+    """
+
+    # Clear the screen and display menu option user currently is in
+    print_screen_name("Switch Team")
+
+    teams = list_teams()
+    print("Teams:")
+    for team in teams:
+        print(f"* {team}")
+
+    team_choice = input("\nEnter the team to switch to or press 'Enter' to stay in the current team: ").lower()
+    if team_choice == '':
+        return
+    if team_choice not in teams:
+        input(f"\nTeam '{team_choice}' does not exist. {press_enter_message}")
+        return
+
+    select_team_shard(team_choice)
+    input(f"\nSwitched to team '{team_choice}'. {press_enter_message}")
+
+# Generates and displays the report across all teams
+def team_reports():
+    """
+    Generates the 'team_overview.txt' report with task statistics of every team, then displays it.
+
+    The shards are counted in parallel processes, each reading only its own team's files, and the counts are added up.
+    """
+
+    # Clear the screen and display menu option user currently is in
+    print_screen_name("Team Reports")
+
+    write_team_overview()
+
+    clear_screen()
+    with open(team_overview_file_path, "r") as team_file:
+        print(team_file.read())
+
+    input(f"\n{press_enter_message}")
+
+# Allows the user to change their password
+def change_password():
+    """
+    Allows the user to change their password.
+    
+    Writes the new password to the 'user.txt' file.
+    """
+    
+    users = load_users()
+
+    # Clear the screen and display menu option user currently is in
+    print_screen_name("Change Password")
+
+    # Prompt user to enter current password
+    print("Enter your current password to proceed.")
+    current_password = input("Password: ")
+
+    # Check if current password matches the stored password for the current user
+    if current_password != users[session.current_user]:
+        print("\nIncorrect password.")
+        input(f"\n{press_enter_message}")
+        return
+
+    print("\nPassword verified!")
+    input("Press 'Enter' to continue...")
+
+    # Display password requirements, prompt user to enter the new password and perform checks
+    new_password = verify_new_password(current_password)
+
+    # Update password in the 'user.txt' file
+    users[session.current_user] = new_password
+    update_users(users, session.current_user, new_password)
+    write_users(users)
+    # The event records that the password changed, never the password itself
+    emit_event("password_changed", username=session.current_user)
+
+    print(f"\nYour new password is '{new_password}'.")
+    input(f"\n{press_enter_message}")
+
+# Verifies if password entered matches stored password
+def verify_password(users, current_user, current_password):
+    """
+    Verifies if the password entered by the user matches the stored password for the current user.
+
+    Arguments:
+        users (dict): A dictionary containing the usernames and passwords.
+        current_user (str): The username of the current user.
         current_password (str): The password entered by the user.
 
     Returns:
@@ -911,7 +1974,7 @@ def verify_new_username(users):
     Prompts the user to enter a new username and performs checks on it.
 
     Arguments:
-        users (dict): Dictionary containing existing usernames and passwords.
+        users (dict): Dictionary containing existing usernames and passwords (any collection of existing usernames works).
 
     Returns:
         new_username (str): The verified new username entered by the user.
@@ -925,19 +1988,10 @@ def verify_new_username(users):
     while True:
         new_username = input("\nEnter new username: ")
 
-        # Check if the username is 5 - 15 characters long
-        if len(new_username) < 5 or len(new_username) > 15:
-            print("\nInvalid username. Username must be 5 to 15 characters long.")
-            continue
-
-        # Check if the username contains any whitespace characters
-        if any(char.isspace() for char in new_username):
-            print("\nInvalid username. Username cannot contain any whitespace characters.")
-            continue
-
-        # Check if the username already exists in 'user.txt' to avoid duplicate usernames
-        if new_username.lower() in users:
-            print(f"\nUsername '{new_username}' already exists. Please enter a different username.")
+        # Check the length, whitespace and that the username is not taken, to avoid duplicate usernames
+        error = validate_new_username(new_username, users)
+        if error is not None:
+            print(f"\n{error}")
             continue
 
         input(f"\nUsername '{new_username}' is available. Press 'Enter' to continue...")
@@ -969,29 +2023,10 @@ def verify_new_password(current_password):
         # Prompt user for a new password
         new_password = input("\nEnter your new password: ")
 
-        # Check if new password is the same as the current password
-        if new_password == current_password:
-            print("\nPassword cannot be the same as the current password. Try again.")
-            continue
-
-        # Check if the password is empty
-        if len(new_password) == 0:
-            print("\nPassword cannot be empty. Try again.")
-            continue
-
-        # Check for whitespace characters in the password
-        if any(char.isspace() for char in new_password):
-            print("\nPassword cannot contain whitespace characters. Try again.")
-            continue
-
-        # Check password length
-        if len(new_password) < 5 or len(new_password) > 15:
-            print("\nPassword must be 5 to 15 characters long. Try again.")
-            continue
-
-        # Check for at least one digit, uppercase letter, and lowercase letter in the password
-        if not any(char.isdigit() for char in new_password) or not any(char.isupper() for char in new_password) or not any(char.islower() for char in new_password):
-            print("\nPassword must contain at least one digit, uppercase letter, and lowercase letter. Try again.")
+        # Check the password against the current one and the requirements above
+        error = validate_new_password(new_password, current_password)
+        if error is not None:
+            print(f"\n{error}")
             continue
 
         # Prompt user to confirm the password
@@ -1005,6 +2040,231 @@ def verify_new_password(current_password):
         # Return the verified new password
         return new_password
 
+# Returns the earliest and latest due dates a new task can have
+def get_due_date_bounds():
+    """
+    Returns the range of due dates a new task can have: from the start of today to the end of the day 18 months from today.
+
+    Returns:
+        due_date_bounds (tuple): The earliest and latest allowed due dates as datetimes.
+
+    Work out the bounds once and pass them to validate_due_date() for every date checked at that time.
+    """
+
+    today = date.today()
+    return datetime.combine(today, datetime.min.time()), datetime.combine(add_months(today, 18), datetime.max.time())
+
+# Checks the assignee of a task
+def validate_assignee(username, users):
+    """
+    Checks that a task is assigned to an existing user.
+
+    Arguments:
+        username (str): The username of the assignee.
+        users (dict): The existing users (any collection of existing usernames works).
+
+    Returns:
+        error (str): Why the assignee is invalid, or None if it is valid.
+    """
+
+    if username.lower() not in users:
+        return f"Username '{username}' does not exist. Please enter a valid username."
+    return None
+
+# Checks the title of a task
+def validate_task_title(task_title):
+    """
+    Checks that a task title is 5 to 30 characters long.
+
+    Arguments:
+        task_title (str): The title to check.
+
+    Returns:
+        error (str): Why the title is invalid, or None if it is valid.
+    """
+
+    if len(task_title) == 0 or task_title.isspace():
+        return "Title cannot be empty."
+    if len(task_title) < 5 or len(task_title) > 30:
+        return "Title must be 5 to 30 characters."
+    return None
+
+# Checks the description of a task
+def validate_task_description(task_description):
+    """
+    Checks that a task description is 5 to 1000 characters long.
+
+    Arguments:
+        task_description (str): The description to check.
+
+    Returns:
+        error (str): Why the description is invalid, or None if it is valid.
+    """
+
+    if len(task_description) < 5 or task_description.isspace():
+        return "Input too short. Description should be at least 5 characters long."
+    if len(task_description) > 1000:
+        return "Input too long. Description cannot exceed 1000 characters."
+    return None
+
+# Checks the due date of a task
+def validate_due_date(due_date_text, due_date_bounds):
+    """
+    Parses a due date entered as 'DD/MM/YYYY' and checks that it is within the allowed range.
+
+    Arguments:
+        due_date_text (str): The due date as entered.
+        due_date_bounds (tuple): The earliest and latest allowed due dates, from get_due_date_bounds().
+
+    Returns:
+        result (tuple): The due date as a datetime and None, or None and why the due date is invalid.
+    """
+
+    try:
+        due_date = datetime.strptime(due_date_text, date_format)
+    except ValueError:
+        return None, "Invalid date format. Please use the specified format (e.g., 01/12/2023 for 1st December 2023)."
+
+    if due_date < due_date_bounds[0] or due_date > due_date_bounds[1]:
+        return None, "Invalid due date. Due date must be the same as today or up to 18 months in the future."
+    return due_date, None
+
+# Checks a task priority
+def validate_task_priority(priority_text):
+    """
+    Parses a task priority entered as its number.
+
+    Arguments:
+        priority_text (str): The priority as entered, '1' (high) to '3' (low).
+
+    Returns:
+        result (tuple): The priority as an int and None, or None and why the priority is invalid.
+    """
+
+    if priority_text.strip().isdigit() and int(priority_text) in task_priorities:
+        return int(priority_text), None
+    return None, "Invalid priority. Enter '1' for high, '2' for medium or '3' for low."
+
+# Checks a new username
+def validate_new_username(new_username, users):
+    """
+    Checks that a new username is 5 to 15 characters long, has no whitespace and is not taken.
+
+    Arguments:
+        new_username (str): The username to check.
+        users (dict): The existing users (any collection of existing usernames works).
+
+    Returns:
+        error (str): Why the username is invalid, or None if it is valid.
+    """
+
+    if len(new_username) < 5 or len(new_username) > 15:
+        return "Invalid username. Username must be 5 to 15 characters long."
+    if whitespace_pattern.search(new_username):
+        return "Invalid username. Username cannot contain any whitespace characters."
+    if new_username.lower() in users:
+        return f"Username '{new_username}' already exists. Please enter a different username."
+    return None
+
+# Checks a new password
+def validate_new_password(new_password, current_password=None):
+    """
+    Checks that a new password differs from the current one, is 5 to 15 characters long, has no whitespace and mixes
+    digits, uppercase and lowercase letters.
+
+    Arguments:
+        new_password (str): The password to check.
+        current_password (str): The user's current password, or None for a new user.
+
+    Returns:
+        error (str): Why the password is invalid, or None if it is valid.
+
+    The whole password is checked at once instead of character by character: it has an uppercase letter if
+    lowercasing it changes it, and a lowercase letter if uppercasing it changes it.
+    """
+
+    if new_password == current_password:
+        return "Password cannot be the same as the current password. Try again."
+    if len(new_password) == 0:
+        return "Password cannot be empty. Try again."
+    if whitespace_pattern.search(new_password):
+        return "Password cannot contain whitespace characters. Try again."
+    if len(new_password) < 5 or len(new_password) > 15:
+        return "Password must be 5 to 15 characters long. Try again."
+    if not digit_pattern.search(new_password) or new_password.lower() == new_password or new_password.upper() == new_password:
+        return "Password must contain at least one digit, uppercase letter, and lowercase letter. Try again."
+    return None
+
+# Checks a batch of new tasks
+def validate_task_records(records, users):
+    """
+    Checks many new tasks at once with the same rules as the 'Add Task' screen.
+
+    Arguments:
+        records (iterable): The new tasks as records like those made by task_to_record(), with the 'assigned_to',
+        'task_title', 'task_description' and 'due_date' ('DD/MM/YYYY') keys, and optionally 'priority' (1 to 3, or '1' to '3').
+        users (dict): The existing users (any collection of existing usernames works).
+
+    Returns:
+        error_reports (list): A list of error messages for each record, in order. The list is empty if the record is valid.
+
+    The due date bounds are worked out once per batch, and each distinct due date is parsed only once.
+    """
+
+    due_date_bounds = get_due_date_bounds()
+    due_date_errors = {} # Due date text -> error, as many records share a due date
+    error_reports = []
+
+    for record in records:
+        errors = []
+        for error in (validate_assignee(record.get('assigned_to', ""), users),
+                      validate_task_title(record.get('task_title', "")),
+                      validate_task_description(record.get('task_description', ""))):
+            if error is not None:
+                errors.append(error)
+
+        due_date_text = record.get('due_date', "")
+        if due_date_text not in due_date_errors:
+            due_date_errors[due_date_text] = validate_due_date(due_date_text, due_date_bounds)[1]
+        if due_date_errors[due_date_text] is not None:
+            errors.append(due_date_errors[due_date_text])
+        # Priorities may be given as numbers or as text, like the 'Add Task' screen takes them
+        if 'priority' in record:
+            priority_error = validate_task_priority(str(record['priority']))[1]
+            if priority_error is not None:
+                errors.append(priority_error)
+
+        error_reports.append(errors)
+
+    return error_reports
+
+# Checks a batch of new users
+def validate_user_records(records, users):
+    """
+    Checks many new users at once with the same rules as the 'Register User' screen.
+
+    Arguments:
+        records (iterable): The new users as dictionaries with the 'username' and 'password' keys.
+        users (dict): The existing users (any collection of existing usernames works).
+
+    Returns:
+        error_reports (list): A list of error messages for each record, in order. The list is empty if the record is valid.
+
+    A username used by an earlier record of the batch counts as taken, so a batch can not register a username twice.
+    """
+
+    taken_usernames = set(users)
+    error_reports = []
+
+    for record in records:
+        username = record.get('username', "")
+        errors = [error for error in (validate_new_username(username, taken_usernames),
+                                      validate_new_password(record.get('password', ""))) if error is not None]
+        taken_usernames.add(username.lower())
+        error_reports.append(errors)
+
+    return error_reports
+
 # Updates user information for current user
 def update_users(users, current_user, new_password):
     """
@@ -1027,6 +2287,7 @@ def update_users(users, current_user, new_password):
     return users
 
 # Writes user information to the 'user.txt' file
+@instrumented
 def write_users(users):
     """
     Writes the user information (usernames and passwords) to the 'user.txt' file.
@@ -1041,14 +2302,19 @@ def write_users(users):
     with open(user_file_path, "w") as user_file:
         for username, password in users.items():
             user_file.write(f"{username};{password}\n")
+        if profiling_enabled:
+            record_bytes("write_users", "written", user_file.tell())
 
 # Returns current user tasks with chosen filter
-def load_filtered_tasks(filter_choice):
+@instrumented
+def load_filtered_tasks(filter_choice, days_ahead=7, saved_filter_name=None):
     """
     Retrieve the filtered tasks assigned to the current user based on the user's filter choice.
 
     Arguments:
         filter_choice (str): The user's choice for filtering the tasks. Default is an empty string.
+        days_ahead (int): The number of days after today included by filter '6'. Default is 7.
+        saved_filter_name (str): The saved filter of the current user opened by filter '7'. Default is None.
 
     Returns:
         filtered_tasks (list): The list of filtered tasks assigned to the current user.
@@ -1060,14 +2326,46 @@ def load_filtered_tasks(filter_choice):
         2 - Completed tasks
         3 - Overdue tasks
         4 - Tasks assigned by users that no longer exist
+        5 - Tasks due this week
+        6 - Tasks due in the next 'days_ahead' days
+        7 - Tasks matching the saved filter 'saved_filter_name'
 
     If an invalid filter choice is provided or if no filter choice is given, it returns all tasks assigned to the current user.
+    The date based filters ('3', '5' and '6') are answered from the calendar index of incomplete tasks, without loading
+    the task list while the index is up to date.
+    Registers over the memory budget are streamed instead (see filter_streamed_tasks()).
     """
+
+    # Read saved filters from their materialized views where they have one
+    if filter_choice == '7' and saved_filter_name is not None:
+        view_tasks = get_saved_view_tasks(session.current_user, saved_filter_name)
+        filtered_tasks = [task for task in view_tasks if task['assigned_to'] == session.current_user]
+        return filtered_tasks, f"Saved filter '{saved_filter_name}'"
+
+    # Stream registers that would not fit in the memory budget
+    if exceeds_memory_budget():
+        return filter_streamed_tasks(filter_choice, days_ahead)
     
+    # Answer the date based filters from the calendar index, which only reloads the tasks if 'tasks.txt' has changed
+    if filter_choice in ('3', '5', '6'):
+        # Today's date, taken once for all date based filters
+        today = date.today()
+        if filter_choice == '3':
+            current_filter_name = "Overdue tasks"
+            due_tasks = get_overdue_tasks(today)
+        elif filter_choice == '5':
+            current_filter_name = "Tasks due this week"
+            due_tasks = get_tasks_due_this_week(today)
+        else:
+            current_filter_name = f"Tasks due in the next {days_ahead} days"
+            due_tasks = get_tasks_due_within(today, days_ahead)
+        filtered_tasks = [task for task in due_tasks if task['assigned_to'] == session.current_user]
+        return filtered_tasks, current_filter_name
+
     # List of all tasks
     task_list = load_tasks()
     # List of current user tasks only
-    current_user_tasks = [task for task in task_list if task['assigned_to'] == current_user]
+    current_user_tasks = [task for task in task_list if task['assigned_to'] == session.current_user]
     
     # Create list with filtered tasks based on user's choice
     if filter_choice == '1':
@@ -1076,12 +2374,10 @@ def load_filtered_tasks(filter_choice):
     elif filter_choice == '2':
         current_filter_name = "Completed tasks"
         filtered_tasks = [task for task in current_user_tasks if task['task_status']]
-    elif filter_choice == '3':
-        current_filter_name = "Overdue tasks"
-        filtered_tasks = [task for task in current_user_tasks if task['due_date'].date() < date.today() and not task['task_status']]
     elif filter_choice == '4':
         current_filter_name = "Tasks assigned by users that no longer exist"
-        filtered_tasks = [task for task in current_user_tasks if task['assigned_by'] not in load_users()]
+        orphaned_task_ids = get_orphaned_task_ids(load_users())
+        filtered_tasks = [task for task in current_user_tasks if task['task_id'] in orphaned_task_ids]
     else:
         current_filter_name = "All tasks"
         # Show all tasks if no filter option selected or invalid input is entered
@@ -1090,7 +2386,52 @@ def load_filtered_tasks(filter_choice):
     # Return filtered task list and name of chosen filter
     return filtered_tasks, current_filter_name
 
+# Filters the current user's tasks streamed from 'tasks.txt'
+def filter_streamed_tasks(filter_choice, days_ahead=7):
+    """
+    Applies the filters of load_filtered_tasks() to the tasks of the current user, streamed from the 'tasks.txt' file.
+
+    Arguments:
+        filter_choice (str): The user's choice for filtering the tasks (see load_filtered_tasks()).
+        days_ahead (int): The number of days after today included by filter '6'. Default is 7.
+
+    Returns:
+        filtered_tasks (list): The list of filtered tasks assigned to the current user, sorted by due date.
+        current_filter_name (str): The string for name of the selected filter.
+
+    Only the current user's tasks are kept in memory, so this works for registers larger than the memory budget.
+    The task indexes are not used, as building them would load every task.
+    """
+
+    today = date.today()
+    current_user_tasks = [task for task in iter_tasks() if task['assigned_to'] == session.current_user]
+
+    if filter_choice == '1':
+        return [task for task in current_user_tasks if not task['task_status']], "Incompleted tasks"
+    if filter_choice == '2':
+        return [task for task in current_user_tasks if task['task_status']], "Completed tasks"
+    if filter_choice == '4':
+        users = load_users()
+        return [task for task in current_user_tasks if task['assigned_by'] not in users], "Tasks assigned by users that no longer exist"
+
+    # Work out the due day range of the date based filters
+    if filter_choice == '3':
+        current_filter_name = "Overdue tasks"
+        first_day, last_day = date.min, today - timedelta(days=1)
+    elif filter_choice == '5':
+        current_filter_name = "Tasks due this week"
+        first_day, last_day = today, today + timedelta(days=6 - today.weekday())
+    elif filter_choice == '6':
+        current_filter_name = f"Tasks due in the next {days_ahead} days"
+        first_day, last_day = today, today + timedelta(days=days_ahead)
+    else:
+        return current_user_tasks, "All tasks"
+
+    filtered_tasks = [task for task in current_user_tasks if not task['task_status'] and first_day <= task['due_date'].date() <= last_day]
+    return filtered_tasks, current_filter_name
+
 # Returns all tasks from 'tasks.txt' file in sorted list
+@instrumented
 def load_tasks():
     """
     Load tasks from the 'tasks.txt' file into a list of dictionaries, sorted by due date.
@@ -1107,103 +2448,2953 @@ def load_tasks():
     - 'due_date': The due date of the task (as a datetime object).
     - 'date_assigned': The date when the task was assigned (as a datetime object).
     - 'task_status': The status of the task (True for completed, False for incompleted).
+    - 'task_id': The unique number of the task.
+    - 'priority': The priority of the task (a key of 'task_priorities').
+
+    The 'tasks.txt' file is kept in due date order, so the tasks are only sorted if a check of the order finds them out of place.
+    Files of 'parallel_load_threshold' bytes or more are parsed by several processes on multi-core machines (see load_tasks_parallel()).
+    Files starting with 'tasks_file_header' have escaped text fields, other files are read as the legacy unescaped format.
+    Lines that can not be parsed are moved to 'tasks_quarantine.txt' instead of stopping the load, and 'tasks.txt' is rewritten without them.
+    Tasks stored without an ID (older 'tasks.txt' files) are numbered after sorting, continuing from the highest stored ID.
+    Tasks stored without a priority get 'default_task_priority'.
+    The task indexes are rebuilt from the loaded tasks if 'tasks.txt' has changed since it was last indexed.
     """
     
     task_list = []
 
     try:
-        with open(tasks_file_path, "r") as tasks_file:
-            lines = tasks_file.readlines()
-            for line in lines:
-                task_components = line.strip().split(';')
-                task = {
-                    'assigned_to': task_components[0],
-                    'assigned_by': task_components[1],
-                    'task_title': task_components[2],
-                    'task_description': task_components[3],
-                    'due_date': datetime.strptime(task_components[4], date_format),
-                    'date_assigned': datetime.strptime(task_components[5], date_format),
-                    'task_status': True if task_components[6] == 'Yes' else False
-                }
-                task_list.append(task)
-        # Sort tasks by due date
-        task_list.sort(key=lambda task: task['due_date'])
+        if os.path.getsize(tasks_file_path) >= parallel_load_threshold and (os.cpu_count() or 1) > 1:
+            # Parse large files in parallel, already sorted by due date
+            task_list, bad_lines = load_tasks_parallel()
+        else:
+            with open(tasks_file_path, "r") as tasks_file:
+                lines = tasks_file.readlines()
+                if profiling_enabled:
+                    record_bytes("load_tasks", "read", tasks_file.tell())
+            escaped = bool(lines) and lines[0] == tasks_file_header
+            task_list, bad_lines = parse_task_lines(islice(lines, 1, None) if escaped else lines, escaped)
+            # Sort tasks by due date unless the file is already in order
+            if not is_sorted_by_due_date(task_list):
+                task_list.sort(key=itemgetter('due_date'))
+        # Number the tasks that were stored without an ID
+        assign_task_ids(task_list)
+        # Set damaged lines aside and rewrite the file without them, so they are reported only once
+        if bad_lines:
+            quarantine_task_lines(bad_lines)
+            update_tasks_file(task_list)
+            print(f"Warning: {len(bad_lines)} damaged line(s) of 'tasks.txt' were moved to 'tasks_quarantine.txt'.")
+        # Rebuild the task indexes if the file has changed since it was indexed
+        refresh_task_indexes(task_list)
     except FileNotFoundError:
         print("Error: 'tasks.txt' file not found.")
 
     return task_list
 
-# Writes updated task list back to file
-def update_tasks_file(task_list):
+# Converts lines of the 'tasks.txt' file into tasks
+def parse_task_lines(lines, escaped=True):
     """
-    Update the tasks file with the given task list.
+    Converts lines of the 'tasks.txt' file into task dictionaries.
 
     Arguments:
-        task_list (list): The list of tasks to be written to the file.
-    """
-    
-    with open(tasks_file_path, "w") as tasks_file:
-        for task in task_list:
-            due_date_str = task['due_date'].strftime(date_format)
-            date_assigned_str = task['date_assigned'].strftime(date_format)
-            task_status_str = "Yes" if task['task_status'] else "No"
-            task_line = f"{task['assigned_to']};{task['assigned_by']};{task['task_title']};{task['task_description']};{due_date_str};{date_assigned_str};{task_status_str}\n"
-            tasks_file.write(task_line)
+        lines (iterable): The lines to convert, in the 'tasks.txt' format, without the header line.
+        escaped (bool): True if the text fields are escaped (files starting with 'tasks_file_header'), False for the legacy format.
 
-# Entry point of the Task Manager program
-def task_manager():
+    Returns:
+        result (tuple): The tasks in the same order as the lines (see load_tasks() for the task keys), and the lines that
+        could not be parsed.
+
+    Escaped fields never contain a raw ';' or newline, so lines are split the same way in both formats and only fields
+    holding a backslash are unescaped. Dates repeat across many tasks, so each distinct date string is parsed only once.
     """
-    Entry point of program.
 
-    This function displays the welcome message, enters the main menu loop, and performs the following steps:
-    1. Checks if the 'user.txt' file exists and creates it if it doesn't.
-    2. Checks if the 'tasks.txt' file exists and creates it if it doesn't.
-    3. Prompts the user to login.
-    4. Displays the main menu and performs the corresponding menu actions based on user input.
-    
-    Takes action based on the user's choice from the main menu.
+    task_list = []
+    bad_lines = []
+    parsed_dates = {}
+
+    for line in lines:
+        task_components = line.strip().split(';')
+        try:
+            if len(task_components) == 9:
+                task_id = int(task_components[7]) if task_components[7] else None
+                priority = int(task_components[8])
+                if priority not in task_priorities:
+                    raise ValueError(f"priority {priority}")
+            elif len(task_components) == 8:
+                task_id = int(task_components[7])
+                priority = default_task_priority
+            elif len(task_components) == 7:
+                task_id = None
+                priority = default_task_priority
+            elif line.isspace() or not line:
+                continue
+            else:
+                raise ValueError(f"{len(task_components)} fields")
+            if escaped and "\\" in line:
+                task_components = [unescape_task_field(component) for component in task_components]
+
+            due_date = parsed_dates.get(task_components[4])
+            if due_date is None:
+                due_date = parsed_dates[task_components[4]] = datetime.strptime(task_components[4], date_format)
+            date_assigned = parsed_dates.get(task_components[5])
+            if date_assigned is None:
+                date_assigned = parsed_dates[task_components[5]] = datetime.strptime(task_components[5], date_format)
+
+            task = {
+                'assigned_to': task_components[0],
+                'assigned_by': task_components[1],
+                'task_title': task_components[2],
+                'task_description': task_components[3],
+                'due_date': due_date,
+                'date_assigned': date_assigned,
+                'task_status': task_components[6] == 'Yes',
+                'task_id': task_id,
+                'priority': priority
+            }
+        except ValueError:
+            bad_lines.append(line)
+            continue
+        task_list.append(task)
 
-    Options that are only accessible to the ADMIN:
-    - Generate Reports
-    - Display Statistics
-    - Delete Users
+    return task_list, bad_lines
+
+# Restores the characters escaped in a text field of the 'tasks.txt' file
+def unescape_task_field(field):
     """
-    
+    Replaces the escape sequences in a text field with the characters they stand for.
+
+    Arguments:
+        field (str): The field as stored in 'tasks.txt'.
+
+    Returns:
+        text (str): The field with '\\s', '\\n', '\\r' and '\\\\' replaced by ';', a newline, a carriage return and a backslash.
+    """
+
+    if "\\" not in field:
+        return field
+    return escaped_character_pattern.sub(lambda match: task_field_unescapes.get(match.group(1), match.group(1)), field)
+
+# Moves lines that could not be parsed to the quarantine file
+def quarantine_task_lines(bad_lines):
+    """
+    Appends damaged lines of the 'tasks.txt' file to 'tasks_quarantine.txt', so they can be repaired by hand.
+
+    Arguments:
+        bad_lines (list): The lines that could not be parsed, as read from 'tasks.txt'.
+
+    Each batch starts with a comment line giving the time it was set aside.
+    """
+
+    with open(quarantine_file_path, "a") as quarantine_file:
+        quarantine_file.write(f"# {datetime.now().isoformat(timespec='seconds')}: {len(bad_lines)} line(s) set aside from 'tasks.txt'\n")
+        for bad_line in bad_lines:
+            quarantine_file.write(bad_line if bad_line.endswith("\n") else bad_line + "\n")
+
+# Parses one byte range of the 'tasks.txt' file, in a worker process
+def parse_tasks_chunk(file_path, start, end, encoding, escaped):
+    """
+    Reads and parses the lines of the 'tasks.txt' file between two byte offsets.
+
+    Arguments:
+        file_path (str): The path of the 'tasks.txt' file.
+        start (int): The offset of the first byte of the range, at the start of a line.
+        end (int): The offset just past the last byte of the range, at the start of a line or the end of the file.
+        encoding (str): The text encoding of the file.
+        escaped (bool): True if the text fields are escaped, False for the legacy format.
+
+    Returns:
+        result (tuple): The tasks in the range, sorted by due date, and the lines that could not be parsed.
+    """
+
+    with open(file_path, "rb") as tasks_file:
+        tasks_file.seek(start)
+        lines = tasks_file.read(end - start).decode(encoding).split("\n")
+    # The range ends with a newline, which leaves an empty piece after it
+    if lines[-1] == "":
+        lines.pop()
+
+    task_list, bad_lines = parse_task_lines(lines, escaped)
+    if not is_sorted_by_due_date(task_list):
+        task_list.sort(key=itemgetter('due_date'))
+    return task_list, bad_lines
+
+# Checks if tasks are in due date order
+def is_sorted_by_due_date(task_list):
+    """
+    Checks in a single pass whether tasks are sorted by due date.
+
+    Arguments:
+        task_list (list): The tasks to check.
+
+    Returns:
+        boolean: True if no task is due before the task preceding it, False otherwise.
+    """
+
+    due_dates = list(map(itemgetter('due_date'), task_list))
+    return all(map(le, due_dates, islice(due_dates, 1, None)))
+
+# Returns byte ranges of a file that start and end on line boundaries
+def split_file_ranges(file_path, range_count, start_offset=0):
+    """
+    Splits a file into byte ranges of about equal size, each starting at the beginning of a line.
+
+    Arguments:
+        file_path (str): The path of the file to split.
+        range_count (int): The number of ranges wanted.
+        start_offset (int): The offset of the first line to include, to skip a header. Default is 0.
+
+    Returns:
+        ranges (list): (start, end) byte offsets of the ranges, in file order. Fewer ranges are returned if lines are very long.
+    """
+
+    file_size = os.path.getsize(file_path)
+    boundaries = [start_offset]
+
+    with open(file_path, "rb") as split_file:
+        for number in range(1, range_count):
+            offset = max(start_offset + (file_size - start_offset) * number // range_count, boundaries[-1])
+            if offset >= file_size:
+                break
+            # Move the boundary forward to the start of the next line
+            split_file.seek(offset)
+            split_file.readline()
+            boundary = split_file.tell()
+            if boundary > boundaries[-1] and boundary < file_size:
+                boundaries.append(boundary)
+    boundaries.append(file_size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+# Loads the 'tasks.txt' file using several processes
+def load_tasks_parallel():
+    """
+    Loads the tasks from the 'tasks.txt' file by parsing byte ranges of the file in parallel processes.
+
+    Returns:
+        result (tuple): The list of all tasks, sorted by due date, and the lines that could not be parsed.
+
+    The file is split into several ranges per CPU, aligned on line boundaries. Each process parses and sorts its range,
+    and the sorted ranges are combined with a k-way merge. Ties keep their file order, so the result is the same as a
+    single sorted pass over the file.
+    """
+
+    import locale
+    from concurrent.futures import ProcessPoolExecutor
+
+    worker_count = os.cpu_count() or 1
+    encoding = locale.getpreferredencoding(False)
+
+    # Leave the header line out of the ranges
+    with open(tasks_file_path, "rb") as tasks_file:
+        first_line = tasks_file.readline()
+    escaped = first_line == tasks_file_header.encode(encoding)
+    ranges = split_file_ranges(tasks_file_path, worker_count * 4, len(first_line) if escaped else 0)
+
+    with ProcessPoolExecutor(max_workers=worker_count) as executor:
+        chunks = list(executor.map(parse_tasks_chunk, *zip(*[(tasks_file_path, start, end, encoding, escaped) for start, end in ranges])))
+
+    if profiling_enabled:
+        record_bytes("load_tasks", "read", ranges[-1][1] if ranges else 0)
+
+    task_list = list(heapq.merge(*[chunk_tasks for chunk_tasks, _ in chunks], key=itemgetter('due_date')))
+    return task_list, [bad_line for _, chunk_bad_lines in chunks for bad_line in chunk_bad_lines]
+
+# Writes updated task list back to file
+@instrumented
+def update_tasks_file(task_list):
+    """
+    Update the tasks file with the given task list.
+
+    Arguments:
+        task_list (list): The list of tasks to be written to the file, sorted by due date.
+
+    Tasks are written in the order of the list. Callers keep the list sorted by due date (loaded with load_tasks()
+    and changed with insort()), so the file stays in due date order and loading it needs no sort.
+    The file is written in the escaped format, starting with 'tasks_file_header'. It is written to a temporary file that
+    then replaces 'tasks.txt', so sessions reading it at the same time never see it half written.
+    """
+    
+    formatted_dates = {}
+    # Each thread writes its own temporary file, as simulated sessions may save at the same time
+    temporary_file_path = f"{tasks_file_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(temporary_file_path, "w") as tasks_file:
+        tasks_file.write(tasks_file_header)
+        for task in task_list:
+            tasks_file.write(format_task_line(task, formatted_dates))
+        if profiling_enabled:
+            record_bytes("update_tasks_file", "written", tasks_file.tell())
+    os.replace(temporary_file_path, tasks_file_path)
+
+# Converts a task into a line of the 'tasks.txt' file
+def format_task_line(task, formatted_dates=None):
+    """
+    Converts a task into a line in the 'tasks.txt' format.
+
+    Arguments:
+        task (dict): The task to convert.
+        formatted_dates (dict): Dates already formatted, shared across calls so that each distinct date is formatted
+        only once. Default is None, which formats both dates.
+
+    Returns:
+        task_line (str): The task fields separated by ';', ending with a newline.
+
+    Backslashes, semicolons and line breaks in the text fields are escaped as '\\\\', '\\s', '\\n' and '\\r',
+    so any text round-trips through the file. Most tasks have none, so the fields are only escaped one by one
+    when a quick check of the joined text finds one. Tasks not numbered yet are written with an empty ID field.
+    """
+
+    if formatted_dates is None:
+        formatted_dates = {}
+    due_date_str = formatted_dates.get(task['due_date'])
+    if due_date_str is None:
+        due_date_str = formatted_dates[task['due_date']] = task['due_date'].strftime(date_format)
+    date_assigned_str = formatted_dates.get(task['date_assigned'])
+    if date_assigned_str is None:
+        date_assigned_str = formatted_dates[task['date_assigned']] = task['date_assigned'].strftime(date_format)
+    task_status_str = "Yes" if task['task_status'] else "No"
+
+    text_fields = (task['assigned_to'], task['assigned_by'], task['task_title'], task['task_description'])
+    text = ";".join(text_fields)
+    if text.count(";") != 3 or unescaped_character_pattern.search(text):
+        text = ";".join(field.translate(task_field_escapes) for field in text_fields)
+
+    return f"{text};{due_date_str};{date_assigned_str};{task_status_str};{task['task_id'] or ''};{task['priority']}\n"
+
+# Parses a size in bytes written with an optional K, M or G suffix
+def parse_byte_size(size_text):
+    """
+    Converts a size such as '512M' or '2G' into a number of bytes.
+
+    Arguments:
+        size_text (str): A number of bytes, optionally followed by K, M or G (powers of 1024) and an optional B.
+
+    Returns:
+        size (int): The size in bytes.
+
+    Raises:
+        ValueError: If the text is not a size.
+    """
+
+    size_text = size_text.strip().upper().removesuffix("B")
+    multiplier = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}.get(size_text[-1:], 1)
+    if multiplier != 1:
+        size_text = size_text[:-1]
+    return int(float(size_text) * multiplier)
+
+# Checks whether loading all tasks would go over the memory budget
+def exceeds_memory_budget():
+    """
+    Checks whether the tasks of the 'tasks.txt' file, loaded and indexed, would take more memory than the memory budget.
+
+    Returns:
+        boolean: True if a memory budget is set and the file is too large for it, False otherwise.
+
+    Registers over the budget are streamed from the file instead of loaded (see iter_tasks()).
+    """
+
+    if memory_budget_bytes is None:
+        return False
+    try:
+        return os.path.getsize(tasks_file_path) * task_memory_factor > memory_budget_bytes
+    except OSError:
+        return False
+
+# Returns how many bytes of 'tasks.txt' lines to hold in memory at a time
+def get_batch_bytes():
+    """
+    Returns the number of bytes of lines read and parsed at a time when streaming or sorting the 'tasks.txt' file.
+
+    Returns:
+        batch_bytes (int): The share of the memory budget one batch of lines may use once parsed, or
+        'external_sort_run_bytes' if no budget is set.
+    """
+
+    if memory_budget_bytes is None:
+        return external_sort_run_bytes
+    return max(64 * 1024, memory_budget_bytes // (2 * task_memory_factor))
+
+# Streams the tasks of a file in the 'tasks.txt' format in batches
+def iter_task_batches(file_path, bad_lines=None, batch_bytes=None):
+    """
+    Reads the tasks of a file in the 'tasks.txt' format one batch of lines at a time.
+
+    Arguments:
+        file_path (str): The path of the file.
+        bad_lines (list): A list to add the lines that can not be parsed to. Default is None, which skips them.
+        batch_bytes (int): The number of bytes of lines to read at a time. Default is None, for get_batch_bytes().
+
+    Yields:
+        batch_tasks (list): The tasks of the next batch of lines, in file order (see load_tasks() for the task keys).
+
+    Only one batch is held in memory at a time, so the file can be much larger than the memory available.
+    """
+
+    if batch_bytes is None:
+        batch_bytes = get_batch_bytes()
+
+    with open(file_path, "r") as task_file:
+        first_line = task_file.readline()
+        escaped = first_line == tasks_file_header
+        lines = [] if escaped else [first_line]
+        while True:
+            lines.extend(task_file.readlines(batch_bytes))
+            if not lines:
+                break
+            batch_tasks, batch_bad_lines = parse_task_lines(lines, escaped)
+            if bad_lines is not None:
+                bad_lines.extend(batch_bad_lines)
+            yield batch_tasks
+            lines = []
+
+# Streams all tasks of the 'tasks.txt' file
+def iter_tasks(bad_lines=None):
+    """
+    Reads the tasks of the 'tasks.txt' file one at a time, without loading the whole file.
+
+    Arguments:
+        bad_lines (list): A list to add the lines that can not be parsed to. Default is None, which skips them.
+
+    Returns:
+        tasks (iterator): The tasks in file order, which is due date order (see compact_tasks_file()).
+
+    Tasks stored without an ID keep None as their ID until the file is compacted or loaded. Callers rewriting the file
+    pass 'bad_lines' on to stream_tasks_file(), so damaged lines are quarantined rather than dropped.
+    """
+
+    return chain.from_iterable(iter_task_batches(tasks_file_path, bad_lines))
+
+# Writes a stream of tasks to a file in the 'tasks.txt' format
+def write_task_file(file_path, tasks):
+    """
+    Writes tasks one at a time to a file in the escaped 'tasks.txt' format, starting with 'tasks_file_header'.
+
+    Arguments:
+        file_path (str): The path of the file to write.
+        tasks (iterable): The tasks to write, in the order they should be stored.
+
+    Returns:
+        task_count (int): The number of tasks written.
+    """
+
+    task_count = 0
+    formatted_dates = {}
+    with open(file_path, "w") as task_file:
+        task_file.write(tasks_file_header)
+        for task in tasks:
+            task_file.write(format_task_line(task, formatted_dates))
+            task_count += 1
+    return task_count
+
+# Replaces 'tasks.txt' with a stream of tasks
+def stream_tasks_file(tasks, bad_lines=None):
+    """
+    Writes tasks to a temporary file beside 'tasks.txt' and replaces 'tasks.txt' with it once complete.
+
+    Arguments:
+        tasks (iterable): The tasks to write, sorted by due date. They may be streamed from 'tasks.txt' itself.
+        bad_lines (list): The damaged lines skipped while streaming 'tasks', filled in as they are read. Default is None.
+
+    Returns:
+        task_count (int): The number of tasks written.
+
+    Damaged lines are moved to 'tasks_quarantine.txt' before 'tasks.txt' is replaced, as load_tasks() does.
+    """
+
+    # Each thread writes its own temporary file, as in update_tasks_file()
+    temporary_file_path = f"{tasks_file_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    task_count = write_task_file(temporary_file_path, tasks)
+    if bad_lines:
+        quarantine_task_lines(bad_lines)
+        print(f"Warning: {len(bad_lines)} damaged line(s) of 'tasks.txt' were moved to 'tasks_quarantine.txt'.")
+    os.replace(temporary_file_path, tasks_file_path)
+    return task_count
+
+# Writes an added or edited task to 'tasks.txt' without loading the other tasks
+def stream_task_change(changed_task):
+    """
+    Rewrites the 'tasks.txt' file one task at a time with a task added, or replacing the stored task with the same ID.
+
+    Arguments:
+        changed_task (dict): The added or edited task.
+
+    The task is merged into the stream at its due date, after the tasks due at the same time, as insort() does
+    for a loaded task list. Tasks read from the stream before it was numbered have no ID to match and are refused
+    (see number_streamed_tasks()).
+    """
+
+    # Matching on a missing ID would drop every other task stored without one
+    if changed_task['task_id'] is None:
+        raise ValueError("Streamed task changes need a task ID: number the stored tasks first with number_streamed_tasks().")
+
+    bad_lines = []
+    other_tasks = (task for task in iter_tasks(bad_lines) if task['task_id'] != changed_task['task_id'])
+    stream_tasks_file(heapq.merge(other_tasks, [changed_task], key=itemgetter('due_date')), bad_lines)
+
+# Numbers the tasks stored without an ID, without loading 'tasks.txt'
+def number_streamed_tasks():
+    """
+    Gives the tasks stored without an ID in the 'tasks.txt' file their IDs, streaming the file instead of loading it.
+
+    Returns:
+        numbered (bool): True if tasks were numbered and the file rewritten, False if every task already had an ID.
+
+    The file is read once to find the highest ID, and rewritten only if a task has none. IDs continue from the highest
+    stored or archived ID, as in compact_tasks_file().
+    """
+
+    highest_task_id = 0
+    has_unnumbered_tasks = False
+    for task in iter_tasks():
+        if task['task_id'] is None:
+            has_unnumbered_tasks = True
+        elif task['task_id'] > highest_task_id:
+            highest_task_id = task['task_id']
+    if not has_unnumbered_tasks:
+        return False
+
+    bad_lines = []
+    stream_tasks_file(iter_numbered_tasks(iter_tasks(bad_lines), max(highest_task_id, load_highest_archived_task_id()) + 1), bad_lines)
+    return True
+
+# Numbers streamed tasks that have no ID yet
+def iter_numbered_tasks(tasks, next_task_id):
+    """
+    Gives every task without an ID the next free task ID, as the tasks stream past.
+
+    Arguments:
+        tasks (iterable): The tasks, in the order the IDs should be given out.
+        next_task_id (int): The first free task ID.
+
+    Yields:
+        task (dict): Each task, numbered.
+    """
+
+    for task in tasks:
+        if task['task_id'] is None:
+            task['task_id'] = next_task_id
+            next_task_id += 1
+        yield task
+
+# Merges sorted run files of the external sort
+def merge_task_runs(run_paths):
+    """
+    Merges run files sorted by due date into one stream sorted by due date.
+
+    Arguments:
+        run_paths (list): The paths of the run files, in the order their tasks were read from 'tasks.txt'.
+
+    Returns:
+        tasks (iterator): The tasks of all runs in due date order. Tasks due at the same time keep their run order.
+
+    The batch size is shared between the runs, so the memory used does not grow with the number of runs.
+    """
+
+    batch_bytes = max(4096, get_batch_bytes() // max(1, len(run_paths)))
+    runs = [chain.from_iterable(iter_task_batches(run_path, batch_bytes=batch_bytes)) for run_path in run_paths]
+    return heapq.merge(*runs, key=itemgetter('due_date'))
+
+# Sorts and rewrites 'tasks.txt' within the memory budget
+@instrumented
+def compact_tasks_file():
+    """
+    Rewrites the 'tasks.txt' file sorted by due date and in the escaped format, with every task numbered and damaged
+    lines moved to 'tasks_quarantine.txt', holding only a share of the memory budget at a time.
+
+    Returns:
+        task_count (int): The number of tasks in the rewritten file.
+
+    This is an external merge sort: the file is read in batches that fit the budget, each batch is sorted and spilled
+    to a temporary run file, and the runs are merged, 'external_sort_fan_in' at a time, into the new 'tasks.txt'.
+    The merges are stable, so tasks due at the same time keep their file order, as with load_tasks(). Tasks stored
+    without an ID are numbered in due date order during the last merge, continuing from the highest stored ID.
+    It can be scheduled (for example nightly from cron) with: python task_manager.py --compact-tasks
+    """
+
+    import shutil
+    import tempfile
+
+    bad_lines = []
+    highest_task_id = 0
+    run_directory = tempfile.mkdtemp(prefix="tasks-runs-", dir=os.path.dirname(tasks_file_path))
+
+    try:
+        # Spill each batch to a run file, sorted by due date
+        run_paths = []
+        for batch_tasks in iter_task_batches(tasks_file_path, bad_lines):
+            # Tasks without an ID are written with an empty ID field and numbered in the last merge
+            for task in batch_tasks:
+                if task['task_id'] is not None and task['task_id'] > highest_task_id:
+                    highest_task_id = task['task_id']
+            if not is_sorted_by_due_date(batch_tasks):
+                batch_tasks.sort(key=itemgetter('due_date'))
+            run_paths.append(os.path.join(run_directory, f"run-0-{len(run_paths)}.txt"))
+            write_task_file(run_paths[-1], batch_tasks)
+
+        # Merge neighbouring runs until one merge can take them all
+        merge_pass = 0
+        while len(run_paths) > external_sort_fan_in:
+            merge_pass += 1
+            merged_run_paths = []
+            for start in range(0, len(run_paths), external_sort_fan_in):
+                merged_run_paths.append(os.path.join(run_directory, f"run-{merge_pass}-{len(merged_run_paths)}.txt"))
+                write_task_file(merged_run_paths[-1], merge_task_runs(run_paths[start:start + external_sort_fan_in]))
+                for run_path in run_paths[start:start + external_sort_fan_in]:
+                    os.remove(run_path)
+            run_paths = merged_run_paths
+
+        task_count = stream_tasks_file(iter_numbered_tasks(merge_task_runs(run_paths), max(highest_task_id, load_highest_archived_task_id()) + 1),
+                                       bad_lines)
+    finally:
+        shutil.rmtree(run_directory, ignore_errors=True)
+
+    return task_count
+
+# Converts a task into a record that can be stored as JSON
+def task_to_record(task):
+    """
+    Converts a task into a dictionary of JSON-compatible values, with the dates in the 'DD/MM/YYYY' format.
+
+    Arguments:
+        task (dict): The task to convert.
+
+    Returns:
+        record (dict): The task fields, ready for json.dumps().
+    """
+
+    return {
+        'task_id': task['task_id'],
+        'assigned_to': task['assigned_to'],
+        'assigned_by': task['assigned_by'],
+        'task_title': task['task_title'],
+        'task_description': task['task_description'],
+        'due_date': task['due_date'].strftime(date_format),
+        'date_assigned': task['date_assigned'].strftime(date_format),
+        'task_status': task['task_status'],
+        'priority': task['priority']
+    }
+
+# Converts a record stored as JSON back into a task
+def task_from_record(record):
+    """
+    Converts a record made by task_to_record() back into a task.
+
+    Arguments:
+        record (dict): The record read from JSON.
+
+    Returns:
+        task (dict): The task, with the same keys as the tasks returned by load_tasks().
+    """
+
+    task = dict(record)
+    task['due_date'] = datetime.strptime(record['due_date'], date_format)
+    task['date_assigned'] = datetime.strptime(record['date_assigned'], date_format)
+    # Records exported before tasks had priorities
+    task.setdefault('priority', default_task_priority)
+    return task
+
+# Moves tasks to the compressed monthly archive files
+def archive_tasks(task_list):
+    """
+    Appends tasks to the task archive.
+
+    Arguments:
+        task_list (list): The tasks to archive.
+
+    The archive is partitioned by the month of the due date: each month is a gzip-compressed file of JSON lines named
+    'tasks-YYYY-MM.jsonl.gz' in the 'archive' directory. Each call appends a new gzip member, which readers see as
+    one continuous file. The archived task counts of each user and the highest archived task ID are updated too (see
+    load_archive_counts() and load_highest_archived_task_id()).
+    """
+
+    import gzip
+
+    # Read the counts before the new tasks are in the archive, so an archive without counts is not counted twice
+    archive_counts = load_archive_counts()
+    highest_task_id = load_highest_archived_task_id()
+
+    # Group the tasks by the month of their due date
+    monthly_tasks = {}
+    for task in task_list:
+        monthly_tasks.setdefault(task['due_date'].strftime("%Y-%m"), []).append(task)
+
+    os.makedirs(archive_directory, exist_ok=True)
+    for month, month_tasks in monthly_tasks.items():
+        with gzip.open(os.path.join(archive_directory, f"tasks-{month}.jsonl.gz"), "at", encoding="utf-8") as archive_file:
+            for task in month_tasks:
+                archive_file.write(json.dumps(task_to_record(task)) + "\n")
+
+    for task in task_list:
+        counts = archive_counts.setdefault(task['assigned_to'], [0, 0])
+        counts[0] += 1
+        counts[1] += task['task_status']
+    write_archive_counts(archive_counts)
+    write_highest_archived_task_id(max([highest_task_id] + [task['task_id'] for task in task_list if task['task_id'] is not None]))
+
+# Streams tasks from the archive
+def iter_archived_tasks(first_month=None, last_month=None):
+    """
+    Reads the archived tasks one at a time, month by month in due date order.
+
+    Arguments:
+        first_month (str): The first month to read as 'YYYY-MM', or None to start from the oldest month.
+        last_month (str): The last month to read as 'YYYY-MM', or None to read up to the newest month.
+
+    Yields:
+        task (dict): An archived task, with the same keys as the tasks returned by load_tasks().
+
+    Only one line is held in memory at a time, so the archive can be much larger than the memory available.
+    """
+
+    import gzip
+
+    if not os.path.isdir(archive_directory):
+        return
+
+    for file_name in sorted(os.listdir(archive_directory)):
+        if not (file_name.startswith("tasks-") and file_name.endswith(".jsonl.gz")):
+            continue
+        month = file_name[len("tasks-"):-len(".jsonl.gz")]
+        if (first_month is not None and month < first_month) or (last_month is not None and month > last_month):
+            continue
+
+        with gzip.open(os.path.join(archive_directory, file_name), "rt", encoding="utf-8") as archive_file:
+            for archive_line in archive_file:
+                yield task_from_record(json.loads(archive_line))
+
+# Counts the archived tasks of each user
+def load_archive_counts():
+    """
+    Returns the number of archived tasks of each user, and how many of them are completed.
+
+    Returns:
+        archive_counts (dict): Username -> [archived tasks, archived completed tasks].
+
+    The counts are kept in 'counts.json' in the archive directory by archive_tasks(), so they are read without opening
+    the archive. An archive written before the counts were kept is counted once by streaming it.
+    """
+
+    counts_file_path = os.path.join(archive_directory, "counts.json")
+    if os.path.isfile(counts_file_path):
+        with open(counts_file_path, "r") as counts_file:
+            return json.load(counts_file)
+
+    archive_counts = {}
+    for task in iter_archived_tasks():
+        counts = archive_counts.setdefault(task['assigned_to'], [0, 0])
+        counts[0] += 1
+        counts[1] += task['task_status']
+    if archive_counts:
+        write_archive_counts(archive_counts)
+    return archive_counts
+
+# Writes the number of archived tasks of each user
+def write_archive_counts(archive_counts):
+    """
+    Writes the archived task counts to 'counts.json' in the archive directory.
+
+    Arguments:
+        archive_counts (dict): Username -> [archived tasks, archived completed tasks].
+    """
+
+    os.makedirs(archive_directory, exist_ok=True)
+    with open(os.path.join(archive_directory, "counts.json"), "w") as counts_file:
+        json.dump(archive_counts, counts_file)
+
+# Returns the highest task ID in the archive
+def load_highest_archived_task_id():
+    """
+    Returns the highest ID of the archived tasks, so IDs of archived tasks are not given to new tasks.
+
+    Returns:
+        highest_task_id (int): The highest archived task ID, or 0 if no task with an ID is archived.
+
+    The ID is kept in 'highest_task_id.txt' in the archive directory by archive_tasks(). An archive written before the
+    ID was kept is read once by streaming it.
+    """
+
+    highest_id_file_path = os.path.join(archive_directory, "highest_task_id.txt")
+    if os.path.isfile(highest_id_file_path):
+        with open(highest_id_file_path, "r") as highest_id_file:
+            return int(highest_id_file.read())
+
+    highest_task_id = max((task['task_id'] for task in iter_archived_tasks() if task['task_id'] is not None), default=0)
+    if highest_task_id:
+        write_highest_archived_task_id(highest_task_id)
+    return highest_task_id
+
+# Writes the highest task ID in the archive
+def write_highest_archived_task_id(highest_task_id):
+    """
+    Writes the highest archived task ID to 'highest_task_id.txt' in the archive directory.
+
+    Arguments:
+        highest_task_id (int): The highest archived task ID.
+    """
+
+    os.makedirs(archive_directory, exist_ok=True)
+    with open(os.path.join(archive_directory, "highest_task_id.txt"), "w") as highest_id_file:
+        highest_id_file.write(f"{highest_task_id}\n")
+
+# Moves old completed tasks from 'tasks.txt' to the archive
+def archive_completed_tasks(age_days=archive_age_days):
+    """
+    Moves completed tasks due more than a number of days ago from the 'tasks.txt' file to the archive.
+
+    Arguments:
+        age_days (int): Completed tasks due more than this many days ago are archived. Default is 'archive_age_days'.
+
+    Returns:
+        archived_count (int): The number of tasks moved to the archive.
+
+    The archive is written before 'tasks.txt' is rewritten, so a failure part way leaves tasks duplicated rather than lost.
+    Registers over the memory budget are archived one batch at a time as 'tasks.txt' is streamed (see iter_unarchived_tasks()).
+    """
+
+    cutoff = datetime.combine(date.today() - timedelta(days=age_days), datetime.min.time())
+
+    if exceeds_memory_budget():
+        archived_counts = []
+        bad_lines = []
+        stream_tasks_file(iter_unarchived_tasks(cutoff, archived_counts, bad_lines), bad_lines)
+        return sum(archived_counts)
+
+    task_list = load_tasks()
+
+    archived_tasks = [task for task in task_list if task['task_status'] and task['due_date'] < cutoff]
+    if not archived_tasks:
+        return 0
+
+    archive_tasks(archived_tasks)
+    update_tasks_file([task for task in task_list if not (task['task_status'] and task['due_date'] < cutoff)])
+
+    for task in archived_tasks:
+        unindex_task(task['task_id'])
+    mark_task_indexes_current()
+    emit_events([{'type': "task_archived", 'task': task_to_record(task)} for task in archived_tasks])
+
+    return len(archived_tasks)
+
+# Streams the tasks to keep in 'tasks.txt', archiving the old completed tasks on the way
+def iter_unarchived_tasks(cutoff, archived_counts, bad_lines=None):
+    """
+    Streams the tasks of the 'tasks.txt' file one batch at a time, moving the completed tasks due before a cutoff to the archive.
+
+    Arguments:
+        cutoff (datetime): Completed tasks due before this time are archived.
+        archived_counts (list): A list to add the number of tasks archived from each batch to.
+        bad_lines (list): A list to add the lines that can not be parsed to. Default is None, which skips them.
+
+    Yields:
+        task (dict): Each task to keep, in file order.
+
+    Each batch is archived and its events emitted before its remaining tasks are passed on to be written.
+    """
+
+    for batch_tasks in iter_task_batches(tasks_file_path, bad_lines):
+        archived_tasks = [task for task in batch_tasks if task['task_status'] and task['due_date'] < cutoff]
+        if archived_tasks:
+            archive_tasks(archived_tasks)
+            emit_events([{'type': "task_archived", 'task': task_to_record(task)} for task in archived_tasks])
+            archived_counts.append(len(archived_tasks))
+        yield from (task for task in batch_tasks if not (task['task_status'] and task['due_date'] < cutoff))
+
+# Returns the directory holding a team's shard
+def get_team_shard_directory(team):
+    """
+    Returns the directory holding the files of a team.
+
+    Arguments:
+        team (str): The team name.
+
+    Returns:
+        shard_directory (str): The directory of 'task_manager.py' for the default team, 'teams/<team>' otherwise.
+    """
+
+    if team == default_team:
+        return script_directory
+    return os.path.join(teams_directory, team)
+
+# Switches the program to a team's shard
+def select_team_shard(team):
+    """
+    Routes the session to the shard of a team, creating the shard if it does not exist yet.
+
+    Arguments:
+        team (str): The team name.
+
+    Selecting the shard already in use changes nothing, so logging in keeps the task indexes and cached cards of the team.
+    The file paths and task indexes are shared by the sessions running in this process (see run_session()), so each
+    session holds the shard it selected until it ends. A session selecting another team waits until no other session
+    holds the current shard: sessions of one team run side by side, and sessions of different teams take turns.
+    """
+
+    session_thread = threading.get_ident() if getattr(session, "answers", None) is not None else None
+    shard_directory = get_team_shard_directory(team)
+
+    with shard_condition:
+        while True:
+            if team == active_team and tasks_file_path == os.path.join(shard_directory, "tasks.txt"):
+                if session_thread is not None:
+                    shard_sessions.add(session_thread)
+                return
+            # Let go of the current shard, and move it once no other session holds it
+            shard_sessions.discard(session_thread)
+            if not shard_sessions:
+                break
+            shard_condition.wait()
+
+        point_team_shard(team)
+        if session_thread is not None:
+            shard_sessions.add(session_thread)
+        shard_condition.notify_all()
+
+# Points the file paths at a team's shard
+def point_team_shard(team):
+    """
+    Points all file paths at the shard of a team, creating the shard if it does not exist yet.
+
+    Arguments:
+        team (str): The team name.
+
+    The task indexes belong to the previous shard, so they are marked out of date and rebuilt on the next load.
+    Callers go through select_team_shard(), which makes sure no other session is using the previous shard.
+    """
+
+    global active_team, user_file_path, tasks_file_path, task_overview_file_path, user_overview_file_path
+    global deadline_digest_file_path, reminder_spool_directory, scheduler_inbox_file_path, archive_directory, events_directory
+    global sync_version_file_path, quarantine_file_path, saved_filters_file_path, report_history_file_path, trends_report_file_path
+    global task_index_signature
+
+    shard_directory = get_team_shard_directory(team)
+    active_team = team
+    user_file_path = os.path.join(shard_directory, "user.txt")
+    tasks_file_path = os.path.join(shard_directory, "tasks.txt")
+    task_overview_file_path = os.path.join(shard_directory, "task_overview.txt")
+    user_overview_file_path = os.path.join(shard_directory, "user_overview.txt")
+    deadline_digest_file_path = os.path.join(shard_directory, "deadline_digest.txt")
+    reminder_spool_directory = os.path.join(shard_directory, "reminders")
+    scheduler_inbox_file_path = os.path.join(shard_directory, "deadline_scheduler_inbox.txt")
+    archive_directory = os.path.join(shard_directory, "archive")
+    events_directory = os.path.join(shard_directory, "events")
+    sync_version_file_path = os.path.join(shard_directory, "sync_version.txt")
+    saved_filters_file_path = os.path.join(shard_directory, "saved_filters.json")
+    report_history_file_path = os.path.join(shard_directory, "report_history.csv")
+    trends_report_file_path = os.path.join(shard_directory, "trends_report.txt")
+    quarantine_file_path = os.path.join(shard_directory, "tasks_quarantine.txt")
+    task_index_signature = None
+    # The cached task cards belong to the previous shard's tasks, which may share IDs with this one's
+    with task_index_lock:
+        task_card_cache.clear()
+
+    # Create the files of a new team
+    if team != default_team:
+        os.makedirs(shard_directory, exist_ok=True)
+        for file_path in (user_file_path, tasks_file_path):
+            if not os.path.isfile(file_path):
+                open(file_path, "w").close()
+
+# Temporarily switches the program to a team's shard
+@contextmanager
+def using_team_shard(team):
+    """
+    Switches to the shard of a team for the duration of a 'with' block, then switches back.
+
+    Arguments:
+        team (str): The team name.
+    """
+
+    previous_team = active_team
+    if team == previous_team:
+        yield
+        return
+
+    select_team_shard(team)
+    try:
+        yield
+    finally:
+        select_team_shard(previous_team)
+
+# Checks whether a team name can be used as a directory name
+def is_valid_team_name(team):
+    """
+    Checks that a team name is 2 to 30 letters, digits, '-' or '_'.
+
+    Arguments:
+        team (str): The team name.
+
+    Returns:
+        boolean: True if the name is valid, False otherwise.
+    """
+
+    return re.fullmatch(r"[a-z0-9_-]{2,30}", team) is not None
+
+# Returns the names of all teams
+def list_teams():
+    """
+    Returns the default team followed by every team with a shard in the 'teams' directory, sorted by name.
+    """
+
+    teams = [default_team]
+    if os.path.isdir(teams_directory):
+        teams += sorted(team for team in os.listdir(teams_directory) if team != default_team and os.path.isdir(os.path.join(teams_directory, team)))
+    return teams
+
+# Returns the team of every user that is not in the default team
+def load_team_directory():
+    """
+    Loads the team directory, which routes each user to the shard of their team.
+
+    Returns:
+        team_directory (dict): Username -> team for every user outside the default team.
+    """
+
+    team_directory = {}
+    if os.path.isfile(team_directory_file_path):
+        with open(team_directory_file_path, "r") as team_file:
+            for team_line in team_file:
+                username, team = team_line.strip().split(";")
+                team_directory[username] = team
+    return team_directory
+
+# Writes the team directory
+def write_team_directory(team_directory):
+    """
+    Writes the team directory to the 'team_directory.txt' file, one 'username;team' line per user.
+
+    Arguments:
+        team_directory (dict): Username -> team for every user outside the default team.
+    """
+
+    with open(team_directory_file_path, "w") as team_file:
+        for username, team in team_directory.items():
+            team_file.write(f"{username};{team}\n")
+
+# Returns the team a user belongs to
+def get_user_team(username):
+    """
+    Looks up the team of a user in the team directory.
+
+    Arguments:
+        username (str): The username.
+
+    Returns:
+        team (str): The team of the user, or the default team if the user is not listed.
+    """
+
+    return load_team_directory().get(username, default_team)
+
+# Counts the task statistics of one team, in a worker process
+def count_team_statistics(team, today):
+    """
+    Counts the total, completed and overdue tasks of one team's shard.
+
+    Arguments:
+        team (str): The team name.
+        today (date): Today's date, taken once by the caller.
+
+    Returns:
+        statistics (dict): The 'total', 'completed' and 'overdue' counts of count_task_statistics(), with 'users' holding the number of users.
+    """
+
+    select_team_shard(team)
+    users = load_users()
+    statistics = count_task_statistics(iter_tasks() if exceeds_memory_budget() else load_tasks(), users, today)
+    statistics['users'] = len(users)
+    return statistics
+
+# Carries the settings of the main process into a worker process
+def init_team_worker(directory, teams_path, memory_budget):
+    """
+    Applies the register location and memory budget of the main process in a worker process started by write_team_overview().
+
+    Arguments:
+        directory (str): The main process's 'script_directory'.
+        teams_path (str): The main process's 'teams_directory'.
+        memory_budget (int): The main process's 'memory_budget_bytes', or None for no limit.
+
+    Workers started with 'spawn' import the module afresh, so settings made from the command line or by the caller after
+    import would otherwise be lost, and each worker would load a whole team shard regardless of the budget.
+    """
+
+    global script_directory, teams_directory, memory_budget_bytes
+
+    script_directory = directory
+    teams_directory = teams_path
+    memory_budget_bytes = memory_budget
+
+# Writes the report across all teams
+def write_team_overview():
+    """
+    Writes the 'team_overview.txt' report with the users, tasks, completed and overdue tasks of each team, and the totals.
+
+    Each team's shard is counted in its own process, so teams are read in parallel and never through each other's files.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    teams = list_teams()
+    today = date.today()
+
+    with ProcessPoolExecutor(max_workers=min(len(teams), os.cpu_count() or 1), initializer=init_team_worker,
+                             initargs=(script_directory, teams_directory, memory_budget_bytes)) as executor:
+        team_statistics = dict(zip(teams, executor.map(count_team_statistics, teams, [today] * len(teams))))
+
+    totals = {'users': 0, 'total': 0, 'completed': 0, 'overdue': 0}
+    with open(team_overview_file_path, "w") as team_file:
+        team_file.write("           Team Overview Report\n")
+        team_file.write(f"{'=' * line_width}\n")
+        team_file.write("Date Report Generated: {}\n\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        team_file.write(f"{'Team': <20}{'Users': >10}{'Tasks': >10}{'Completed': >12}{'Overdue': >10}\n")
+        for team, statistics in team_statistics.items():
+            team_file.write(f"{team: <20}{statistics['users']: >10}{statistics['total']: >10}{statistics['completed']: >12}{statistics['overdue']: >10}\n")
+            for key in totals:
+                totals[key] += statistics[key]
+        team_file.write(f"{line * line_width}\n")
+        team_file.write(f"{'All teams': <20}{totals['users']: >10}{totals['total']: >10}{totals['completed']: >12}{totals['overdue']: >10}\n")
+
+# Numbers the tasks that do not have an ID yet
+def assign_task_ids(task_list):
+    """
+    Gives every task without an ID the next free task ID.
+
+    Arguments:
+        task_list (list): The list of tasks to number, in the order the IDs should be given out.
+    """
+
+    next_task_id = get_next_task_id(task_list)
+    for task in task_list:
+        if task['task_id'] is None:
+            task['task_id'] = next_task_id
+            next_task_id += 1
+
+# Returns the ID for the next new task
+def get_next_task_id(task_list):
+    """
+    Returns the next free task ID.
+
+    Arguments:
+        task_list (list): The list of all tasks.
+
+    Returns:
+        next_task_id (int): One more than the highest task ID in the list or the archive, or 1 if no task has an ID.
+
+    Archived tasks keep their IDs, so they are never given out again after the highest task is archived.
+    """
+
+    highest_task_id = max((task['task_id'] for task in task_list if task['task_id'] is not None), default=0)
+    return max(highest_task_id, load_highest_archived_task_id()) + 1
+
+# Returns the signature of the 'tasks.txt' file
+def get_tasks_file_signature():
+    """
+    Returns a signature that changes whenever the 'tasks.txt' file is written.
+
+    Returns:
+        signature (tuple): The modification time and size of the file, or None if the file does not exist.
+    """
+
+    try:
+        file_stat = os.stat(tasks_file_path)
+    except FileNotFoundError:
+        return None
+    return (file_stat.st_mtime_ns, file_stat.st_size)
+
+# Splits text into lowercase search terms
+def tokenize_text(text):
+    """
+    Splits text into lowercase words used as search terms.
+
+    Arguments:
+        text (str): The text to split.
+
+    Returns:
+        terms (list): The lowercase words found in the text.
+    """
+
+    return re.findall(r"\w+", text.lower())
+
+# Rebuilds the task indexes if 'tasks.txt' has changed since they were built
+@holding_task_indexes
+def refresh_task_indexes(task_list):
+    """
+    Rebuilds the search, calendar and user indexes from the task list if the 'tasks.txt' file has changed since they were built.
+
+    Arguments:
+        task_list (list): The list of all tasks just loaded from the 'tasks.txt' file.
+    """
+
+    global task_index_signature, workload_day, task_card_source
+
+    signature = get_tasks_file_signature()
+    if signature == task_index_signature:
+        return
+
+    indexed_tasks.clear()
+    search_index.clear()
+    search_terms.clear()
+    search_task_terms.clear()
+    calendar_index.clear()
+    calendar_days.clear()
+    calendar_task_days.clear()
+    assignee_index.clear()
+    assignee_task_users.clear()
+    assigner_index.clear()
+    assigner_task_users.clear()
+    materialized_views.clear()
+    sort_indexes.clear()
+    sort_task_keys.clear()
+    workload_day = None
+    workload_counts.clear()
+    workload_heap.clear()
+    task_card_cache.clear()
+    for task in task_list:
+        index_task(task)
+    task_index_signature = signature
+    task_card_source = (tasks_file_path, signature)
+
+# Loads the tasks if the task indexes are out of date
+@holding_task_indexes
+def ensure_task_indexes():
+    """
+    Reloads the tasks to rebuild the task indexes if the 'tasks.txt' file has changed since they were built.
+    """
+
+    if get_tasks_file_signature() != task_index_signature:
+        load_tasks()
+
+# Adds a single task to all task indexes
+@holding_task_indexes
+def index_task(task):
+    """
+    Adds a task to the search, calendar, user and sort indexes, the workload counts and the materialized views, replacing what was indexed for it before.
+
+    Arguments:
+        task (dict): The task to index.
+    """
+
+    task_id = task['task_id']
+    old_username, old_day = assignee_task_users.get(task_id), calendar_task_days.get(task_id)
+    indexed_tasks[task_id] = task
+    replace_task_terms(task_id, set(tokenize_text(task['task_title'])) | set(tokenize_text(task['task_description'])))
+    file_task_due_day(task_id, None if task['task_status'] else task['due_date'].date())
+    file_task_user(assignee_index, assignee_task_users, task_id, task['assigned_to'])
+    file_task_user(assigner_index, assigner_task_users, task_id, task['assigned_by'])
+    file_task_sort_keys(task_id, task)
+    file_task_workload(old_username, old_day, task['assigned_to'], calendar_task_days.get(task_id))
+    update_materialized_views(task_id)
+    invalidate_task_card(task_id)
+
+# Removes a single task from all task indexes
+@holding_task_indexes
+def unindex_task(task_id):
+    """
+    Removes a task from the search, calendar, user and sort indexes, the workload counts and the materialized views.
+
+    Arguments:
+        task_id (int): The ID of the task to remove.
+    """
+
+    old_username, old_day = assignee_task_users.get(task_id), calendar_task_days.get(task_id)
+    indexed_tasks.pop(task_id, None)
+    replace_task_terms(task_id, set())
+    file_task_due_day(task_id, None)
+    file_task_user(assignee_index, assignee_task_users, task_id, None)
+    file_task_user(assigner_index, assigner_task_users, task_id, None)
+    file_task_sort_keys(task_id, None)
+    file_task_workload(old_username, old_day, None, None)
+    update_materialized_views(task_id)
+    invalidate_task_card(task_id)
+
+# Updates the task indexes after a task has been added or edited
+@holding_task_indexes
+def update_task_indexes(task):
+    """
+    Indexes a task that has just been added or edited and written to the 'tasks.txt' file.
+
+    Arguments:
+        task (dict): The added or edited task.
+
+    The indexes are marked as matching the newly written file, so the next load does not rebuild them.
+    """
+
+    global task_index_signature, task_card_source
+
+    index_task(task)
+    task_index_signature = get_tasks_file_signature()
+    # The task's cards were dropped by index_task(), so the other cached cards still match the file
+    task_card_source = (tasks_file_path, task_index_signature)
+
+# Marks the task indexes as matching the 'tasks.txt' file
+@holding_task_indexes
+def mark_task_indexes_current():
+    """
+    Marks the task indexes as matching the 'tasks.txt' file, after a batch of tasks was written and indexed one by one.
+    """
+
+    global task_index_signature, task_card_source
+
+    task_index_signature = get_tasks_file_signature()
+    task_card_source = (tasks_file_path, task_index_signature)
+
+# Replaces the terms of a single task in the search index
+def replace_task_terms(task_id, new_terms):
+    """
+    Replaces the terms a task is indexed under in the search index.
+
+    Arguments:
+        task_id (int): The ID of the task.
+        new_terms (set): The terms found in the task title and description, or an empty set to remove the task.
+
+    Each term maps to the IDs of the tasks containing it.
+    New terms are inserted into the sorted term list so that prefix lookups stay a binary search.
+    """
+
+    old_terms = search_task_terms.pop(task_id, set())
+
+    # Remove the task from terms it no longer contains
+    for term in old_terms - new_terms:
+        task_ids = search_index[term]
+        task_ids.discard(task_id)
+        if not task_ids:
+            del search_index[term]
+            del search_terms[bisect_left(search_terms, term)]
+
+    # Add the task to terms it now contains
+    for term in new_terms - old_terms:
+        if term not in search_index:
+            search_index[term] = set()
+            insort(search_terms, term)
+        search_index[term].add(task_id)
+
+    if new_terms:
+        search_task_terms[task_id] = new_terms
+
+# Files a single task under its due day in the calendar index
+def file_task_due_day(task_id, new_day):
+    """
+    Files a task under its due day in the calendar index, moving it if the due date has changed.
+    Only incomplete tasks are filed, so every query on the calendar only touches open work.
+
+    Arguments:
+        task_id (int): The ID of the task.
+        new_day (date): The due day of the incomplete task, or None to remove a completed or deleted task.
+    """
+
+    old_day = calendar_task_days.pop(task_id, None)
+
+    # Remove the task from the day it was filed under
+    if old_day is not None and old_day != new_day:
+        task_ids = calendar_index[old_day]
+        task_ids.discard(task_id)
+        if not task_ids:
+            del calendar_index[old_day]
+            del calendar_days[bisect_left(calendar_days, old_day)]
+
+    # File the task under its due day
+    if new_day is not None:
+        if new_day not in calendar_index:
+            calendar_index[new_day] = set()
+            insort(calendar_days, new_day)
+        calendar_index[new_day].add(task_id)
+        calendar_task_days[task_id] = new_day
+
+# Files a single task under a username in a user index
+def file_task_user(user_index, task_users, task_id, username):
+    """
+    Files a task under a username in the assignee or assigner index, moving it if the user has changed.
+
+    Arguments:
+        user_index (dict): The user index to update (username -> set of task IDs).
+        task_users (dict): The reverse map of the index (task ID -> username).
+        task_id (int): The ID of the task.
+        username (str): The user to file the task under, or None to remove the task.
+    """
+
+    old_username = task_users.pop(task_id, None)
+
+    if old_username is not None and old_username != username:
+        task_ids = user_index[old_username]
+        task_ids.discard(task_id)
+        if not task_ids:
+            del user_index[old_username]
+
+    if username is not None:
+        user_index.setdefault(username, set()).add(task_id)
+        task_users[task_id] = username
+
+# Returns the key a task is sorted by in a sort order
+def task_sort_key(task, sort_order):
+    """
+    Works out the key of a task in one of the sort orders of the task listings.
+
+    Arguments:
+        task (dict): The task.
+        sort_order (str): 'due_date', 'priority', 'assignee' or 'date_assigned' (the values of 'task_sort_orders').
+
+    Returns:
+        sort_key (tuple): The key, ending with the task ID so that every key is unique and leads back to its task.
+    """
+
+    if sort_order == 'priority':
+        return (task['priority'], task['due_date'], task['task_id'])
+    if sort_order == 'assignee':
+        return (task['assigned_to'], task['due_date'], task['task_id'])
+    if sort_order == 'date_assigned':
+        # New tasks hold a date and loaded tasks a datetime, which can not be compared, so compare day numbers
+        return (task['date_assigned'].toordinal(), task['due_date'], task['task_id'])
+    return (task['due_date'], task['task_id'])
+
+# Builds the sort index of a sort order
+def build_sort_index(sort_order):
+    """
+    Works out the sort keys of all indexed tasks in a sort order and sorts them, the first time the order is used.
+
+    Arguments:
+        sort_order (str): The sort order (see task_sort_key()).
+
+    After this, index_task() and unindex_task() keep the index sorted one task at a time (see file_task_sort_keys()).
+    """
+
+    task_keys = sort_task_keys[sort_order] = {task_id: task_sort_key(task, sort_order) for task_id, task in indexed_tasks.items()}
+    sort_indexes[sort_order] = sorted(task_keys.values())
+
+# Moves a task to its new place in the built sort indexes
+def file_task_sort_keys(task_id, task):
+    """
+    Replaces the sort keys of a task in every sort index built so far.
+
+    Arguments:
+        task_id (int): The ID of the task.
+        task (dict): The task as it is now, or None to remove the task.
+    """
+
+    for sort_order, sort_index in sort_indexes.items():
+        task_keys = sort_task_keys[sort_order]
+        old_key = task_keys.pop(task_id, None)
+        if old_key is not None:
+            del sort_index[bisect_left(sort_index, old_key)]
+        if task is not None:
+            new_key = task_keys[task_id] = task_sort_key(task, sort_order)
+            insort(sort_index, new_key)
+
+# Puts tasks in a sort order using the sort indexes
+@holding_task_indexes
+def sort_tasks(tasks, sort_order):
+    """
+    Orders tasks for a listing without working out and comparing their keys from scratch.
+
+    Arguments:
+        tasks (list): The tasks to order, sorted by due date (as returned by load_tasks() and load_filtered_tasks()).
+        sort_order (str): The sort order (see task_sort_key()).
+
+    Returns:
+        sorted_tasks (list): The tasks in the sort order.
+
+    Listings are already in due date order. For the other orders, large listings are read off the sort index in one pass,
+    and small ones are ordered by the keys stored in the index. Tasks that are not indexed (archived tasks) get their
+    keys worked out, as do all tasks of registers over the memory budget.
+    """
+
+    if sort_order == 'due_date' or len(tasks) < 2:
+        return tasks
+    # The sort indexes would load every task of registers over the memory budget
+    if exceeds_memory_budget():
+        return sorted(tasks, key=lambda task: task_sort_key(task, sort_order))
+
+    ensure_task_indexes()
+    if sort_order not in sort_indexes:
+        build_sort_index(sort_order)
+    sort_index = sort_indexes[sort_order]
+    task_keys = sort_task_keys[sort_order]
+
+    tasks_by_id = {task['task_id']: task for task in tasks}
+    # Walk the whole index if the listing is a large part of it, sorting would cost more
+    if len(tasks) * 8 >= len(sort_index) and all(task_id in task_keys for task_id in tasks_by_id):
+        return [tasks_by_id[sort_key[-1]] for sort_key in sort_index if sort_key[-1] in tasks_by_id]
+    return sorted(tasks, key=lambda task: task_keys.get(task['task_id']) or task_sort_key(task, sort_order))
+
+# Returns the workload score of a user's task counts
+def get_workload_score(counts):
+    """
+    Weighs a user's open, overdue and upcoming task counts into one number, lower meaning less loaded.
+
+    Arguments:
+        counts (list): The user's [open, overdue, upcoming] task counts.
+
+    Returns:
+        score (int): The counts multiplied by 'workload_weights' and added up.
+    """
+
+    return counts[0] * workload_weights[0] + counts[1] * workload_weights[1] + counts[2] * workload_weights[2]
+
+# Adds or removes an incomplete task in its assignee's workload
+def count_workload_task(username, due_day, change):
+    """
+    Changes a user's workload counts for one incomplete task and files the user's new score in the workload heap.
+
+    Arguments:
+        username (str): The user the task is assigned to.
+        due_day (date): The due day of the task.
+        change (int): 1 to count the task, -1 to stop counting it.
+    """
+
+    counts = workload_counts.get(username)
+    if counts is None:
+        counts = workload_counts[username] = [0, 0, 0]
+    counts[0] += change
+    if due_day < workload_day:
+        counts[1] += change
+    elif due_day <= workload_day + timedelta(days=workload_upcoming_days):
+        counts[2] += change
+
+    # The entry with the old score stays in the heap and is skipped when it comes up
+    heapq.heappush(workload_heap, (get_workload_score(counts), username))
+    if len(workload_heap) > 4 * len(workload_counts) + 1024:
+        workload_heap[:] = [(get_workload_score(user_counts), user) for user, user_counts in workload_counts.items()]
+        heapq.heapify(workload_heap)
+
+# Updates the workload counts after a task has been indexed or removed
+def file_task_workload(old_username, old_day, new_username, new_day):
+    """
+    Moves an incomplete task between workloads when its assignee, due day or status has changed.
+
+    Arguments:
+        old_username (str): The user the task was assigned to, or None if it was not indexed.
+        old_day (date): The due day the task was counted under, or None if it was completed or not indexed.
+        new_username (str): The user the task is assigned to now, or None if it was removed.
+        new_day (date): The due day of the task now, or None if it is completed or was removed.
+
+    Nothing is counted until the workload has been built (see build_workload()).
+    """
+
+    if workload_day is None or (old_username, old_day) == (new_username, new_day):
+        return
+    if old_username is not None and old_day is not None:
+        count_workload_task(old_username, old_day, -1)
+    if new_username is not None and new_day is not None:
+        count_workload_task(new_username, new_day, 1)
+
+# Counts the workload of every user from the task indexes
+def build_workload(users):
+    """
+    Counts the open, overdue and upcoming tasks of every user as of today and builds the workload heap.
+
+    Arguments:
+        users (dict): The registered users. Users without tasks start with a workload of 0.
+
+    Only the incomplete tasks in the calendar index are visited. The counts depend on today's date, so they are
+    built again on the first suggestion of a new day and kept up to date by index_task() and unindex_task() meanwhile.
+    """
+
+    global workload_day
+
+    workload_day = date.today()
+    upcoming_end = workload_day + timedelta(days=workload_upcoming_days)
+    workload_counts.clear()
+    for username in users:
+        workload_counts[username] = [0, 0, 0]
+
+    for due_day, task_ids in calendar_index.items():
+        for task_id in task_ids:
+            counts = workload_counts.get(assignee_task_users[task_id])
+            if counts is None:
+                counts = workload_counts[assignee_task_users[task_id]] = [0, 0, 0]
+            counts[0] += 1
+            if due_day < workload_day:
+                counts[1] += 1
+            elif due_day <= upcoming_end:
+                counts[2] += 1
+
+    workload_heap[:] = [(get_workload_score(counts), username) for username, counts in workload_counts.items()]
+    heapq.heapify(workload_heap)
+
+# Adds a newly registered user to the workload
+@holding_task_indexes
+def add_workload_user(username):
+    """
+    Puts a newly registered user in the workload heap, so they can be suggested as an assignee straight away.
+
+    Arguments:
+        username (str): The new user.
+
+    A username registered again after being deleted keeps the counts of the tasks still assigned to it, but its heap
+    entry was dropped by suggest_assignees() while it was deleted, so an entry is pushed with its current score.
+    """
+
+    if workload_day is not None:
+        counts = workload_counts.setdefault(username, [0, 0, 0])
+        heapq.heappush(workload_heap, (get_workload_score(counts), username))
+
+# Suggests the least loaded users to assign a task to
+@holding_task_indexes
+def suggest_assignees(users, count=assignee_suggestion_count):
+    """
+    Finds the registered users with the lowest workload scores.
+
+    Arguments:
+        users (dict): The registered users, who are the only candidates.
+        count (int): The number of users to suggest. Default is 'assignee_suggestion_count'.
+
+    Returns:
+        suggestions (list): (username, [open, overdue, upcoming]) tuples, least loaded first.
+
+    The least loaded users are popped from the workload heap, skipping entries left behind by older scores, and pushed
+    back afterwards, so a suggestion takes time for the users suggested rather than all users.
+    """
+
+    ensure_task_indexes()
+    if workload_day != date.today():
+        build_workload(users)
+
+    suggestions = []
+    while workload_heap and len(suggestions) < count:
+        score, username = heapq.heappop(workload_heap)
+        counts = workload_counts.get(username)
+        # Drop entries of deleted users, outdated scores and repeated entries with the same score
+        if username not in users or counts is None or get_workload_score(counts) != score or any(username == suggested for suggested, _ in suggestions):
+            continue
+        suggestions.append((username, counts))
+
+    for username, counts in suggestions:
+        heapq.heappush(workload_heap, (get_workload_score(counts), username))
+    return suggestions
+
+# Prints the suggested assignees for a new task
+def print_assignee_suggestions(users):
+    """
+    Prints the least loaded users with their open, overdue and upcoming task counts.
+
+    Arguments:
+        users (dict): The registered users.
+
+    No suggestions are made for registers over the memory budget, as the workload is counted from the task indexes.
+    """
+
+    if exceeds_memory_budget():
+        return
+
+    suggestions = suggest_assignees(users)
+    if not suggestions:
+        return
+    print(f"Least loaded users (open / overdue / due within {workload_upcoming_days} days):")
+    for username, (open_count, overdue_count, upcoming_count) in suggestions:
+        print(f"  {username: <16}{open_count: >5} /{overdue_count: >5} /{upcoming_count: >5}")
+    print()
+
+# Returns the tasks assigned to a user
+@holding_task_indexes
+def get_tasks_assigned_to(username):
+    """
+    Looks up the tasks assigned to a user in the assignee index.
+
+    Arguments:
+        username (str): The username of the assignee.
+
+    Returns:
+        assigned_tasks (list): The tasks assigned to the user.
+    """
+
+    ensure_task_indexes()
+    return [indexed_tasks[task_id] for task_id in assignee_index.get(username, ())]
+
+# Returns the IDs of tasks assigned by users that no longer exist
+@holding_task_indexes
+def get_orphaned_task_ids(users):
+    """
+    Collects the IDs of tasks whose assigner is no longer in the user register.
+
+    Arguments:
+        users (dict): The registered users.
+
+    Returns:
+        orphaned_task_ids (set): The IDs of the tasks assigned by deleted users.
+
+    Only the assigner index is visited, so the time taken grows with the number of assigners and orphaned tasks, not all tasks.
+    """
+
+    ensure_task_indexes()
+
+    orphaned_task_ids = set()
+    for username, task_ids in assigner_index.items():
+        if username not in users:
+            orphaned_task_ids |= task_ids
+    return orphaned_task_ids
+
+# Returns incomplete tasks due between two days
+@holding_task_indexes
+def get_tasks_due_between(first_day, last_day):
+    """
+    Looks up the incomplete tasks due between two days in the calendar index.
+
+    Arguments:
+        first_day (date): The first due day to include, or None to start from the earliest due day.
+        last_day (date): The last due day to include, or None to include all later due days.
+
+    Returns:
+        due_tasks (list): The incomplete tasks due in the range, sorted by due date.
+
+    Only the days in the range are visited, so the time taken grows with the number of tasks found.
+    """
+
+    ensure_task_indexes()
+
+    start = 0 if first_day is None else bisect_left(calendar_days, first_day)
+    end = len(calendar_days) if last_day is None else bisect_right(calendar_days, last_day)
+
+    due_tasks = []
+    for day in islice(calendar_days, start, end):
+        due_tasks.extend(indexed_tasks[task_id] for task_id in sorted(calendar_index[day]))
+    return due_tasks
+
+# Returns incomplete tasks that are past their due date
+def get_overdue_tasks(today):
+    """
+    Returns the incomplete tasks due before today, sorted by due date.
+
+    Arguments:
+        today (date): Today's date, taken once by the caller.
+    """
+
+    return get_tasks_due_between(None, today - timedelta(days=1))
+
+# Returns incomplete tasks due within a number of days
+def get_tasks_due_within(today, days_ahead):
+    """
+    Returns the incomplete tasks due from today up to a number of days ahead, sorted by due date.
+
+    Arguments:
+        today (date): Today's date, taken once by the caller.
+        days_ahead (int): The number of days after today to include.
+    """
+
+    return get_tasks_due_between(today, today + timedelta(days=days_ahead))
+
+# Returns incomplete tasks due this week
+def get_tasks_due_this_week(today):
+    """
+    Returns the incomplete tasks due from today up to and including Sunday, sorted by due date.
+
+    Arguments:
+        today (date): Today's date, taken once by the caller.
+    """
+
+    return get_tasks_due_within(today, 6 - today.weekday())
+
+# Returns the IDs of tasks containing a term
+def find_term(term, prefix):
+    """
+    Looks up the IDs of tasks containing a search term.
+
+    Arguments:
+        term (str): The lowercase search term.
+        prefix (bool): True to match every indexed term starting with the search term.
+
+    Returns:
+        task_ids (set): The IDs of the matching tasks.
+    """
+
+    if not prefix:
+        return search_index.get(term, set())
+
+    task_ids = set()
+    position = bisect_left(search_terms, term)
+    while position < len(search_terms) and search_terms[position].startswith(term):
+        task_ids |= search_index[search_terms[position]]
+        position += 1
+    return task_ids
+
+# Returns the tasks matching all words of a search query
+@holding_task_indexes
+def search_tasks(query):
+    """
+    Searches task titles and descriptions for all words of a query.
+
+    Arguments:
+        query (str): Words to search for. A word ending with '*' matches every word starting with it.
+
+    Returns:
+        found_tasks (list): The tasks containing all words of the query, sorted by due date.
+
+    The search index is refreshed from the 'tasks.txt' file first if it is out of date.
+    Registers over the memory budget are searched as they are streamed from 'tasks.txt', without the search index.
+    """
+
+    query_terms = parse_search_query(query)
+    if exceeds_memory_budget():
+        return [task for task in iter_tasks() if task_has_terms(task, query_terms)] if query_terms else []
+
+    ensure_task_indexes()
+    found_ids = find_task_ids(query_terms)
+
+    found_tasks = [indexed_tasks[task_id] for task_id in found_ids]
+    found_tasks.sort(key=lambda task: task['due_date'])
+    return found_tasks
+
+# Splits a search query into the terms to look up
+def parse_search_query(query):
+    """
+    Splits a search query into lowercase terms, marking the ones to match as prefixes.
+
+    Arguments:
+        query (str): Words to search for. A word ending with '*' matches every word starting with it.
+
+    Returns:
+        query_terms (list): (term, prefix) tuples, where prefix is True for terms matched as the beginning of a word.
+    """
+
+    query_terms = []
+    for word in query.split():
+        word_terms = tokenize_text(word)
+        for term in word_terms:
+            query_terms.append((term, False))
+        if word.endswith('*') and word_terms:
+            query_terms[-1] = (word_terms[-1], True)
+    return query_terms
+
+# Returns the IDs of the tasks containing all terms of a query
+def find_task_ids(query_terms):
+    """
+    Looks up the IDs of tasks containing all the terms of a parsed query.
+
+    Arguments:
+        query_terms (list): (term, prefix) tuples made by parse_search_query().
+
+    Returns:
+        task_ids (set): The IDs of the tasks containing every term.
+    """
+
+    if not query_terms:
+        return set()
+
+    # Intersect the matches, starting with the rarest term
+    matches = sorted((find_term(term, prefix) for term, prefix in query_terms), key=len)
+    found_ids = set(matches[0])
+    for task_ids in matches[1:]:
+        found_ids &= task_ids
+        if not found_ids:
+            break
+    return found_ids
+
+# Loads the saved filters of all users
+def load_saved_filters():
+    """
+    Loads the saved filters from the 'saved_filters.json' file.
+
+    Returns:
+        saved_filters (dict): Username -> filter name -> saved filter, empty if no filter has been saved.
+
+    A saved filter is a dictionary with the keys:
+    - 'assigned_to': Username the tasks are assigned to, or None for any user.
+    - 'assigned_by': Username that assigned the tasks, or None for any user.
+    - 'status': 'open' for incomplete tasks, 'done' for completed tasks, or None for both.
+    - 'due_from_days': First due day as days from today (negative for past days), or None for no limit.
+    - 'due_to_days': Last due day as days from today, or None for no limit.
+    - 'text': Words the title or description must contain (as in 'Search Tasks'), or None.
+    - 'uses': The number of times the filter has been opened.
+    """
+
+    if not os.path.isfile(saved_filters_file_path):
+        return {}
+    with open(saved_filters_file_path, "r") as saved_filters_file:
+        return json.load(saved_filters_file)
+
+# Writes the saved filters of all users
+def write_saved_filters(saved_filters):
+    """
+    Writes the saved filters to the 'saved_filters.json' file.
+
+    Arguments:
+        saved_filters (dict): Username -> filter name -> saved filter.
+    """
+
+    with open(saved_filters_file_path, "w") as saved_filters_file:
+        json.dump(saved_filters, saved_filters_file, indent=2)
+
+# Checks whether a task matches a saved filter
+def task_matches_filter(task, saved_filter, query_terms, today):
+    """
+    Checks a single task against a saved filter.
+
+    Arguments:
+        task (dict): The task to check.
+        saved_filter (dict): The saved filter (see load_saved_filters()).
+        query_terms (list): The parsed 'text' of the filter, from parse_search_query().
+        today (date): The day the due date range of the filter counts from.
+
+    Returns:
+        matches (bool): True if the task matches every part of the filter.
+    """
+
+    if saved_filter['assigned_to'] is not None and task['assigned_to'] != saved_filter['assigned_to']:
+        return False
+    if saved_filter['assigned_by'] is not None and task['assigned_by'] != saved_filter['assigned_by']:
+        return False
+    if saved_filter['status'] is not None and task['task_status'] != (saved_filter['status'] == 'done'):
+        return False
+
+    due_day = task['due_date'].date()
+    if saved_filter['due_from_days'] is not None and due_day < today + timedelta(days=saved_filter['due_from_days']):
+        return False
+    if saved_filter['due_to_days'] is not None and due_day > today + timedelta(days=saved_filter['due_to_days']):
+        return False
+
+    return task_has_terms(task, query_terms)
+
+# Checks whether a task contains all terms of a parsed query
+def task_has_terms(task, query_terms):
+    """
+    Checks a single task's title and description against the terms of a parsed query.
+
+    Arguments:
+        task (dict): The task to check.
+        query_terms (list): (term, prefix) tuples made by parse_search_query().
+
+    Returns:
+        matches (bool): True if the task contains every term.
+
+    The terms indexed for the task are used if it is indexed, otherwise its title and description are split into terms.
+    """
+
+    task_terms = search_task_terms.get(task['task_id'])
+    if task_terms is None:
+        task_terms = set(tokenize_text(task['task_title'])) | set(tokenize_text(task['task_description']))
+    for term, prefix in query_terms:
+        if prefix:
+            if not any(task_term.startswith(term) for task_term in task_terms):
+                return False
+        elif term not in task_terms:
+            return False
+    return True
+
+# Finds the IDs of the tasks matching a saved filter
+def evaluate_saved_filter(saved_filter, query_terms, today):
+    """
+    Finds all tasks matching a saved filter, starting from the narrowest task index the filter allows.
+
+    Arguments:
+        saved_filter (dict): The saved filter (see load_saved_filters()).
+        query_terms (list): The parsed 'text' of the filter, from parse_search_query().
+        today (date): The day the due date range of the filter counts from.
+
+    Returns:
+        task_ids (set): The IDs of the matching tasks.
+    """
+
+    # Take the candidates from the search, user or calendar index, and check only those
+    if query_terms:
+        candidate_ids = find_task_ids(query_terms)
+    elif saved_filter['assigned_to'] is not None:
+        candidate_ids = assignee_index.get(saved_filter['assigned_to'], set())
+    elif saved_filter['assigned_by'] is not None:
+        candidate_ids = assigner_index.get(saved_filter['assigned_by'], set())
+    elif saved_filter['status'] == 'open' and saved_filter['due_to_days'] is not None:
+        candidate_ids = [task['task_id'] for task in get_tasks_due_between(
+            date.min if saved_filter['due_from_days'] is None else today + timedelta(days=saved_filter['due_from_days']),
+            today + timedelta(days=saved_filter['due_to_days']))]
+    else:
+        candidate_ids = indexed_tasks.keys()
+
+    return {task_id for task_id in candidate_ids if task_matches_filter(indexed_tasks[task_id], saved_filter, query_terms, today)}
+
+# Returns the tasks of a saved filter, from its materialized view if it has one
+@holding_task_indexes
+def get_saved_view_tasks(username, filter_name):
+    """
+    Opens a saved filter of a user and returns its tasks.
+
+    Arguments:
+        username (str): The user who saved the filter.
+        filter_name (str): The name of the saved filter.
+
+    Returns:
+        view_tasks (list): The matching tasks, sorted by due date, or an empty list if there is no such filter.
+
+    Filters opened 'materialize_after_uses' times or more (see count_saved_filter_use()) are kept as materialized views:
+    their matching task IDs are stored and updated as tasks are added, edited and removed (see update_materialized_views()),
+    so opening them again only reads the result. A view with a due date range is worked out again on a new day.
+    Registers over the memory budget are streamed and checked task by task instead.
+    """
+
+    saved_filter = load_saved_filters().get(username, {}).get(filter_name)
+    if saved_filter is None:
+        return []
+
+    # Stream registers over the memory budget, without the task indexes and materialized views
+    if exceeds_memory_budget():
+        query_terms = parse_search_query(saved_filter['text'] or "")
+        return [task for task in iter_tasks() if task_matches_filter(task, saved_filter, query_terms, date.today())]
+
+    ensure_task_indexes()
+    today = date.today()
+    view_key = (username, filter_name)
+    has_date_range = saved_filter['due_from_days'] is not None or saved_filter['due_to_days'] is not None
+
+    # Read the materialized view if it is still for this filter and, for date ranges, for today
+    view = materialized_views.get(view_key)
+    if view is None or view['filter'] != saved_filter_criteria(saved_filter) or (has_date_range and view['day'] != today):
+        query_terms = parse_search_query(saved_filter['text'] or "")
+        task_ids = evaluate_saved_filter(saved_filter, query_terms, today)
+        if saved_filter['uses'] >= materialize_after_uses:
+            materialized_views[view_key] = {'filter': saved_filter_criteria(saved_filter), 'query_terms': query_terms,
+                                            'day': today, 'task_ids': task_ids}
+        else:
+            materialized_views.pop(view_key, None)
+    else:
+        task_ids = view['task_ids']
+
+    view_tasks = [indexed_tasks[task_id] for task_id in task_ids]
+    view_tasks.sort(key=itemgetter('due_date'))
+    return view_tasks
+
+# Returns the parts of a saved filter that decide which tasks match
+def saved_filter_criteria(saved_filter):
+    """
+    Returns a saved filter without its use count, to tell whether a materialized view was built from the same criteria.
+
+    Arguments:
+        saved_filter (dict): The saved filter (see load_saved_filters()).
+
+    Returns:
+        criteria (dict): The saved filter without the 'uses' key.
+    """
+
+    return {key: value for key, value in saved_filter.items() if key != 'uses'}
+
+# Updates the materialized views after a task has been indexed or removed
+def update_materialized_views(task_id):
+    """
+    Adds a task to or removes it from every materialized view, depending on whether it matches the view's filter now.
+
+    Arguments:
+        task_id (int): The ID of the task that was indexed or removed from the indexes.
+
+    Only the changed task is checked, so the cost of a change grows with the number of views, not the number of tasks.
+    """
+
+    task = indexed_tasks.get(task_id)
+    for view in materialized_views.values():
+        if task is not None and task_matches_filter(task, view['filter'], view['query_terms'], view['day']):
+            view['task_ids'].add(task_id)
+        else:
+            view['task_ids'].discard(task_id)
+
+# Lets the user open, create or delete their saved filters
+def choose_saved_filter():
+    """
+    Lists the saved filters of the current user and lets them open one, save a new one or delete one.
+
+    Returns:
+        filter_name (str): The name of the saved filter to open, or None to return to the filter options.
+    """
+
+    while True:
+        user_filters = load_saved_filters().get(session.current_user, {})
+        filter_names = sorted(user_filters)
+
+        print("\nSaved filters:")
+        for number, filter_name in enumerate(filter_names, start=1):
+            print(f"{number} - {filter_name}: {describe_saved_filter(user_filters[filter_name])}")
+        if not filter_names:
+            print("You have no saved filters yet.")
+        filter_choice = input("Enter the number of a filter to open it, 'n' to save a new filter, 'd' followed by a number to delete one\n"
+                              "(e.g. 'd1') or press 'Enter' to return to filter options: ").lower()
+
+        if filter_choice == '':
+            return None
+        if filter_choice == 'n':
+            filter_name = create_saved_filter()
+            if filter_name is not None:
+                count_saved_filter_use(filter_name)
+                return filter_name
+        elif filter_choice.isdigit() and 0 < int(filter_choice) <= len(filter_names):
+            count_saved_filter_use(filter_names[int(filter_choice) - 1])
+            return filter_names[int(filter_choice) - 1]
+        elif filter_choice.startswith('d') and filter_choice[1:].isdigit() and 0 < int(filter_choice[1:]) <= len(filter_names):
+            saved_filters = load_saved_filters()
+            del saved_filters[session.current_user][filter_names[int(filter_choice[1:]) - 1]]
+            write_saved_filters(saved_filters)
+            with task_index_lock:
+                materialized_views.pop((session.current_user, filter_names[int(filter_choice[1:]) - 1]), None)
+            print("\nSaved filter deleted.")
+        else:
+            print("\nYou have made a wrong choice. Try again.")
+
+# Counts an opening of a saved filter of the current user
+def count_saved_filter_use(filter_name):
+    """
+    Adds one to the number of times a saved filter of the current user has been opened.
+
+    Arguments:
+        filter_name (str): The name of the saved filter.
+    """
+
+    saved_filters = load_saved_filters()
+    saved_filter = saved_filters[session.current_user][filter_name]
+    saved_filter['uses'] = saved_filter.get('uses', 0) + 1
+    write_saved_filters(saved_filters)
+
+# Prompts the user for a new saved filter
+def create_saved_filter():
+    """
+    Prompts the current user for the parts of a new filter and saves it.
+
+    Returns:
+        filter_name (str): The name of the new filter, or None if the user cancelled.
+    """
+
+    users = load_users()
+
+    filter_name = input("\nEnter a name for the filter or press 'Enter' to cancel: ").strip()
+    if filter_name == '':
+        return None
+
+    # Ask for each part of the filter, 'Enter' leaves it out
+    saved_filter = {}
+    for key, prompt in (('assigned_to', "Assigned to (username, 'me' for yourself): "), ('assigned_by', "Assigned by (username, 'me' for yourself): ")):
+        while True:
+            username = input(prompt).lower()
+            if username == 'me':
+                username = session.current_user
+            if username == '' or username in users:
+                saved_filter[key] = username or None
+                break
+            print(f"\nUsername '{username}' does not exist. Please enter a valid username.")
+
+    while True:
+        status = input("Status ('o' for incomplete, 'c' for completed): ").lower()
+        if status in ('', 'o', 'c'):
+            saved_filter['status'] = {'': None, 'o': 'open', 'c': 'done'}[status]
+            break
+        print("\nEnter 'o', 'c' or press 'Enter' for both.")
+
+    for key, prompt in (('due_from_days', "Due from (days from today, e.g. '-7' for a week ago): "), ('due_to_days', "Due up to (days from today, e.g. '14'): ")):
+        while True:
+            days = input(prompt)
+            if days == '' or days.lstrip('-').isdigit():
+                saved_filter[key] = int(days) if days else None
+                break
+            print("\nEnter a whole number of days or press 'Enter' for no limit.")
+
+    saved_filter['text'] = input("Words in the title or description (end a word with '*' to match its beginning): ").strip() or None
+    saved_filter['uses'] = 0
+
+    saved_filters = load_saved_filters()
+    saved_filters.setdefault(session.current_user, {})[filter_name] = saved_filter
+    write_saved_filters(saved_filters)
+    with task_index_lock:
+        materialized_views.pop((session.current_user, filter_name), None)
+    return filter_name
+
+# Describes a saved filter in words
+def describe_saved_filter(saved_filter):
+    """
+    Returns a short description of a saved filter for the list of saved filters.
+
+    Arguments:
+        saved_filter (dict): The saved filter (see load_saved_filters()).
+
+    Returns:
+        description (str): The parts of the filter, or 'all tasks' if it has none.
+    """
+
+    parts = []
+    if saved_filter['assigned_to'] is not None:
+        parts.append(f"to {saved_filter['assigned_to']}")
+    if saved_filter['assigned_by'] is not None:
+        parts.append(f"by {saved_filter['assigned_by']}")
+    if saved_filter['status'] is not None:
+        parts.append("incomplete" if saved_filter['status'] == 'open' else "completed")
+    if saved_filter['due_from_days'] is not None or saved_filter['due_to_days'] is not None:
+        due_from = "" if saved_filter['due_from_days'] is None else f"{saved_filter['due_from_days']:+d}"
+        due_to = "" if saved_filter['due_to_days'] is None else f"{saved_filter['due_to_days']:+d}"
+        parts.append(f"due {due_from}..{due_to} days")
+    if saved_filter['text'] is not None:
+        parts.append(f"'{saved_filter['text']}'")
+    return ", ".join(parts) or "all tasks"
+
+# Tells a running deadline scheduler that a task was added or edited
+def notify_deadline_scheduler(task, removed=False):
+    """
+    Appends an added, edited or removed task to the inbox of the running deadline scheduler.
+
+    Arguments:
+        task (dict): The added, edited or removed task.
+        removed (bool): True if the task was taken out of 'tasks.txt', so its reminders are cancelled.
+
+    The inbox only exists while a scheduler is running, so nothing is written otherwise.
+    """
+
+    if not os.path.exists(scheduler_inbox_file_path):
+        return
+
+    with open(scheduler_inbox_file_path, "a") as inbox_file:
+        inbox_file.write(json.dumps({
+            'task_id': task['task_id'],
+            'assigned_to': task['assigned_to'],
+            'task_title': task['task_title'],
+            'due_date': task['due_date'].strftime(date_format),
+            'task_status': task['task_status'],
+            'removed': removed
+        }) + "\n")
+
+# Writes a reminder to the reminder spool directory
+def write_reminder_to_spool(reminder):
+    """
+    Writes a reminder as a JSON file in the reminder spool directory.
+
+    Arguments:
+        reminder (dict): The reminder sent by the deadline scheduler.
+
+    The file name is made from the task ID, due date and lead time, so a reminder sent twice overwrites the first copy.
+    """
+
+    os.makedirs(reminder_spool_directory, exist_ok=True)
+    file_name = f"{reminder['task_id']}_{reminder['due_date'].replace('/', '')}_{reminder['lead_days']}.json"
+    with open(os.path.join(reminder_spool_directory, file_name), "w") as reminder_file:
+        json.dump(reminder, reminder_file)
+
+# Adds the reminders of a task to the deadline scheduler queue
+def schedule_task_reminders(reminder_queue, scheduled_tasks, task, lead_days, today_start):
+    """
+    Pushes the upcoming reminders of a task onto the reminder queue, replacing any reminders scheduled for it before.
+
+    Arguments:
+        reminder_queue (list): The min-heap of (remind_at, task_id, version, lead_days) entries.
+        scheduled_tasks (dict): Task ID -> (version, task) of the latest scheduled version of each task.
+        task (dict): The task to schedule.
+        lead_days (tuple): The days before the due date to send reminders.
+        today_start (datetime): Midnight today. Reminders due before today are skipped.
+
+    Earlier entries of the task stay in the heap and are dropped when popped, because their version no longer matches.
+    """
+
+    version = scheduled_tasks.get(task['task_id'], (0, None))[0] + 1
+    scheduled_tasks[task['task_id']] = (version, task)
+    if task['task_status'] or task.get('removed'):
+        return
+
+    for lead in lead_days:
+        remind_at = task['due_date'] - timedelta(days=lead)
+        if remind_at >= today_start:
+            heapq.heappush(reminder_queue, (remind_at, task['task_id'], version, lead))
+
+# Runs the deadline scheduler until interrupted
+def run_deadline_scheduler(reminder_sink=write_reminder_to_spool, lead_days=reminder_lead_days, poll_seconds=5):
+    """
+    Sends a reminder for each incomplete task at each lead time before its due date.
+
+    Arguments:
+        reminder_sink (function): Called with each reminder (a dict). Default writes it to the reminder spool directory.
+        lead_days (tuple): The days before the due date to send reminders. Default is 'reminder_lead_days'.
+        poll_seconds (int): The longest time to sleep before checking the inbox for added or edited tasks.
+
+    The tasks are read once at start to fill a min-heap ordered by reminder time. After that, added and edited tasks
+    arrive through the scheduler inbox written by notify_deadline_scheduler(), so 'tasks.txt' is never scanned again.
+    Each wakeup pops only the reminders that are due, at O(log N) per reminder.
+    Run it in the background with: python task_manager.py --deadline-scheduler
+    """
+
+    reminder_queue = []
+    scheduled_tasks = {}
+    today_start = datetime.combine(date.today(), datetime.min.time())
+
+    # Create an empty inbox before reading the tasks so that no change made meanwhile is missed
+    with open(scheduler_inbox_file_path, "w"):
+        pass
+    inbox_offset = 0
+
+    for task in iter_tasks() if exceeds_memory_budget() else load_tasks():
+        schedule_task_reminders(reminder_queue, scheduled_tasks, task, lead_days, today_start)
+
+    try:
+        while True:
+            now = datetime.now()
+            today_start = datetime.combine(now.date(), datetime.min.time())
+
+            # Schedule the tasks added or edited since the last wakeup
+            with open(scheduler_inbox_file_path, "r") as inbox_file:
+                inbox_file.seek(inbox_offset)
+                for inbox_line in iter(inbox_file.readline, ""):
+                    if not inbox_line.endswith("\n"):
+                        # Leave a line that is still being written for the next wakeup
+                        break
+                    inbox_offset = inbox_file.tell()
+                    task = json.loads(inbox_line)
+                    task['due_date'] = datetime.strptime(task['due_date'], date_format)
+                    schedule_task_reminders(reminder_queue, scheduled_tasks, task, lead_days, today_start)
+
+            # Send the reminders that are due
+            while reminder_queue and reminder_queue[0][0] <= now:
+                remind_at, task_id, version, lead = heapq.heappop(reminder_queue)
+                current_version, task = scheduled_tasks[task_id]
+                if version != current_version:
+                    continue
+                reminder_sink({
+                    'task_id': task_id,
+                    'assigned_to': task['assigned_to'],
+                    'task_title': task['task_title'],
+                    'due_date': task['due_date'].strftime(date_format),
+                    'lead_days': lead,
+                    'message': f"Task '{task['task_title']}' is due " + ("today." if lead == 0 else f"in {lead} days.")
+                })
+
+            # Sleep until the next reminder is due, checking the inbox at least every 'poll_seconds'
+            sleep_seconds = poll_seconds
+            if reminder_queue:
+                sleep_seconds = min(sleep_seconds, max((reminder_queue[0][0] - datetime.now()).total_seconds(), 0))
+            time.sleep(sleep_seconds)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.remove(scheduler_inbox_file_path)
+
+# Appends a single event to the event log
+def emit_event(event_type, **fields):
+    """
+    Appends a change event to the event log of the current team.
+
+    Arguments:
+        event_type (str): What changed, for example 'task_added' or 'user_deleted'.
+        **fields: The event data, for example the task record or the username.
+    """
+
+    emit_events([dict(fields, type=event_type)])
+
+# Appends a batch of events to the event log
+def emit_events(events):
+    """
+    Appends change events to the event log, numbering them with a monotonic sequence number.
+
+    Arguments:
+        events (list): The events to append, each a dict with a 'type' and the event data.
+
+    Every event is written as one JSON line with 'seq' (sequence number) and 'time' added. The log is 'events/events.log';
+    once it reaches 'event_log_max_bytes' it is renamed to 'events-<first sequence number>.log' and a new log is started,
+    keeping the newest 'event_log_max_files' rotated files. Writers in other processes are kept out with a file lock where
+    the platform supports it, so sequence numbers are never repeated.
+    """
+
+    if not events:
+        return
+
+    os.makedirs(events_directory, exist_ok=True)
+    log_path = os.path.join(events_directory, "events.log")
+
+    with open(os.path.join(events_directory, "events.lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        sequence = read_last_event_sequence()
+
+        # Rotate the log once it is full
+        if os.path.isfile(log_path) and os.path.getsize(log_path) >= event_log_max_bytes:
+            with open(log_path, "r") as log_file:
+                first_sequence = json.loads(log_file.readline())['seq']
+            os.replace(log_path, os.path.join(events_directory, f"events-{first_sequence:012d}.log"))
+            for old_log_name in list_rotated_event_logs()[:-event_log_max_files]:
+                os.remove(os.path.join(events_directory, old_log_name))
+
+        event_time = datetime.now().isoformat(timespec="seconds")
+        with open(log_path, "a") as log_file:
+            for event in events:
+                sequence += 1
+                log_file.write(json.dumps(dict(event, seq=sequence, time=event_time)) + "\n")
+
+# Returns the rotated event log files
+def list_rotated_event_logs():
+    """
+    Returns the names of the rotated event log files, oldest first.
+    """
+
+    if not os.path.isdir(events_directory):
+        return []
+    return sorted(file_name for file_name in os.listdir(events_directory) if file_name.startswith("events-") and file_name.endswith(".log"))
+
+# Returns the sequence number of the last event written
+def read_last_event_sequence():
+    """
+    Reads the sequence number of the last event in the event log.
+
+    Returns:
+        sequence (int): The last sequence number, or 0 if no event has been written.
+
+    Only the end of the newest log file is read, so this takes the same time however long the log is.
+    """
+
+    log_paths = [os.path.join(events_directory, file_name) for file_name in list_rotated_event_logs()]
+    log_paths.append(os.path.join(events_directory, "events.log"))
+
+    for log_path in reversed(log_paths):
+        if not os.path.isfile(log_path) or os.path.getsize(log_path) == 0:
+            continue
+        with open(log_path, "rb") as log_file:
+            log_file.seek(max(os.path.getsize(log_path) - 64 * 1024, 0))
+            last_line = log_file.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+        return json.loads(last_line)['seq']
+    return 0
+
+# Reads events from the event log
+def tail_events(after_sequence=0, follow=False, poll_seconds=1):
+    """
+    Reads the change events that came after a sequence number, oldest first.
+
+    Arguments:
+        after_sequence (int): Only events with a higher sequence number are returned. Default is 0 (all events kept).
+        follow (bool): True to keep waiting for new events after reaching the end of the log, like 'tail -f'.
+        poll_seconds (int): How often to look for new events when following.
+
+    Yields:
+        event (dict): A change event, including its 'seq' (sequence number), 'time' and 'type'.
+
+    Rotated files that end before the sequence number are skipped by name without being read.
+    When following, the log is read on from where the last poll stopped, and from its start only after a rotation.
+    A consumer can remember the 'seq' of the last event it handled and resume from there.
+    """
+
+    log_path = os.path.join(events_directory, "events.log")
+    log_inode = None
+    log_offset = 0 # Bytes of the current log already read
+
+    while True:
+        # Read the rotated files on the first pass and whenever the log has been rotated since the last poll,
+        # skipping files whose events all come before the sequence number
+        current_inode = os.stat(log_path).st_ino if os.path.isfile(log_path) else None
+        if log_inode is None or current_inode != log_inode:
+            rotated_logs = list_rotated_event_logs()
+            first_sequences = [int(file_name[len("events-"):-len(".log")]) for file_name in rotated_logs]
+            for file_name in rotated_logs[max(bisect_right(first_sequences, after_sequence + 1) - 1, 0):]:
+                with open(os.path.join(events_directory, file_name), "r") as log_file:
+                    for event_line in log_file:
+                        event = json.loads(event_line)
+                        if event['seq'] > after_sequence:
+                            after_sequence = event['seq']
+                            yield event
+            log_inode = current_inode
+            log_offset = 0
+
+        if os.path.isfile(log_path):
+            with open(log_path, "rb") as log_file:
+                log_stat = os.fstat(log_file.fileno())
+                # Pick up the rotated files first if the log was rotated since it was checked above
+                if log_stat.st_ino != log_inode:
+                    continue
+                # Start again if the log was cut short in place
+                if log_stat.st_size < log_offset:
+                    log_offset = 0
+                log_file.seek(log_offset)
+                for event_line in iter(log_file.readline, b""):
+                    if not event_line.endswith(b"\n"):
+                        # Leave a line that is still being written for the next poll
+                        break
+                    log_offset += len(event_line)
+                    event = json.loads(event_line)
+                    if event['seq'] > after_sequence:
+                        after_sequence = event['seq']
+                        yield event
+
+        if not follow:
+            return
+        time.sleep(poll_seconds)
+
+# Returns the oldest event still in the event log
+def read_first_event():
+    """
+    Reads the oldest event kept in the event log.
+
+    Returns:
+        event (dict): The first event kept, or None if the event log is empty.
+    """
+
+    log_paths = [os.path.join(events_directory, file_name) for file_name in list_rotated_event_logs()]
+    log_paths.append(os.path.join(events_directory, "events.log"))
+
+    for log_path in log_paths:
+        if os.path.isfile(log_path) and os.path.getsize(log_path) > 0:
+            with open(log_path, "r") as log_file:
+                return json.loads(log_file.readline())
+    return None
+
+# Writes a full copy of the register for syncing
+def export_snapshot(output_path):
+    """
+    Writes all users and tasks to a sync file that import_changes() can load into another register.
+
+    Arguments:
+        output_path (str): The file to write.
+
+    Returns:
+        version (int): The event sequence number the snapshot is up to date with. Pass it to export_delta() for the next sync.
+
+    The sync file is JSON lines: a header with the 'kind' and 'version', then one line per user and per task.
+    The version is read before the files, so a change made during the export is also in the next delta;
+    applying it twice does no harm because every change carries the full task or user.
+    """
+
+    version = read_last_event_sequence()
+    users = load_users()
+    # Stream registers over the memory budget into the snapshot
+    task_list = iter_tasks() if exceeds_memory_budget() else load_tasks()
+
+    with open(output_path, "w") as output_file:
+        output_file.write(json.dumps({'kind': "snapshot", 'version': version, 'team': active_team}) + "\n")
+        for username, password in users.items():
+            output_file.write(json.dumps({'op': "upsert", 'user': username, 'password': password}) + "\n")
+        for task in task_list:
+            output_file.write(json.dumps({'op': "upsert", 'change': "added", 'task': task_to_record(task)}) + "\n")
+
+    return version
+
+# Writes the changes made to the register since a version
+def export_delta(output_path, since):
+    """
+    Writes the users and tasks changed since a version or time to a sync file that import_changes() can apply.
+
+    Arguments:
+        output_path (str): The file to write.
+        since (int or str): The version returned by the last export, or an ISO time such as '2026-10-01T00:00:00'.
+
+    Returns:
+        version (int): The event sequence number the delta is up to date with. Pass it to export_delta() for the next sync.
+
+    Raises:
+        ValueError: If events since the version have already been rotated out of the event log, so only a snapshot can
+        bring the other register up to date.
+
+    The changes are read from the event log, so the export reads only the events since the version and not the whole
+    register. A task changed several times is written once with its latest fields, marked 'added', 'updated' or
+    'completed', and archived tasks are written as removals. Users are written with their current password.
+    """
+
+    first_event = read_first_event()
+    by_time = isinstance(since, str)
+
+    # Events before the oldest one kept are lost, so a delta from before then would be incomplete
+    if first_event is not None and first_event['seq'] > 1:
+        if (first_event['time'] > since) if by_time else (since < first_event['seq'] - 1):
+            raise ValueError(f"The event log no longer goes back to {since}, export a snapshot instead.")
+
+    # Keep only the latest change of every task and user
+    version = since if not by_time else 0
+    task_changes = {} # Task ID -> (change, record), or (None, None) once archived
+    user_changes = set()
+    for event in tail_events(0 if by_time else since):
+        version = event['seq']
+        if by_time and event['time'] < since:
+            continue
+
+        if 'task' in event:
+            task_id = event['task']['task_id']
+            if event['type'] == "task_archived":
+                task_changes[task_id] = (None, None)
+            elif event['type'] == "task_added" or task_changes.get(task_id, ("updated",))[0] == "added":
+                task_changes[task_id] = ("added", event['task'])
+            elif event['type'] == "task_completed":
+                task_changes[task_id] = ("completed", event['task'])
+            else:
+                task_changes[task_id] = ("updated", event['task'])
+        elif 'username' in event:
+            user_changes.add(event['username'])
+
+    users = load_users() if user_changes else {}
+
+    with open(output_path, "w") as output_file:
+        output_file.write(json.dumps({'kind': "delta", 'since': since, 'version': version, 'team': active_team}) + "\n")
+        for username in sorted(user_changes):
+            if username in users:
+                output_file.write(json.dumps({'op': "upsert", 'user': username, 'password': users[username]}) + "\n")
+            else:
+                output_file.write(json.dumps({'op': "remove", 'user': username}) + "\n")
+        for task_id, (change, record) in task_changes.items():
+            if change is None:
+                output_file.write(json.dumps({'op': "remove", 'task_id': task_id}) + "\n")
+            else:
+                output_file.write(json.dumps({'op': "upsert", 'change': change, 'task': record}) + "\n")
+
+    return version
+
+# Applies a snapshot or delta written by export_snapshot() or export_delta()
+def import_changes(input_path):
+    """
+    Applies a sync file to the register of the current team.
+
+    Arguments:
+        input_path (str): The snapshot or delta file to apply.
+
+    Returns:
+        version (int): The version the register is now up to date with, or None if the delta was already applied.
+
+    Raises:
+        ValueError: If a delta starts after the last version imported, so the changes in between would be missing.
+
+    A snapshot replaces all users and tasks. A delta adds or replaces the tasks and users it lists by task ID and
+    username and removes the ones it marks as removed. The version imported last is kept in 'sync_version.txt',
+    so a delta that was already applied is skipped. The changes are applied with one rewrite of each file and
+    the task indexes are updated only for the tasks in the delta.
+    """
+
+    imported_version = 0
+    if os.path.isfile(sync_version_file_path):
+        with open(sync_version_file_path, "r") as sync_version_file:
+            imported_version = int(sync_version_file.read().strip())
+
+    with open(input_path, "r") as input_file:
+        header = json.loads(input_file.readline())
+
+        if header['kind'] == "delta":
+            if header['version'] <= imported_version:
+                return None
+            # A delta by time can not be checked against the version, so only a gap between versions is refused
+            if isinstance(header['since'], int) and header['since'] > imported_version:
+                raise ValueError(f"The delta starts at version {header['since']}, but this register was last synced "
+                                 f"to version {imported_version}. Import a snapshot or an earlier delta first.")
+            users = load_users()
+            tasks_by_id = {task['task_id']: task for task in load_tasks()}
+        else:
+            users = {}
+            tasks_by_id = {}
+
+        changed_tasks = []
+        removed_task_ids = []
+        for change_line in input_file:
+            change = json.loads(change_line)
+            if 'user' in change:
+                if change['op'] == "upsert":
+                    users[change['user']] = change['password']
+                else:
+                    users.pop(change['user'], None)
+            elif change['op'] == "upsert":
+                task = task_from_record(change['task'])
+                tasks_by_id[task['task_id']] = task
+                changed_tasks.append(task)
+            elif tasks_by_id.pop(change['task_id'], None) is not None:
+                removed_task_ids.append(change['task_id'])
+
+    write_users(users)
+    update_tasks_file(sorted(tasks_by_id.values(), key=itemgetter('due_date')))
+
+    # A snapshot replaces the whole register, so the indexes are rebuilt on the next load
+    if header['kind'] == "snapshot":
+        global task_index_signature
+        task_index_signature = None
+    else:
+        for task_id in removed_task_ids:
+            unindex_task(task_id)
+        for task in changed_tasks:
+            index_task(task)
+        mark_task_indexes_current()
+
+    with open(sync_version_file_path, "w") as sync_version_file:
+        sync_version_file.write(f"{header['version']}\n")
+
+    return header['version']
+
+# Routes the program input and output of each thread to its own session
+class SessionStream(io.TextIOBase):
+    """
+    Stands in for sys.stdin or sys.stdout, so the menus can run against scripted answers without changing how they
+    call input() and print().
+
+    In a thread running a simulated session, reading returns the session's next scripted answer and writing goes to
+    the session's output. Every other thread reads and writes the real stream, and has its answers copied to the
+    recording file if one is being recorded.
+    """
+
+    # Wraps a real stream
+    def __init__(self, stream):
+        """
+        Arguments:
+            stream (file): The real sys.stdin or sys.stdout.
+        """
+
+        self.stream = stream
+
+    # Tells input() and print() which ways the stream can be used
+    def readable(self):
+        """
+        Returns True if the real stream can be read.
+        """
+
+        return self.stream.readable()
+
+    # Tells input() and print() which ways the stream can be used
+    def writable(self):
+        """
+        Returns True if the real stream can be written to.
+        """
+
+        return self.stream.writable()
+
+    # Reports a terminal only for threads that use the real stream
+    def isatty(self):
+        """
+        Returns True if the thread is not running a simulated session and the real stream is a terminal.
+        """
+
+        return getattr(session, "answers", None) is None and self.stream.isatty()
+
+    # Reads the next answer of the session
+    def readline(self, size=-1):
+        """
+        Reads one line, from the scripted answers in a simulated session or from the real stream otherwise.
+
+        Returns:
+            answer_line (str): The answer ending with a newline, or an empty string once the answers run out.
+        """
+
+        answers = getattr(session, "answers", None)
+        if answers is not None:
+            answer = next(answers, None)
+            return "" if answer is None else answer + "\n"
+
+        answer_line = self.stream.readline(size)
+        if getattr(session, "recording", None) is not None:
+            session.recording.write(answer_line)
+            session.recording.flush()
+        return answer_line
+
+    # Writes to the output of the session
+    def write(self, text):
+        """
+        Writes text to the output of a simulated session, or to the real stream otherwise.
+
+        Arguments:
+            text (str): The text to write.
+
+        Returns:
+            length (int): The number of characters written.
+        """
+
+        if getattr(session, "answers", None) is not None:
+            if session.output is not None:
+                session.output.write(text)
+            return len(text)
+        return self.stream.write(text)
+
+    # Flushes the output of the session
+    def flush(self):
+        """
+        Flushes the real stream, or the session's output in a simulated session.
+        """
+
+        if getattr(session, "answers", None) is None:
+            self.stream.flush()
+        elif session.output is not None:
+            session.output.flush()
+
+    # Keeps the real stream open when a session exits
+    def close(self):
+        """
+        Does nothing, as exit() closes sys.stdin and the real stream is shared by all sessions.
+        """
+
+# Routes sys.stdin and sys.stdout through the sessions
+def install_session_streams():
+    """
+    Replaces sys.stdin and sys.stdout with session streams, once.
+    """
+
+    global session_streams_installed
+
+    if session_streams_installed:
+        return
+
+    sys.stdin = SessionStream(sys.stdin)
+    sys.stdout = SessionStream(sys.stdout)
+    session_streams_installed = True
+
+# Runs the menus for one simulated session
+def run_session(answers, output=None):
+    """
+    Runs the Task Manager menus in the calling thread, answering the prompts from a script instead of the keyboard.
+
+    Arguments:
+        answers (iterable): The answers to the prompts, in order, without newlines.
+        output (file): Where the screens of the session are written. Default is None, which discards them.
+
+    Returns:
+        action_timings (list): A (menu option, seconds) tuple for every menu action the session ran, in order.
+
+    The session ends when it runs out of answers or chooses to exit. Each thread has its own logged in user and
+    answers, so several sessions can run at once in separate threads. They share the files and the task indexes (guarded
+    by 'task_index_lock') like operators at separate terminals would. The file paths should be set once before the
+    threads start. Sessions of the same team share its shard, and sessions of different teams take turns on it (see
+    select_team_shard()), so sessions of many teams run faster in separate processes.
+    """
+
+    install_session_streams()
+
+    session.current_user = None
+    session.answers = iter(answers)
+    session.output = output
+    session.action_timings = []
+    try:
+        task_manager()
+    except (EOFError, SystemExit):
+        pass
+    finally:
+        # Let sessions of other teams have the shard
+        with shard_condition:
+            shard_sessions.discard(threading.get_ident())
+            shard_condition.notify_all()
+        session.answers = None
+
+    return session.action_timings
+
+# Records the answers typed in an interactive session
+def record_session(recording_path):
+    """
+    Runs the Task Manager menus on the terminal, appending every answer typed to a file that run_session() can replay.
+
+    Arguments:
+        recording_path (str): The file the answers are written to, one per line.
+    """
+
+    install_session_streams()
+
+    with open(recording_path, "a") as recording_file:
+        session.recording = recording_file
+        try:
+            task_manager()
+        finally:
+            session.recording = None
+
+# Entry point of the Task Manager program
+def task_manager():
+    """
+    Entry point of program.
+
+    This function performs the following steps:
+    1. Checks if the 'user.txt' file exists and creates it if it doesn't.
+    2. Checks if the 'tasks.txt' file exists and creates it if it doesn't.
+    3. Enters the main menu loop, prompting the user to login.
+    4. Displays the main menu and performs the corresponding menu actions based on user input.
+
+    The files are checked once at startup rather than on every return to the main menu.
+    
+    Takes action based on the user's choice from the main menu.
+
+    Options that are only accessible to the ADMIN:
+    - Generate Reports
+    - Display Statistics
+    - Delete Users
+    """
+    
+    # Turn on ANSI escape codes in the Windows console, which clear_screen() and the screen renderer use
+    if os.name == "nt":
+        os.system("")
+    # Draw the screens in process, rewriting only the lines that change between them
+    start_screen_renderer()
+
+    # Create 'user.txt' file if it doesn't exist
+    create_user_file()
+    # Create 'tasks.txt' file if it doesn't exist
+    create_tasks_file()
+
     # Main menu loop
     while True:
-        # Create 'user.txt' file if it doesn't exist
-        create_user_file()
-        # Create 'tasks.txt' file if it doesn't exist
-        create_tasks_file()
-        
         login()
 
         menu_choice = main_menu()
-        
-        if menu_choice == 'r':
-            register_user()
-        elif menu_choice == 'a':
-            add_task()
-        elif menu_choice == 'va':
-            view_all()
-        elif menu_choice == 'vm':
-            view_mine()
-        elif menu_choice == 'gr' and current_user == 'admin':
-            generate_reports()
-        elif menu_choice == 'cp':
-            change_password()
-        elif menu_choice == 'l':
-            logout()
-        elif menu_choice == 'e':
-            exit()
-        elif menu_choice == 'ds' and current_user == 'admin':
-            display_statistics()
-        elif menu_choice == 'du' and current_user == 'admin':
-            delete_user()
-        else:
-            input("\nYou have made a wrong choice, press 'Enter' to try again...")
-            clear_screen()
+        action_start_time = time.perf_counter()
+
+        # Capture a profile of the action if it was chosen for capture
+        with capture_menu_action(menu_choice):
+            if menu_choice == 'r':
+                register_user()
+            elif menu_choice == 'a':
+                add_task()
+            elif menu_choice == 'va':
+                view_all()
+            elif menu_choice == 'vm':
+                view_mine()
+            elif menu_choice == 's':
+                find_tasks()
+            elif menu_choice == 'gr' and session.current_user == 'admin':
+                generate_reports()
+            elif menu_choice == 'cp':
+                # The ADMIN may be working in another team, so change the password in the user's own team
+                with using_team_shard(get_user_team(session.current_user)):
+                    change_password()
+            elif menu_choice == 'l':
+                logout()
+            elif menu_choice == 'e':
+                exit()
+            elif menu_choice == 'ds' and session.current_user == 'admin':
+                display_statistics()
+            elif menu_choice == 'du' and session.current_user == 'admin':
+                delete_user()
+            elif menu_choice == 'dd' and session.current_user == 'admin':
+                deadline_digest()
+            elif menu_choice == 'at' and session.current_user == 'admin':
+                archive_old_tasks()
+            elif menu_choice == 'st' and session.current_user == 'admin':
+                switch_team()
+            elif menu_choice == 'tr' and session.current_user == 'admin':
+                team_reports()
+            elif menu_choice == 'rt' and session.current_user == 'admin':
+                report_trends()
+            elif menu_choice == 'pf' and profiling_enabled:
+                clear_screen()
+                print_profile_summary(sys.stdout)
+                input(f"\n{press_enter_message}")
+            else:
+                input("\nYou have made a wrong choice, press 'Enter' to try again...")
+                clear_screen()
+
+        # Time the action in a simulated session
+        if getattr(session, "action_timings", None) is not None:
+            session.action_timings.append((menu_choice, time.perf_counter() - action_start_time))
 
 
 # Start the Program
-task_manager()
\ No newline at end of file
+if __name__ == "__main__":
+    # Stream registers that would not fit in the memory budget instead of loading them
+    memory_budget = sys.argv[sys.argv.index("--memory-budget") + 1] if "--memory-budget" in sys.argv else os.environ.get("TASK_MANAGER_MEMORY_BUDGET")
+    if memory_budget:
+        memory_budget_bytes = parse_byte_size(memory_budget)
+
+    if "--team" in sys.argv:
+        # Run the commands below against the shard of the given team
+        select_team_shard(sys.argv[sys.argv.index("--team") + 1].lower())
+
+    if "--deadline-digest" in sys.argv:
+        # Write the deadline digest without starting the menu, for scheduled runs
+        digest_arguments = sys.argv[sys.argv.index("--deadline-digest") + 1:]
+        write_deadline_digest(int(digest_arguments[0]) if digest_arguments and digest_arguments[0].isdigit() else 7)
+    elif "--archive-tasks" in sys.argv:
+        # Archive old completed tasks without starting the menu, for scheduled runs
+        archive_arguments = sys.argv[sys.argv.index("--archive-tasks") + 1:]
+        archive_completed_tasks(int(archive_arguments[0]) if archive_arguments and archive_arguments[0].isdigit() else archive_age_days)
+    elif "--report-trends" in sys.argv:
+        # Write the trends report from the report history without starting the menu, for scheduled runs
+        trend_arguments = sys.argv[sys.argv.index("--report-trends") + 1:]
+        write_trends_report(int(trend_arguments[0]) if trend_arguments and trend_arguments[0].isdigit() else trend_weeks)
+    elif "--compact-tasks" in sys.argv:
+        # Sort 'tasks.txt' by due date within the memory budget and print the number of tasks kept, for scheduled runs
+        print(compact_tasks_file())
+    elif "--tail-events" in sys.argv:
+        # Print the change events after a sequence number as JSON lines, following the log with '--follow'
+        tail_arguments = sys.argv[sys.argv.index("--tail-events") + 1:]
+        try:
+            for event in tail_events(int(tail_arguments[0]) if tail_arguments and tail_arguments[0].isdigit() else 0, follow="--follow" in sys.argv):
+                print(json.dumps(event), flush=True)
+        except KeyboardInterrupt:
+            pass
+    elif "--export" in sys.argv:
+        # Write a snapshot, or with '--since VERSION|TIME' a delta, to a sync file and print its version
+        output_path = sys.argv[sys.argv.index("--export") + 1]
+        if "--since" in sys.argv:
+            since = sys.argv[sys.argv.index("--since") + 1]
+            print(export_delta(output_path, int(since) if since.isdigit() else since))
+        else:
+            print(export_snapshot(output_path))
+    elif "--import" in sys.argv:
+        # Apply a snapshot or delta written by '--export' and print the version synced to
+        print(import_changes(sys.argv[sys.argv.index("--import") + 1]))
+    elif "--record-session" in sys.argv:
+        # Run the menus, appending every answer typed to a file that can be replayed with 'benchmark.py --replay'
+        record_session(sys.argv[sys.argv.index("--record-session") + 1])
+    elif "--deadline-scheduler" in sys.argv:
+        # Send deadline reminders to the reminder spool directory until interrupted
+        run_deadline_scheduler()
+    else:
+        task_manager()
\ No newline at end of file